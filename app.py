@@ -7,38 +7,45 @@ import logging
 import threading
 import tempfile
 from datetime import datetime
-import base64
 import json
+import requests
 
 
-from voice_assistant.audio import record_audio, play_audio, stop_audio
-from voice_assistant.transcription import transcribe_audio
-from voice_assistant.response_generation import generate_response
-from voice_assistant.text_to_speech import text_to_speech
-from voice_assistant.utils import delete_file
+from voice_assistant.text_to_speech import prewarm_tts_cache
+from voice_assistant.session_worker import SessionWorker
+from voice_assistant.transcription import check_fastwhisperapi
 from voice_assistant.config import Config
-from voice_assistant.api_key_manager import get_transcription_api_key, get_response_api_key, get_tts_api_key
+from voice_assistant.metrics import start_metrics_server
+from voice_assistant.settings import Settings
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Function to autoplay audio
-def autoplay_audio(file_path):
-    with open(file_path, "rb") as f:
-        data = f.read()
-        b64 = base64.b64encode(data).decode()
-        md = f"""
-            <audio autoplay>
-            <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
-            </audio>
-            """
-        st.markdown(md, unsafe_allow_html=True)
-
-# Function for recording state
-def start_recording():
-    with st.spinner("Recording..."):
-        record_audio(Config.INPUT_AUDIO)
-    return True
+def autoplay_audio(data, mime_type):
+    # st.audio hands the audio to Streamlit's media file manager, which serves
+    # the raw bytes from /media with range requests. The browser starts
+    # playing after the first chunk, instead of waiting for a base64 copy
+    # 33% larger than the file to arrive inside the page.
+    st.audio(data, format=mime_type, autoplay=True)
+
+# Pre-warm the TTS cache once per process and TTS settings, not on every rerun
+@st.cache_resource
+def start_tts_prewarm(settings):
+    thread = threading.Thread(target=prewarm_tts_cache, args=(settings.tts_model, settings.tts_api_key),
+                              kwargs={"settings": settings}, daemon=True)
+    thread.start()
+    return thread
+
+# One keep-alive HTTP session per process for the service checks
+@st.cache_resource
+def http_session():
+    return requests.Session()
+
+# Serve the latency histograms once per process, not on every rerun
+@st.cache_resource
+def start_metrics():
+    return start_metrics_server()
 
 # Function to save API keys to .env file
 def save_api_keys(keys_dict):
@@ -69,6 +76,76 @@ def save_api_keys(keys_dict):
         logging.error(f"Error saving API keys: {e}")
         return False
 
+APP_CSS = """
+    <style>
+    * {
+        font-family: 'Segoe UI', 'Helvetica Neue', sans-serif !important;
+        color: #d1d5db;
+    }
+
+    .block-container {
+        background-color: #0d0d0d;
+        padding: 2rem;
+        border-radius: 12px;
+    }
+
+    /* Title */
+    .stMarkdown h1 {
+        font-size: 2rem;
+        font-weight: 600;
+        color: #f3f4f6;
+        text-align: center;
+    }
+
+    /* Chat bubbles */
+    .stChatMessage {
+        background-color: #1f2937;
+        border: 1px solid #374151;
+        border-radius: 10px;
+        padding: 1rem;
+        margin-bottom: 1rem;
+    }
+
+    /* Primary buttons */
+    .stButton button {
+        border-radius: 8px;
+        padding: 0.5rem 1.2rem;
+        background-color: #1f2937;  /* dark gray */
+        color: #f3f4f6;
+        font-weight: 500;
+        border: 1px solid #374151;
+    }
+    .stButton button:hover {
+        background-color: #374151;  /* slightly lighter gray */
+        color: #f9fafb;
+    }
+
+    /* Stop button styling */
+    div[data-testid="stButton"][aria-label="stop_button_top"] button {
+        background-color: #ef4444 !important;
+        color: white !important;
+        border: none !important;
+    }
+    div[data-testid="stButton"][aria-label="stop_button_top"] button:hover {
+        background-color: #dc2626 !important;
+    }
+
+    /* Inputs & dropdowns */
+    .stTextInput > div > div > input,
+    .stSelectbox > div > div {
+        background-color: #1f2937 !important;
+        color: #d1d5db !important;
+        border: 1px solid #374151 !important;
+    }
+
+    section[tabindex] {
+        background-color: #111827 !important;
+        border: 1px solid #374151 !important;
+        border-radius: 8px;
+    }
+    </style>
+"""
+
 # Main app function
 def main():
     st.set_page_config(
@@ -76,101 +153,108 @@ def main():
         page_icon="🎤",
         layout="wide",
     )
-    st.markdown("""
-        <style>
-        * {
-            font-family: 'Segoe UI', 'Helvetica Neue', sans-serif !important;
-            color: #d1d5db;
-        }
-
-        .block-container {
-            background-color: #0d0d0d;
-            padding: 2rem;
-            border-radius: 12px;
-        }
-
-        /* Title */
-        .stMarkdown h1 {
-            font-size: 2rem;
-            font-weight: 600;
-            color: #f3f4f6;
-            text-align: center;
-        }
-
-        /* Chat bubbles */
-        .stChatMessage {
-            background-color: #1f2937;
-            border: 1px solid #374151;
-            border-radius: 10px;
-            padding: 1rem;
-            margin-bottom: 1rem;
-        }
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
-        /* Primary buttons */
-        .stButton button {
-            border-radius: 8px;
-            padding: 0.5rem 1.2rem;
-            background-color: #1f2937;  /* dark gray */
-            color: #f3f4f6;
-            font-weight: 500;
-            border: 1px solid #374151;
-        }
-        .stButton button:hover {
-            background-color: #374151;  /* slightly lighter gray */
-            color: #f9fafb;
-        }
-
-        /* Stop button styling */
-        div[data-testid="stButton"][aria-label="stop_button_top"] button {
-            background-color: #ef4444 !important;
-            color: white !important;
-            border: none !important;
-        }
-        div[data-testid="stButton"][aria-label="stop_button_top"] button:hover {
-            background-color: #dc2626 !important;
-        }
+    # Each browser session gets its own settings, so one user's choices never
+    # change the backends another user's turn is running on.
+    if 'settings' not in st.session_state:
+        st.session_state.settings = Settings.from_config()
+    settings = st.session_state.settings
 
-        /* Inputs & dropdowns */
-        .stTextInput > div > div > input,
-        .stSelectbox > div > div {
-            background-color: #1f2937 !important;
-            color: #d1d5db !important;
-            border: 1px solid #374151 !important;
-        }
+    with st.sidebar:
+        settings_panel()
 
-        section[tabindex] {
-            background-color: #111827 !important;
-            border: 1px solid #374151 !important;
-            border-radius: 8px;
-        }
-        </style>
+    st.markdown("""
+        <h1 style="text-align:center; margin-bottom: 0.5rem;">🤖 Spark Voice Assistant</h1>
+        <p style="text-align:center; font-size: 1rem; color: #9ca3af;">
+            Your personal assistant — ready to help.
+        </p>
     """, unsafe_allow_html=True)
 
 
+    
+    # Metrics display row
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(label="Transcription", value=settings.transcription_model)
+    with col2:
+        st.metric(label="Response", value=settings.response_model)
+    with col3:
+        st.metric(label="TTS", value=settings.tts_model)
 
+    
+    # Stop speaking button
+    stop_col = st.columns([1])[0]
+    with stop_col:
+        if st.button("🛑 Stop Speaking", key="stop_button_top", use_container_width=True):
+            stop_speaking()
+            st.info("Playback stopped. You can now speak again.")
 
+    
+    start_tts_prewarm(settings)
+    start_metrics()
 
-
+    # Initialize session state
+    if 'worker' not in st.session_state:
+        st.session_state.worker = SessionWorker([{
+            "role": "system",
+            "content": """You are spark, a comprehensive personal assistant with access to the user's calendar, emails, tasks, weather information, news, contacts, and expenses. 
+            Use the provided functions to retrieve information and assist the user. Always provide thoughtful and detailed responses. Assume today's date is 2025-03-10"""
+        }])
+        st.session_state.chat_history = st.session_state.worker.chat_history
+        st.session_state.turn = None
+    
+    if 'messages' not in st.session_state:
+        st.session_state.messages = []
+        
+        st.session_state.messages.append({
+            "role": "assistant", 
+            "content": "Hello! I'm Spark"
+        })
     
-    st.sidebar.title("Settings")
+    # Display chat messages
+    chat_container = st.container()
+    with chat_container:
+        chat_log()
+        live_turn()
+    
+    
+    col1, col2 = st.columns([1, 4])
+    
+    with col1:
+        if st.button("🎤 Record", key="record_button", use_container_width=True):
+            submit_turn()
+    
+    
+    user_input = st.chat_input("Or type your message here...")
+    if user_input:
+        submit_turn(user_input)
+
+# The settings panel reruns on its own when its widgets change, without
+# re-rendering the chat
+@st.fragment
+def settings_panel():
+    settings = st.session_state.settings
+    st.title("Settings")
+
     
     
     tts_options = ["openai", "elevenlabs", "deepgram", "melotts", "cartesia", "local"]
-    selected_tts = st.sidebar.selectbox(
+    selected_tts = st.selectbox(
         "Text-to-Speech Model",
         tts_options,
-        index=tts_options.index(Config.TTS_MODEL) if Config.TTS_MODEL in tts_options else 0
+        index=tts_options.index(settings.tts_model) if settings.tts_model in tts_options else 0
     )
     
     
     if selected_tts == "openai":
-        tts_voice = st.sidebar.selectbox(
+        tts_voice = st.selectbox(
             "OpenAI Voice",
             ["nova", "alloy", "echo", "fable", "onyx", "shimmer"],
             index=0
         )
     elif selected_tts == "elevenlabs":
-        tts_voice = st.sidebar.selectbox(
+        tts_voice = st.selectbox(
             "ElevenLabs Voice",
             ["Paul J.", "Rachel", "Domi", "Adam", "Antoni", "Bella"],
             index=0
@@ -178,65 +262,77 @@ def main():
     
     
     transcription_options = ["groq", "openai", "deepgram", "fastwhisperapi", "local"]
-    selected_transcription = st.sidebar.selectbox(
+    selected_transcription = st.selectbox(
         "Transcription Model",
         transcription_options,
-        index=transcription_options.index(Config.TRANSCRIPTION_MODEL) if Config.TRANSCRIPTION_MODEL in transcription_options else 0
+        index=transcription_options.index(settings.transcription_model) if settings.transcription_model in transcription_options else 0
     )
     
     
-    response_options = ["groq", "openai", "ollama", "local"]
-    selected_response = st.sidebar.selectbox(
+    response_options = ["groq", "openai", "ollama", "agent", "local"]
+    selected_response = st.selectbox(
         "Response Model",
         response_options,
-        index=response_options.index(Config.RESPONSE_MODEL) if Config.RESPONSE_MODEL in response_options else 0
+        index=response_options.index(settings.response_model) if settings.response_model in response_options else 0
     )
     
     
     if selected_response == "groq":
         llm_options = ["llama3-8b-8192", "llama3-70b-8192", "mixtral-8x7b-32768"]
-        selected_llm = st.sidebar.selectbox(
+        selected_llm = st.selectbox(
             "Groq LLM",
             llm_options,
-            index=llm_options.index(Config.GROQ_LLM) if Config.GROQ_LLM in llm_options else 0
+            index=llm_options.index(settings.groq_llm) if settings.groq_llm in llm_options else 0
         )
     elif selected_response == "openai":
         llm_options = ["gpt-4o", "gpt-4-turbo", "gpt-3.5-turbo"]
-        selected_llm = st.sidebar.selectbox(
+        selected_llm = st.selectbox(
             "OpenAI LLM",
             llm_options,
-            index=llm_options.index(Config.OPENAI_LLM) if Config.OPENAI_LLM in llm_options else 0
+            index=llm_options.index(settings.openai_llm) if settings.openai_llm in llm_options else 0
         )
     elif selected_response == "ollama":
         llm_options = ["llama3:8b", "llama3:70b", "mistral:7b"]
-        selected_llm = st.sidebar.selectbox(
+        selected_llm = st.selectbox(
             "Ollama LLM",
             llm_options,
-            index=llm_options.index(Config.OLLAMA_LLM) if Config.OLLAMA_LLM in llm_options else 0
+            index=llm_options.index(settings.ollama_llm) if settings.ollama_llm in llm_options else 0
         )
     
     
-    if st.sidebar.button("Apply Settings"):
-        Config.TTS_MODEL = selected_tts
-        Config.TRANSCRIPTION_MODEL = selected_transcription
-        Config.RESPONSE_MODEL = selected_response
+    if st.button("Apply Settings"):
+        changes = {
+            "tts_model": selected_tts,
+            "transcription_model": selected_transcription,
+            "response_model": selected_response,
+        }
+        
+        if selected_tts == "openai":
+            changes["openai_tts_voice"] = tts_voice
+        elif selected_tts == "elevenlabs":
+            changes["elevenlabs_voice"] = tts_voice
         
         if selected_response == "groq":
-            Config.GROQ_LLM = selected_llm
+            changes["groq_llm"] = selected_llm
         elif selected_response == "openai":
-            Config.OPENAI_LLM = selected_llm
+            changes["openai_llm"] = selected_llm
         elif selected_response == "ollama":
-            Config.OLLAMA_LLM = selected_llm
+            changes["ollama_llm"] = selected_llm
             
-        st.sidebar.success("Settings applied!")
-    
-    
-    with st.sidebar.expander("API Keys", expanded=False):
-        openai_key = st.text_input("OpenAI API Key", type="password", value=Config.OPENAI_API_KEY or "")
-        groq_key = st.text_input("Groq API Key", type="password", value=Config.GROQ_API_KEY or "")
-        deepgram_key = st.text_input("Deepgram API Key", type="password", value=Config.DEEPGRAM_API_KEY or "")
-        elevenlabs_key = st.text_input("ElevenLabs API Key", type="password", value=Config.ELEVENLABS_API_KEY or "")
-        cartesia_key = st.text_input("Cartesia API Key", type="password", value=Config.CARTESIA_API_KEY or "")
+        st.session_state.settings = settings.replace(**changes)
+        st.session_state.settings_applied = True
+        # The model names in the page header are outside this fragment
+        st.rerun()
+    if st.session_state.pop("settings_applied", False):
+        st.success("Settings applied!")
+    
+    
+    with st.expander("API Keys", expanded=False):
+        openai_key = st.text_input("OpenAI API Key", type="password", value=settings.openai_api_key or "")
+        groq_key = st.text_input("Groq API Key", type="password", value=settings.groq_api_key or "")
+        deepgram_key = st.text_input("Deepgram API Key", type="password", value=settings.deepgram_api_key or "")
+        elevenlabs_key = st.text_input("ElevenLabs API Key", type="password", value=settings.elevenlabs_api_key or "")
+        cartesia_key = st.text_input("Cartesia API Key", type="password", value=settings.cartesia_api_key or "")
         
         if st.button("Save API Keys"):
             keys_dict = {
@@ -246,16 +342,19 @@ def main():
                 "ELEVENLABS_API_KEY": elevenlabs_key,
                 "CARTESIA_API_KEY": cartesia_key
             }
+            # Use the new keys in this session right away; the .env file applies from the next start
+            settings = st.session_state.settings = settings.replace(
+                **{key.lower(): value for key, value in keys_dict.items() if value}
+            )
             if save_api_keys(keys_dict):
                 st.success("API Keys saved to .env file!")
             else:
                 st.error("Failed to save API keys.")
 
     # Service Status
-    with st.sidebar.expander("Service Status", expanded=False):
+    with st.expander("Service Status", expanded=False):
         if st.button("Check FastWhisperAPI"):
             try:
-                from voice_assistant.transcription import check_fastwhisperapi
                 check_fastwhisperapi()
                 st.success("FastWhisperAPI is running")
             except Exception as e:
@@ -263,158 +362,125 @@ def main():
         
         if st.button("Check MeloTTS"):
             try:
-                import requests
-                response = requests.get(f"http://localhost:{Config.TTS_PORT_LOCAL}/health")
+                response = http_session().get(f"http://{Config.TTS_HOST_LOCAL}:{Config.TTS_PORT_LOCAL}/ready", timeout=5)
                 if response.status_code == 200:
                     st.success("MeloTTS is running")
+                elif response.status_code == 503 and response.json().get("status") in ("loading", "warming"):
+                    st.info("MeloTTS is starting up, the model is still loading")
                 else:
                     st.error("MeloTTS is not responding properly")
             except Exception as e:
                 st.error(f"MeloTTS is not running: {str(e)}")
 
-    
-    st.markdown("""
-        <h1 style="text-align:center; margin-bottom: 0.5rem;">🤖 Spark Voice Assistant</h1>
-        <p style="text-align:center; font-size: 1rem; color: #9ca3af;">
-            Your personal assistant — ready to help.
-        </p>
-    """, unsafe_allow_html=True)
+def submit_turn(user_input=None):
+    """Start a turn on the session's worker; with no input, it records from the microphone."""
+    worker = st.session_state.worker
+    if worker.busy:
+        st.warning("Still answering the last message.")
+        return
+    finish_turn()
+    
+    if user_input and ("goodbye" in user_input.lower() or "arrivederci" in user_input.lower()):
+        goodbye = "Goodbye! It was nice chatting with you."
+        st.session_state.messages += [{"role": "user", "content": user_input}, {"role": "assistant", "content": goodbye}]
+        worker.chat_history += [{"role": "user", "content": user_input}, {"role": "assistant", "content": goodbye}]
+        st.rerun()
+    
+    st.session_state.turn = {
+        "user": user_input,
+        "assistant": "",
+        "status": "Thinking..." if user_input else "Recording...",
+        "audio": None,
+        "error": None,
+        "done": False,
+    }
+    # Read once, so the whole turn runs with the same settings even if they are changed meanwhile
+    worker.submit(st.session_state.settings, user_input)
+    st.rerun()
 
+def finish_turn():
+    """Move the last turn into the chat log, so the live area is free for the next one."""
+    turn = st.session_state.turn
+    if turn is None:
+        return
+    if turn["user"]:
+        st.session_state.messages.append({"role": "user", "content": turn["user"]})
+    if turn["assistant"]:
+        st.session_state.messages.append({"role": "assistant", "content": turn["assistant"]})
+    st.session_state.turn = None
 
-    
-    # Metrics display row
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric(label="Transcription", value=Config.TRANSCRIPTION_MODEL)
-    with col2:
-        st.metric(label="Response", value=Config.RESPONSE_MODEL)
-    with col3:
-        st.metric(label="TTS", value=Config.TTS_MODEL)
+def stop_speaking():
+    """Cancel the turn in progress and remove its audio, which stops playback in the browser."""
+    st.session_state.worker.cancel()
+    if st.session_state.turn is not None:
+        st.session_state.turn["audio"] = None
 
-    
-    # Stop speaking button
-    stop_col = st.columns([1])[0]
-    with stop_col:
-        if st.button("🛑 Stop Speaking", key="stop_button_top", use_container_width=True):
-            stop_audio()
-            st.info("Playback stopped. You can now speak again.")
+# Render time would otherwise grow with the conversation: only the latest
+# page of messages is drawn, and earlier ones are added on request by
+# rerunning just this fragment.
+@st.fragment
+def chat_log():
+    messages = st.session_state.messages
+    page_size = Config.APP_CHAT_PAGE_SIZE
+    shown = st.session_state.get("shown_messages", page_size)
+    if shown and len(messages) > shown:
+        st.button(f"Show earlier messages ({len(messages) - shown})", key="show_earlier",
+                  on_click=show_earlier_messages, args=(shown + page_size,))
+        messages = messages[-shown:]
+    for message in messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
 
-    
-    # Initialize session state
-    if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = [{
-            "role": "system",
-            "content": """You are spark, a comprehensive personal assistant with access to the user's calendar, emails, tasks, weather information, news, contacts, and expenses. 
-            Use the provided functions to retrieve information and assist the user. Always provide thoughtful and detailed responses. Assume today's date is 2025-03-10"""
-        }]
-    
-    if 'messages' not in st.session_state:
-        st.session_state.messages = []
-        
-        st.session_state.messages.append({
-            "role": "assistant", 
-            "content": "Hello! I'm Spark"
-        })
-    
-    # Display chat messages
-    chat_container = st.container()
-    with chat_container:
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                st.write(message["content"])
-    
-    
-    col1, col2 = st.columns([1, 4])
-    
-    with col1:
-        if st.button("🎤 Record", key="record_button", use_container_width=True):
-            recording_complete = start_recording()
-            
-            if recording_complete:
-                try:
-                    
-                    transcription_api_key = get_transcription_api_key()
-                    
-                    
-                    with st.spinner("Transcribing audio..."):
-                        user_input = transcribe_audio(Config.TRANSCRIPTION_MODEL, transcription_api_key, Config.INPUT_AUDIO, Config.LOCAL_MODEL_PATH)
-                    
-                    if not user_input:
-                        st.error("No speech detected. Please try again.")
-                    else:
-                        
-                        process_user_input(user_input, chat_container)
-                        
-                except Exception as e:
-                    st.error(f"An error occurred: {str(e)}")
-                    logging.error(f"An error occurred: {e}")
-    
-    
-    user_input = st.chat_input("Or type your message here...")
-    if user_input:
-        process_user_input(user_input, chat_container)
+def show_earlier_messages(shown):
+    st.session_state.shown_messages = shown
 
-def process_user_input(user_input, chat_container):
-    
-    st.session_state.messages.append({"role": "user", "content": user_input})
-    with chat_container:
-        with st.chat_message("user"):
-            st.write(user_input)
-    
-    
-    st.session_state.chat_history.append({"role": "user", "content": user_input})
-    
-    
-    if "goodbye" in user_input.lower() or "arrivederci" in user_input.lower():
-        with chat_container:
-            with st.chat_message("assistant"):
-                st.write("Goodbye! It was nice chatting with you.")
-        st.session_state.chat_history.append({"role": "assistant", "content": "Goodbye! It was nice chatting with you."})
+# Only this part of the page reruns while a turn is in progress; the worker
+# runs the turn elsewhere, so the script thread is free between polls. Once
+# the turn's last event is in, the fragment stops polling, so an idle page
+# (and the reply's audio player) isn't redrawn every APP_POLL_SECONDS.
+def live_turn():
+    turn = st.session_state.turn
+    running = turn is not None and not turn["done"]
+    st.fragment(turn_view, run_every=Config.APP_POLL_SECONDS if running else None)()
+
+def turn_view():
+    turn = st.session_state.turn
+    if turn is None:
         return
-    
-    # Generate response with a spinner to show loading
-    with st.spinner("Thinking..."):
-        try:
-            
-            response_api_key = get_response_api_key()
-            
-            
-            response_text = generate_response(Config.RESPONSE_MODEL, response_api_key, st.session_state.chat_history, Config.LOCAL_MODEL_PATH)
-            
-            
-            st.session_state.messages.append({"role": "assistant", "content": response_text})
-            with chat_container:
-                with st.chat_message("assistant"):
-                    st.write(response_text)
-            
-            
-            st.session_state.chat_history.append({"role": "assistant", "content": response_text})
-            
-            
-            if Config.TTS_MODEL in ['openai', 'elevenlabs', 'melotts', 'cartesia']:
-                output_file = 'output.mp3'
-            else:
-                output_file = 'output.wav'
-            
-            
-            tts_api_key = get_tts_api_key()
-            
-            
-            with st.spinner("Generating audio response..."):
-                text_to_speech(Config.TTS_MODEL, tts_api_key, response_text, output_file, Config.LOCAL_MODEL_PATH)
-                
-                
-                if Config.TTS_MODEL != "cartesia":
-                    autoplay_audio(output_file)
-                    
-        except Exception as e:
-            st.error(f"An error occurred: {str(e)}")
-            logging.error(f"An error occurred: {e}")
-            
-    # Optionally clean up files (commented out to match your original behavior)
-    # delete_file(Config.INPUT_AUDIO)
-    # if Config.TTS_MODEL != "cartesia":
-    #     delete_file(output_file)
+    if not turn["done"]:
+        for event in st.session_state.worker.poll():
+            kind = event["type"]
+            if kind == "status":
+                turn["status"] = event["text"]
+            elif kind == "transcript":
+                turn["user"] = event["text"]
+            elif kind == "delta":
+                turn["assistant"] += event["text"]
+            elif kind == "response":
+                turn["assistant"] = event["text"]
+            elif kind == "audio":
+                turn["audio"] = (event["data"], event["mime_type"])
+            elif kind == "error":
+                turn["error"] = event["message"]
+            elif kind == "done":
+                turn["done"] = True
+                turn["status"] = None
+        if turn["done"]:
+            # Rerun the page once so live_turn sets the fragment up without run_every
+            st.rerun()
+
+    if turn["user"]:
+        with st.chat_message("user"):
+            st.write(turn["user"])
+    if turn["assistant"] or not turn["done"]:
+        with st.chat_message("assistant"):
+            st.write(turn["assistant"])
+            if turn["status"]:
+                st.caption(turn["status"])
+            if turn["audio"]:
+                autoplay_audio(*turn["audio"])
+    if turn["error"]:
+        st.error(f"An error occurred: {turn['error']}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,118 @@
+# benchmarks/bench_contact_index.py
+
+"""
+Benchmark ContactIndex lookups against the old linear substring scan.
+
+Also checks that partial queries (name fragments, the start of a phone
+number, part of an email) still return every contact the old scan did.
+
+Usage:
+    python -m benchmarks.bench_contact_index [--contacts 100000] [--queries 2000]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from voice_assistant.contact_index import ContactIndex
+
+# Consonant-vowel(-coda) syllables give a few thousand distinct name parts,
+# closer to the spread of a real address book than a short list of names.
+SYLLABLES = [onset + vowel + coda
+             for onset in ["", "b", "ch", "d", "f", "g", "h", "j", "k", "l", "m", "n", "p", "r", "s", "sh", "t", "v", "w", "z"]
+             for vowel in ["a", "e", "i", "o", "u", "ai", "ee"]
+             for coda in ["", "", "n", "r", "l", "s"]]
+
+
+def make_name(rng, syllables):
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables)).title()
+
+
+def make_contacts(count, rng):
+    contacts = []
+    for i in range(count):
+        first = make_name(rng, rng.randint(1, 3))
+        last = make_name(rng, rng.randint(2, 3))
+        phone = f"{rng.randint(100, 999)}-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}"
+        email = f"{first.lower()}.{last.lower()}{i}@example.com"
+        contacts.append({"name": f"{first} {last}", "phone": phone, "email": email})
+    return contacts
+
+
+def misspell(name, rng):
+    """Drop or swap one letter, the way a transcription slip would."""
+    chars = list(name)
+    i = rng.randrange(1, len(chars) - 1)
+    if rng.random() < 0.5:
+        del chars[i]
+    else:
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return "".join(chars)
+
+
+def linear_scan(contacts, query):
+    return [contact for contact in contacts if query.lower() in contact['name'].lower() or query in contact['phone'] or query in contact['email']]
+
+
+def time_queries(fn, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "mean_ms": statistics.fmean(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p99_ms": timings[int(len(timings) * 0.99)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--contacts", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    contacts = make_contacts(args.contacts, rng)
+
+    start = time.perf_counter()
+    index = ContactIndex(contacts)
+    build_s = time.perf_counter() - start
+    print(f"Indexed {len(index)} contacts in {build_s:.2f}s")
+
+    samples = rng.sample(contacts, args.queries)
+    workloads = {
+        "fuzzy name": [misspell(c["name"], rng) for c in samples],
+        "exact phone": [c["phone"] for c in samples],
+        "phone digits": [c["phone"].replace("-", "") for c in samples],
+        "exact email": [c["email"] for c in samples],
+    }
+
+    hits = sum(1 for query, c in zip(workloads["fuzzy name"], samples) if c in index.search(query))
+    print(f"Fuzzy recall: {hits}/{len(samples)} misspelled names found in the top 10")
+
+    partial = []
+    for c in samples[:100]:
+        start = rng.randrange(len(c["name"]) - 1)
+        partial += [c["name"][start:start + rng.randint(2, 5)], c["phone"][:rng.randint(3, 7)],
+                    c["email"].split("@")[0][-rng.randint(3, 6):]]
+    same = sum(1 for query in partial  # emails are unique, so they identify the contacts
+               if {c["email"] for c in linear_scan(contacts, query)}
+               <= {c["email"] for c in index.search(query, limit=len(index))})
+    print(f"Substring compatibility: {same}/{len(partial)} partial queries return every contact the old scan did")
+
+    for label, queries in workloads.items():
+        stats = time_queries(index.search, queries)
+        print(f"index  {label:<13} mean {stats['mean_ms']:.3f} ms  p50 {stats['p50_ms']:.3f} ms  p99 {stats['p99_ms']:.3f} ms")
+
+    baseline_queries = workloads["exact phone"][:50]
+    stats = time_queries(lambda q: linear_scan(contacts, q), baseline_queries)
+    print(f"scan   {'exact phone':<13} mean {stats['mean_ms']:.3f} ms  p50 {stats['p50_ms']:.3f} ms  p99 {stats['p99_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
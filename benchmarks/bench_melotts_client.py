@@ -0,0 +1,114 @@
+# benchmarks/bench_melotts_client.py
+
+"""
+Measure per-request client overhead against a MeloTTS-compatible server.
+
+A stub server that returns a short PCM clip right away runs in-process, so
+the numbers are the client's connection and request costs only. It compares
+a bare requests.post per utterance (the old behaviour) with the pooled
+session. It then times a reply split into sentences, fetched one by one
+with bare posts and concurrently with the async client. For that part the
+stub waits --delay seconds per request, standing in for synthesis time.
+
+Usage:
+    python -m benchmarks.bench_melotts_client [--requests 200] [--sentences 6] [--delay 0.02] [--port 5197]
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+import requests
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+from voice_assistant import local_tts_generation
+from voice_assistant.config import Config
+
+CLIP = bytes(8820)  # 0.1 s of 16-bit mono at 44.1 kHz
+DELAY = 0.0
+
+app = FastAPI()
+
+
+@app.post("/generate-audio/")
+async def generate_audio():
+    if DELAY:
+        await asyncio.sleep(DELAY)
+    return Response(CLIP, media_type="audio/L16", headers={"X-Sample-Rate": "44100", "X-Channels": "1"})
+
+
+def start_server(port):
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def bare_post(text):
+    # What generate_audio_file_melotts did before: a new connection per call.
+    response = requests.post(local_tts_generation._melotts_url(), json={"text": text, "format": "pcm"}, stream=True)
+    response.raise_for_status()
+    return b"".join(response.iter_content(chunk_size=4096))
+
+
+def pooled_post(text):
+    _, chunks = local_tts_generation.stream_audio_melotts(text)
+    return b"".join(chunks)
+
+
+def per_request_ms(fn, count):
+    fn("warm up")
+    start = time.perf_counter()
+    for i in range(count):
+        fn(f"Sentence number {i}.")
+    return (time.perf_counter() - start) / count * 1000
+
+
+async def fetch_concurrent(sentences):
+    async for _ in local_tts_generation.synthesize_sentences_melotts_async(sentences):
+        pass
+
+
+def reply_ms(sentences, rounds, concurrent):
+    start = time.perf_counter()
+    if concurrent:
+        async def run():
+            for _ in range(rounds):
+                await fetch_concurrent(sentences)
+        asyncio.run(run())
+    else:
+        for _ in range(rounds):
+            for sentence in sentences:
+                bare_post(sentence)
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--sentences", type=int, default=6, help="sentences per reply")
+    parser.add_argument("--delay", type=float, default=0.02, help="stub synthesis seconds per sentence")
+    parser.add_argument("--port", type=int, default=5197)
+    args = parser.parse_args()
+
+    Config.TTS_HOST_LOCAL = "127.0.0.1"
+    Config.TTS_PORT_LOCAL = args.port
+    start_server(args.port)
+
+    print(f"bare requests.post   {per_request_ms(bare_post, args.requests):6.2f} ms/request")
+    print(f"pooled session       {per_request_ms(pooled_post, args.requests):6.2f} ms/request")
+
+    global DELAY
+    DELAY = args.delay
+    sentences = [f"This is sentence {i} of the reply." for i in range(args.sentences)]
+    rounds = max(1, args.requests // args.sentences)
+    print(f"{args.sentences}-sentence reply, sequential bare posts  {reply_ms(sentences, rounds, False):6.2f} ms")
+    print(f"{args.sentences}-sentence reply, concurrent async       {reply_ms(sentences, rounds, True):6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_melotts_cold_start.py
+
+"""
+Measure MeloTTS server cold start: time to ready and latency of the first requests.
+
+The server is started from scratch for each mode, with and without the
+startup warmup. The script reports when /health first answers, when /ready
+turns 200, the time from process start to the first audio byte, and the
+time to first byte of the first and second requests. Without the warmup the
+first request pays the one-off inference costs itself.
+
+Usage:
+    python -m benchmarks.bench_melotts_cold_start [--port 5198] [--runs 3]
+"""
+
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+TEXT = "What is on my calendar for tomorrow morning?"
+
+
+def poll(url, status=200, timeout=300):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == status:
+                return time.perf_counter()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"{url} did not answer {status}")
+
+
+def first_byte(url):
+    start = time.perf_counter()
+    with httpx.stream("POST", url, json={"text": TEXT, "format": "pcm"}, timeout=300) as response:
+        response.raise_for_status()
+        for _ in response.iter_bytes():
+            return start, time.perf_counter()
+
+
+def cold_start(port, warmup):
+    command = [sys.executable, "-m", "voice_assistant.local_tts_api", "--port", str(port)]
+    if not warmup:
+        command.append("--no-warmup")
+    url = f"http://localhost:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        health = poll(f"{url}/health")
+        ready = poll(f"{url}/ready")
+        sent, first = first_byte(f"{url}/generate-audio/")
+        sent2, second = first_byte(f"{url}/generate-audio/")
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+    return {
+        "health": health - start,
+        "ready": ready - start,
+        "first audio": first - start,
+        "1st request": first - sent,
+        "2nd request": second - sent2,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=5198)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    for warmup in (False, True):
+        runs = [cold_start(args.port, warmup) for _ in range(args.runs)]
+        label = "with warmup   " if warmup else "without warmup"
+        print(label + "  " + "  ".join(f"{key} {statistics.median(r[key] for r in runs):6.3f}s" for key in runs[0]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_melotts_server.py
+
+"""
+Load a running MeloTTS server with N concurrent clients and report throughput.
+
+Start the server first (python -m voice_assistant.local_tts_api), then run
+this against it. Each client posts short sentences back to back and reads
+the whole response; 429 answers are counted and retried after the
+Retry-After delay. The server's /metrics are printed at the end so batch
+sizes can be compared across --clients settings.
+
+Usage:
+    python -m benchmarks.bench_melotts_server [--url http://localhost:5150] [--clients 1 4 16] [--requests 8]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+SENTENCES = [
+    "Good morning.",
+    "You have three meetings today.",
+    "The first one starts at nine.",
+    "It will rain this evening.",
+    "Don't forget your umbrella.",
+    "Your dentist appointment is at two.",
+    "I added that to your task list.",
+    "Anything else I can help with?",
+]
+
+
+async def client(http, url, count, latencies, counts):
+    for i in range(count):
+        payload = {"text": SENTENCES[i % len(SENTENCES)], "format": "pcm"}
+        start = time.perf_counter()
+        while True:
+            response = await http.post(url, json=payload)
+            if response.status_code != 429:
+                break
+            counts["rejected"] += 1
+            await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        counts["bytes"] += len(response.content)
+
+
+async def run(base_url, clients, count):
+    latencies = []
+    counts = {"rejected": 0, "bytes": 0}
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(timeout=300, limits=limits) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(http, f"{base_url}/generate-audio/", count, latencies, counts) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        metrics = (await http.get(f"{base_url}/metrics")).json()
+
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"{clients:>3} clients  {len(latencies) / elapsed:6.2f} req/s  "
+          f"p50 {statistics.median(latencies):6.2f}s  p95 {p95:6.2f}s  "
+          f"429s {counts['rejected']:<4}  audio {counts['bytes'] / 1e6:.1f} MB")
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:5150")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=8, help="requests per client")
+    args = parser.parse_args()
+
+    metrics = None
+    for clients in args.clients:
+        metrics = asyncio.run(run(args.url.rstrip("/"), clients, args.requests))
+    print(f"server metrics: {metrics}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_melotts_workers.py
+
+"""
+Compare MeloTTS server throughput and memory across worker counts.
+
+For each --workers value the server is started on a spare port, loaded with
+the same concurrent clients as bench_melotts_server, and its process tree is
+measured. RSS counts shared model pages once per process; PSS splits them
+between the processes sharing them, so the PSS total is what the workers
+actually cost. Memory figures need Linux (/proc).
+
+Usage:
+    python -m benchmarks.bench_melotts_workers [--workers 1 2 4] [--clients 16] [--requests 8]
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.bench_melotts_server import run
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def process_tree(pid):
+    pids = [pid]
+    for child in open(f"/proc/{pid}/task/{pid}/children").read().split():
+        pids.extend(process_tree(int(child)))
+    return pids
+
+
+def memory_mb(pid):
+    """Total RSS and PSS of a process and its children, in MB."""
+    rss = pss = 0
+    for p in process_tree(pid):
+        for line in open(f"/proc/{p}/smaps_rollup"):
+            if line.startswith("Rss:"):
+                rss += int(line.split()[1])
+            elif line.startswith("Pss:"):
+                pss += int(line.split()[1])
+    return rss / 1024, pss / 1024
+
+
+def wait_ready(url, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{url}/ready", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"server at {url} did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, help="torch threads per worker (default: cores / workers)")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=8, help="requests per client")
+    parser.add_argument("--port", type=int, default=5199)
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        command = [sys.executable, "-m", "voice_assistant.local_tts_api", "--workers", str(workers), "--port", str(args.port)]
+        if args.threads:
+            command += ["--threads", str(args.threads)]
+        server = subprocess.Popen(command, cwd=ROOT,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        url = f"http://localhost:{args.port}"
+        try:
+            wait_ready(url)
+            print(f"--- {workers} worker(s)")
+            asyncio.run(run(url, args.clients, args.requests))
+            rss, pss = memory_mb(server.pid)
+            print(f"    memory  RSS {rss:7.1f} MB  PSS {pss:7.1f} MB")
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
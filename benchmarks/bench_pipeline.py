@@ -0,0 +1,148 @@
+# benchmarks/bench_pipeline.py
+
+"""
+End-to-end turn latency of the real pipeline against local fake providers.
+
+Each recording in voice_samples/ is pushed through transcribe_audio,
+generate_response and the TTS path selected by --mode, with every provider
+served by benchmarks/fake_providers.py. Recording from the microphone and
+playback are left out: they take as long as the user speaks and the audio
+lasts, whatever the code does. Reported per configuration, as medians:
+
+    transcript    time until the transcript is back
+    first token   time until the LLM's first token (end of the reply if the backend doesn't stream)
+    first audio   time until the first audio is ready to play
+    total         time until all of the reply's audio is available
+
+--save writes the medians as a baseline; --baseline compares against one
+and exits with status 1 if any figure got slower than --tolerance allows.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--tts openai cartesia] [--mode file stream sentences]
+        [--runs 3] [--save benchmarks/baselines/pipeline.json] [--baseline benchmarks/baselines/pipeline.json]
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks import fake_providers
+from voice_assistant import voice_cache
+from voice_assistant.api_key_manager import get_transcription_api_key, get_response_api_key, get_tts_api_key
+from voice_assistant.config import Config
+from voice_assistant.metrics import metrics
+from voice_assistant.response_generation import generate_response
+from voice_assistant.sentence_tts import synthesize_sentences
+from voice_assistant.text_to_speech import text_to_speech, text_to_speech_stream
+from voice_assistant.transcription import transcribe_audio
+
+SAMPLES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "voice_samples", "*")))
+FIELDS = ("transcript", "first token", "first audio", "total")
+SYSTEM = {"role": "system", "content": "You are spark, a helpful voice assistant."}
+
+
+def run_turn(sample, mode, directory):
+    metrics.reset()
+    start = time.perf_counter()
+    user_input = transcribe_audio(Config.TRANSCRIPTION_MODEL, get_transcription_api_key(), sample)
+    transcript = time.perf_counter() - start
+
+    response = generate_response(Config.RESPONSE_MODEL, get_response_api_key(),
+                                 [SYSTEM, {"role": "user", "content": user_input}])
+    replied = time.perf_counter() - start
+    first_token = metrics.snapshot().get("llm_first_token")
+    first_token = transcript + first_token[0]["max"] if first_token else replied
+
+    tts_api_key = get_tts_api_key()
+    first_audio = None
+    if mode == "file":
+        text_to_speech(Config.TTS_MODEL, tts_api_key, response, os.path.join(directory, "reply.audio"))
+        first_audio = time.perf_counter() - start
+    elif mode == "stream":
+        _, chunks = text_to_speech_stream(Config.TTS_MODEL, tts_api_key, response)
+        for _ in chunks:
+            if first_audio is None:
+                first_audio = time.perf_counter() - start
+    else:
+        for _ in synthesize_sentences(Config.TTS_MODEL, tts_api_key, response, directory=directory):
+            if first_audio is None:
+                first_audio = time.perf_counter() - start
+    return dict(zip(FIELDS, (transcript, first_token, first_audio, time.perf_counter() - start)))
+
+
+def run_config(stt, llm, tts, mode, runs, directory):
+    Config.TRANSCRIPTION_MODEL, Config.RESPONSE_MODEL, Config.TTS_MODEL = stt, llm, tts
+    turns = [run_turn(sample, mode, directory) for _ in range(runs) for sample in SAMPLES]
+    return {field: statistics.median(turn[field] for turn in turns) for field in FIELDS}
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for label, figures in results.items():
+        if label not in baseline:
+            continue
+        for field in FIELDS:
+            before, after = baseline[label][field], figures[field]
+            # Ignore jitter below 10 ms as well as relative changes within tolerance
+            if after > before * (1 + tolerance) and after - before > 0.01:
+                regressions.append(f"{label} {field}: {before:.3f}s -> {after:.3f}s (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stt", nargs="+", default=["groq"], choices=["openai", "groq", "fastwhisperapi"])
+    parser.add_argument("--llm", nargs="+", default=["groq"], choices=["openai", "groq"])
+    parser.add_argument("--tts", nargs="+", default=["openai", "elevenlabs", "cartesia", "melotts"])
+    parser.add_argument("--mode", nargs="+", default=["file", "stream", "sentences"], choices=["file", "stream", "sentences"])
+    parser.add_argument("--runs", type=int, default=1, help="passes over the voice samples per configuration")
+    parser.add_argument("--port", type=int, default=5196)
+    parser.add_argument("--save", help="write the results as a baseline JSON file")
+    parser.add_argument("--baseline", help="compare against a baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before flagging, as a fraction")
+    args = parser.parse_args()
+
+    server = fake_providers.start(args.port)
+    fake_providers.configure(args.port)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        # Keep fake voice lookups out of the real voice catalog
+        voice_cache.voice_catalog = voice_cache.VoiceCatalog(os.path.join(directory, "voices.json"), Config.VOICE_CACHE_TTL)
+        print(f"{'configuration':<36}" + "".join(f"{field:>13}" for field in FIELDS))
+        for stt in args.stt:
+            for llm in args.llm:
+                for tts in args.tts:
+                    for mode in args.mode:
+                        label = f"{stt}/{llm}/{tts}/{mode}"
+                        figures = run_config(stt, llm, tts, mode, args.runs, directory)
+                        results[label] = figures
+                        print(f"{label:<36}" + "".join(f"{figures[field]:>12.3f}s" for field in FIELDS))
+    server.should_exit = True
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump({"profile": fake_providers.PROFILE, "results": results}, f, indent=2)
+        print(f"baseline saved to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("profile") != fake_providers.PROFILE:
+            print("warning: the baseline was recorded with a different fake provider profile")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print("regressions:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"no regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_sentence_tts.py
+
+"""
+Benchmark sentence-parallel TTS against whole-text synthesis with a fake provider.
+
+The fake provider sleeps for a fixed request latency plus a per-character
+synthesis time, and "playback" sleeps for the spoken duration of the text,
+so the numbers reflect scheduling only and need no API keys or audio device.
+
+Usage:
+    python -m benchmarks.bench_sentence_tts [--latency 0.3] [--per-char 0.004] [--concurrency 4]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from voice_assistant.sentence_tts import split_sentences, synthesize_sentences
+
+RESPONSE = (
+    "Good morning! Here's what your day looks like. "
+    "At nine you have the team meeting in Conference Room A, which usually runs about an hour. "
+    "After that your afternoon is open until the dentist appointment at two at 123 Health St. "
+    "The forecast says rain in the evening with an eighty percent chance of precipitation, "
+    "so you may want to bring an umbrella to dinner with your friends at the Italian restaurant. "
+    "You also have two high-priority tasks due today: finishing the project proposal and preparing the presentation slides. "
+    "Would you like me to add a reminder for either of them?"
+)
+
+SPEAKING_RATE = 15.0  # characters per second of speech
+
+
+class FakeProvider:
+    def __init__(self, latency, per_char):
+        self.latency = latency
+        self.per_char = per_char
+        self.last_done = 0.0
+
+    def __call__(self, model, api_key, text, output_file_path, local_model_path=None):
+        time.sleep(self.latency + self.per_char * len(text))
+        self.last_done = time.perf_counter()
+        with open(output_file_path, "w") as f:
+            f.write(text)
+        return output_file_path
+
+
+def fake_play(path):
+    with open(path) as f:
+        time.sleep(len(f.read()) / SPEAKING_RATE)
+
+
+def run_whole(provider, directory):
+    start = time.perf_counter()
+    path = provider("fake", None, RESPONSE, os.path.join(directory, "whole.wav"))
+    first_audio = time.perf_counter() - start
+    fake_play(path)
+    return first_audio, provider.last_done - start, time.perf_counter() - start
+
+
+def run_sentences(provider, concurrency):
+    start = time.perf_counter()
+    first_audio = None
+    for path in synthesize_sentences("fake", None, RESPONSE, synthesize=provider, concurrency=concurrency):
+        if first_audio is None:
+            first_audio = time.perf_counter() - start
+        fake_play(path)
+    return first_audio, provider.last_done - start, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3, help="fixed seconds per request")
+    parser.add_argument("--per-char", type=float, default=0.004, help="synthesis seconds per character")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--speed", type=float, default=4.0, help="run playback this many times faster than real time")
+    args = parser.parse_args()
+
+    global SPEAKING_RATE
+    SPEAKING_RATE *= args.speed
+
+    provider = FakeProvider(args.latency, args.per_char)
+    print(f"{len(RESPONSE)} characters, {len(split_sentences(RESPONSE))} sentences")
+    with tempfile.TemporaryDirectory() as directory:
+        first, synthesized, total = run_whole(provider, directory)
+        print(f"whole text        first audio {first:.2f}s  synthesized {synthesized:.2f}s  played {total:.2f}s")
+    for concurrency in sorted({1, args.concurrency}):
+        first, synthesized, total = run_sentences(provider, concurrency)
+        print(f"sentences (x{concurrency:<2})   first audio {first:.2f}s  synthesized {synthesized:.2f}s  played {total:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
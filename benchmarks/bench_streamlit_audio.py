@@ -0,0 +1,143 @@
+# benchmarks/bench_streamlit_audio.py
+
+"""
+Payload size and time to first sound of the Streamlit reply audio, inline base64 against the media endpoint.
+
+The reply audio for each TTS provider is synthesized against the fake
+providers, then delivered to a local HTTP client in the two ways the app has
+used, over a link paced to --bandwidth-mbps with --rtt-ms of latency:
+
+    inline   the old autoplay_audio: the file base64-encoded into an <audio>
+             tag sent with the page. Nothing plays until all of it has arrived.
+    media    st.audio: Streamlit's media file manager serves the raw bytes,
+             and the browser fetches them with a range request. Playback can
+             start once --prebuffer-ms of audio has arrived.
+
+The client reads the same bytes a browser would need before it can start
+playing. Decoding and the audio device are left out, which favors neither
+side.
+
+Usage:
+    python -m benchmarks.bench_streamlit_audio [--tts openai cartesia melotts] [--bandwidth-mbps 10] [--rtt-ms 40]
+"""
+
+import argparse
+import base64
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from benchmarks import fake_providers
+from voice_assistant import voice_cache
+from voice_assistant.config import Config
+from voice_assistant.settings import Settings
+from voice_assistant.text_to_speech import text_to_speech
+from voice_assistant.utils import audio_mime_type
+
+CHUNK = 16 * 1024
+
+
+def inline_html(data, mime_type="audio/mp3"):
+    """The markup the old autoplay_audio sent, byte for byte."""
+    b64 = base64.b64encode(data).decode()
+    return f"""
+            <audio autoplay>
+            <source src="data:{mime_type};base64,{b64}" type="{mime_type}">
+            </audio>
+            """.encode()
+
+
+class PacedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    payloads = {}
+    bandwidth = 10 * 1_000_000 / 8  # bytes per second
+    rtt = 0.04
+
+    def do_GET(self):
+        data = self.payloads.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        start, end = 0, len(data) - 1
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        time.sleep(self.rtt)
+        if match:
+            start = int(match.group(1))
+            end = min(end, int(match.group(2))) if match.group(2) else end
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        try:
+            for offset in range(start, end + 1, CHUNK):
+                piece = data[offset:min(offset + CHUNK, end + 1)]
+                time.sleep(len(piece) / self.bandwidth)
+                self.wfile.write(piece)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client stopped reading, as a browser does once it can play
+
+    def log_message(self, format, *args):
+        pass
+
+
+def time_to_bytes(url, needed, headers=None):
+    """Seconds from the request until `needed` bytes of the body have arrived."""
+    start = time.perf_counter()
+    received = 0
+    with httpx.stream("GET", url, headers=headers or {}) as response:
+        for piece in response.iter_bytes():
+            received += len(piece)
+            if received >= needed:
+                break
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tts", nargs="+", default=["openai", "elevenlabs", "cartesia", "melotts"])
+    parser.add_argument("--bandwidth-mbps", type=float, default=10)
+    parser.add_argument("--rtt-ms", type=float, default=40)
+    parser.add_argument("--prebuffer-ms", type=int, default=500, help="audio a browser buffers before it starts playing")
+    parser.add_argument("--port", type=int, default=5197)
+    args = parser.parse_args()
+
+    fake_providers.start(args.port)
+    fake_providers.configure(args.port)
+    PacedHandler.bandwidth = args.bandwidth_mbps * 1_000_000 / 8
+    PacedHandler.rtt = args.rtt_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PacedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"{'provider':<11} {'type':<10} {'audio':>6} {'inline':>9} {'media':>9} "
+          f"{'1st sound inline':>17} {'1st sound media':>16}")
+    with tempfile.TemporaryDirectory() as directory:
+        voice_cache.voice_catalog = voice_cache.VoiceCatalog(os.path.join(directory, "voices.json"), Config.VOICE_CACHE_TTL)
+        for tts in args.tts:
+            path = os.path.join(directory, f"{tts}.audio")
+            text_to_speech(tts, "fake-key", fake_providers.RESPONSE, path,
+                           settings=Settings.from_config().replace(tts_model=tts))
+            with open(path, "rb") as f:
+                data = f.read()
+            seconds = len(fake_providers.RESPONSE) / fake_providers.SPEAKING_RATE
+            mime_type = audio_mime_type(path)
+            PacedHandler.payloads = {"/inline": inline_html(data), "/media": data}
+
+            inline = time_to_bytes(f"{base}/inline", len(PacedHandler.payloads["/inline"]))
+            prebuffer = min(len(data), int(len(data) / seconds * args.prebuffer_ms / 1000))
+            media = time_to_bytes(f"{base}/media", prebuffer, headers={"Range": "bytes=0-"})
+            print(f"{tts:<11} {mime_type:<10} {seconds:>5.1f}s {len(PacedHandler.payloads['/inline']) / 1024:>7.0f}KB "
+                  f"{len(data) / 1024:>7.0f}KB {inline * 1000:>15.0f}ms {media * 1000:>14.0f}ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_streamlit_rerun.py
+
+"""
+Rerun time of the Streamlit app against conversation length.
+
+The app is run headless with Streamlit's AppTest, with the chat log
+pre-filled to each length. What is timed is one full script rerun, as
+triggered by a click or chat input. That covers running app.py and
+building every element it sends to the browser, but not the browser's
+rendering. Each length is timed with the paginated chat log
+(Config.APP_CHAT_PAGE_SIZE) and with every message drawn (page size None),
+the way the app rendered it before.
+
+Usage:
+    python -m benchmarks.bench_streamlit_rerun [--messages 10 100 1000] [--runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from voice_assistant.config import Config
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app.py")
+MESSAGE = ("Tomorrow you have the project presentation at ten in the main office, "
+           "and after lunch there's a gym session at three at the fitness center.")
+
+
+def time_reruns(count, runs):
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state["messages"] = [
+        {"role": "user" if i % 2 else "assistant", "content": f"{i}. {MESSAGE}"} for i in range(count)
+    ]
+    at.run()  # first run initializes the session and imports
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), len(at.get("chat_message"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # The metrics server and TTS pre-warm would only add noise
+    Config.METRICS_PORT = None
+    Config.TTS_CACHE_ENABLED = False
+
+    page_size = Config.APP_CHAT_PAGE_SIZE
+    print(f"{'messages':>8} {'paginated':>10} {'drawn':>6} {'all drawn':>10} {'drawn':>6}")
+    for count in args.messages:
+        Config.APP_CHAT_PAGE_SIZE = page_size
+        paginated, drawn = time_reruns(count, args.runs)
+        Config.APP_CHAT_PAGE_SIZE = None
+        everything, drawn_all = time_reruns(count, args.runs)
+        print(f"{count:>8} {paginated * 1000:>8.0f}ms {drawn:>6} {everything * 1000:>8.0f}ms {drawn_all:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_tts_streaming.py
+
+"""
+Compare time-to-first-audio of the file-based TTS path against streaming playback.
+
+The file path can only start playing once text_to_speech() has written the
+whole file; the streaming path can start once the first decoded PCM covering
+the playback prebuffer is available. Neither side opens the audio device, so
+this runs headless against the real provider configured in Config.
+
+Usage:
+    python -m benchmarks.bench_tts_streaming [--model elevenlabs] [--runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from voice_assistant.audio import pcm_stream
+from voice_assistant.api_key_manager import get_tts_api_key
+from voice_assistant.config import Config
+from voice_assistant.text_to_speech import text_to_speech, text_to_speech_stream
+
+TEXT = ("Sure! Tomorrow you have a team meeting at nine in conference room A, "
+        "and a dentist appointment at two. It looks like it will rain in the evening, "
+        "so you may want to take an umbrella to dinner with your friends.")
+
+
+def time_file_path(model, api_key, text):
+    fd, path = tempfile.mkstemp(suffix=".mp3")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        text_to_speech(model, api_key, text, path)
+        return time.perf_counter() - start
+    finally:
+        os.remove(path)
+
+
+def time_streaming(model, api_key, text, prebuffer_ms):
+    start = time.perf_counter()
+    audio_format, chunks = text_to_speech_stream(model, api_key, text)
+    needed = int(audio_format["sample_rate"] * prebuffer_ms / 1000) * 2 * audio_format["channels"]
+    buffered = 0
+    first_audio = None
+    for data in pcm_stream(chunks, **audio_format):
+        buffered += len(data)
+        if first_audio is None and buffered >= needed:
+            first_audio = time.perf_counter() - start
+    # If the whole utterance is shorter than the prebuffer, playback starts at end of stream.
+    return first_audio if first_audio is not None else time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=Config.TTS_MODEL)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--prebuffer-ms", type=int, default=Config.PLAYBACK_PREBUFFER_MS)
+    args = parser.parse_args()
+
+    Config.TTS_MODEL = args.model
+    api_key = get_tts_api_key()
+
+    file_times = [time_file_path(args.model, api_key, TEXT) for _ in range(args.runs)]
+    stream_times = [time_streaming(args.model, api_key, TEXT, args.prebuffer_ms) for _ in range(args.runs)]
+
+    print(f"{args.model}: time to first audio over {args.runs} runs")
+    print(f"  file path  median {statistics.median(file_times):.3f}s  min {min(file_times):.3f}s")
+    print(f"  streaming  median {statistics.median(stream_times):.3f}s  min {min(stream_times):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
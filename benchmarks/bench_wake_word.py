@@ -0,0 +1,95 @@
+# benchmarks/bench_wake_word.py
+
+"""
+False accepts, false rejects and CPU cost of the wake word detector on recorded audio.
+
+Point it at three directories of 16-bit WAV files (other rates are
+resampled):
+
+    --templates   a few recordings of just the wake word, as used by the app
+    --positives   test clips that each contain the wake word once
+    --negatives   clips without it: conversation, TV, room noise. The longer
+                  the better; false accepts are reported per hour.
+
+Use different recordings (and ideally speakers) for templates and
+positives. Each clip is fed to the detector in 20 ms frames, as the
+microphone would deliver it. A positive is rejected if the detector never
+fires on it. Every detection in a negative clip is a false accept. CPU is
+the process time spent in the detector per second of audio, as a share of
+one core. The last column is how many STT requests the 5-second
+record-and-transcribe loop would send for the same audio, against one per
+detection.
+
+Usage:
+    python -m benchmarks.bench_wake_word --templates wake_word --positives clips/yes --negatives clips/no [--thresholds 0.2 0.25 0.3]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from voice_assistant.config import Config
+from voice_assistant.pcm import read_wav_int16
+from voice_assistant.wake_word import TemplateWakeWord
+
+
+def load(directory, sample_rate):
+    paths = sorted(glob.glob(os.path.join(directory, "*.wav")))
+    if not paths:
+        raise SystemExit(f"No WAV files in {directory}")
+    return [read_wav_int16(path, sample_rate)[0] for path in paths]
+
+
+def detections(detector, samples, frame):
+    """Feed one clip in frames, returning the number of detections and the CPU seconds spent."""
+    detector.reset()
+    count = 0
+    start = time.process_time()
+    for offset in range(0, len(samples), frame):
+        count += detector.process(samples[offset:offset + frame].tobytes())
+    return count, time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--templates", default=Config.WAKE_WORD_TEMPLATES)
+    parser.add_argument("--positives", required=True)
+    parser.add_argument("--negatives", required=True)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[Config.WAKE_WORD_THRESHOLD])
+    parser.add_argument("--sample-rate", type=int, default=Config.WAKE_WORD_SAMPLE_RATE)
+    args = parser.parse_args()
+
+    templates = sorted(glob.glob(os.path.join(args.templates, "*.wav")))
+    positives = load(args.positives, args.sample_rate)
+    negatives = load(args.negatives, args.sample_rate)
+    frame = args.sample_rate // 50
+    positive_seconds = sum(len(s) for s in positives) / args.sample_rate
+    negative_seconds = sum(len(s) for s in negatives) / args.sample_rate
+    print(f"{len(templates)} templates, {len(positives)} positive clips ({positive_seconds:.0f}s), "
+          f"{len(negatives)} negative clips ({negative_seconds / 60:.1f} min)")
+
+    print(f"{'threshold':>9} {'false reject':>13} {'false accept/h':>15} {'CPU':>6} {'STT requests':>17}")
+    for threshold in args.thresholds:
+        detector = TemplateWakeWord(templates, threshold, args.sample_rate)
+        cpu = 0.0
+        rejected = 0
+        fired = 0
+        for samples in positives:
+            count, seconds = detections(detector, samples, frame)
+            rejected += count == 0
+            fired += count
+            cpu += seconds
+        false_accepts = 0
+        for samples in negatives:
+            count, seconds = detections(detector, samples, frame)
+            false_accepts += count
+            cpu += seconds
+        audio_seconds = positive_seconds + negative_seconds
+        loop_requests = int(audio_seconds // 5)
+        print(f"{threshold:>9.2f} {rejected / len(positives):>12.1%} {false_accepts / (negative_seconds / 3600):>15.1f} "
+              f"{cpu / audio_seconds:>6.1%} {fired + false_accepts:>7} vs {loop_requests:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# benchmarks/fake_providers.py
+
+"""
+Local stand-ins for the speech and LLM APIs the assistant talks to.
+
+One FastAPI app answers the endpoints the real SDKs call for OpenAI, Groq,
+ElevenLabs, Cartesia, FastWhisperAPI and the MeloTTS server, each under its
+own path prefix. Responses are canned, but their timing follows PROFILE:
+fixed latencies, LLM tokens at a given rate, and TTS audio produced at a
+multiple of real time in fixed-size chunks. That makes the real pipeline
+code measurable without network, keys or GPUs.
+
+Usage from a benchmark:
+    server = start(port)          # background thread
+    configure(port)               # point Config and the SDK clients at it
+
+or as its own process, so its CPU time is not charged to the client:
+    python -m benchmarks.fake_providers --port 5196
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from voice_assistant import clients, transcription
+from voice_assistant.config import Config
+
+TRANSCRIPT = "What's on my calendar for tomorrow?"
+RESPONSE = (
+    "Tomorrow you have the project presentation at ten in the main office. "
+    "After lunch there's a gym session at three at the fitness center. "
+    "You also have two high-priority tasks due, so you may want to block some time in the morning. "
+    "Would you like me to set a reminder?"
+)
+SPEAKING_RATE = 15.0  # characters of text per second of speech
+
+# Timing of every fake endpoint, in seconds unless noted. Benchmarks change
+# these in place to model faster or slower providers.
+PROFILE = {
+    "stt_latency": 0.25,          # request to transcript
+    "llm_first_token": 0.20,      # request to first streamed token
+    "llm_tokens_per_second": 150,
+    "tts_first_byte": 0.15,       # request to first audio chunk
+    "tts_speed": 4.0,             # audio produced this many times faster than real time
+    "chunk_bytes": 4096,
+}
+
+# Bytes per second of audio for each provider's output format
+BYTE_RATES = {
+    "openai_mp3": 16000,
+    "openai_pcm": 24000 * 2,
+    "elevenlabs": 16000,
+    "cartesia_f32": 22050 * 4,
+    "cartesia_s16": 22050 * 2,
+    "melotts": Config.MELOTTS_SAMPLE_RATE * 2,
+}
+
+app = FastAPI()
+
+
+async def _audio(text, byte_rate):
+    await asyncio.sleep(PROFILE["tts_first_byte"])
+    total = int(len(text) / SPEAKING_RATE * byte_rate)
+    chunk = PROFILE["chunk_bytes"]
+    # Pace chunks so the stream runs tts_speed times faster than playback
+    delay = chunk / byte_rate / PROFILE["tts_speed"]
+    sent = 0
+    while sent < total:
+        size = min(chunk, total - sent)
+        yield bytes(size)
+        sent += size
+        if sent < total:
+            await asyncio.sleep(delay)
+
+
+async def _transcription():
+    await asyncio.sleep(PROFILE["stt_latency"])
+    return JSONResponse({"text": TRANSCRIPT})
+
+
+async def _chat(request: Request):
+    body = await request.json()
+    words = RESPONSE.split(" ")
+
+    def chunk(content, finish_reason=None):
+        return "data: " + json.dumps({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "delta": {"role": "assistant", "content": content}, "finish_reason": finish_reason}],
+        }) + "\n\n"
+
+    if not body.get("stream"):
+        await asyncio.sleep(PROFILE["llm_first_token"] + len(words) / PROFILE["llm_tokens_per_second"])
+        return JSONResponse({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": RESPONSE}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)},
+        })
+
+    async def events():
+        await asyncio.sleep(PROFILE["llm_first_token"])
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(1 / PROFILE["llm_tokens_per_second"])
+            yield chunk(word if i == 0 else " " + word)
+        yield chunk("", "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+# OpenAI and Groq (the Groq SDK adds /openai/v1 to its base URL)
+for prefix in ("/openai/v1", "/groq/openai/v1"):
+    app.post(f"{prefix}/audio/transcriptions")(_transcription)
+    app.post(f"{prefix}/chat/completions")(_chat)
+
+
+@app.post("/openai/v1/audio/speech")
+async def openai_speech(request: Request):
+    body = await request.json()
+    rate = BYTE_RATES["openai_pcm"] if body.get("response_format") == "pcm" else BYTE_RATES["openai_mp3"]
+    return StreamingResponse(_audio(body["input"], rate), media_type="application/octet-stream")
+
+
+@app.get("/elevenlabs/v1/voices")
+async def elevenlabs_voices():
+    return {"voices": [{"voice_id": "fake-voice", "name": Config.ELEVENLABS_VOICE}]}
+
+
+@app.post("/elevenlabs/v1/text-to-speech/{voice_id}")
+@app.post("/elevenlabs/v1/text-to-speech/{voice_id}/stream")
+async def elevenlabs_speech(voice_id: str, request: Request):
+    body = await request.json()
+    return StreamingResponse(_audio(body["text"], BYTE_RATES["elevenlabs"]), media_type="audio/mpeg")
+
+
+@app.get("/cartesia/voices/{voice_id}")
+async def cartesia_voice(voice_id: str):
+    return {
+        "id": voice_id, "is_owner": False, "name": "Fake", "description": "",
+        "created_at": "2025-01-01T00:00:00Z", "language": "en", "embedding": [0.0] * 192,
+    }
+
+
+@app.post("/cartesia/tts/bytes")
+async def cartesia_speech(request: Request):
+    body = await request.json()
+    float32 = body["output_format"].get("encoding") == "pcm_f32le"
+    rate = BYTE_RATES["cartesia_f32" if float32 else "cartesia_s16"]
+    return StreamingResponse(_audio(body["transcript"], rate), media_type="application/octet-stream")
+
+
+@app.get("/fastwhisperapi/info")
+async def fastwhisperapi_info():
+    return {"status": "ok"}
+
+
+@app.post("/fastwhisperapi/v1/transcriptions")
+async def fastwhisperapi_transcription():
+    return await _transcription()
+
+
+@app.post("/melotts/generate-audio/")
+async def melotts_speech(request: Request):
+    body = await request.json()
+    headers = {"X-Sample-Rate": str(Config.MELOTTS_SAMPLE_RATE), "X-Channels": "1"}
+    return StreamingResponse(_audio(body["text"], BYTE_RATES["melotts"]), media_type="audio/L16", headers=headers)
+
+
+def start(port, host="127.0.0.1"):
+    """
+    Run the fake providers in a background thread.
+
+    Args:
+    port (int): The port to listen on.
+    host (str): The interface to bind.
+
+    Returns:
+    uvicorn.Server: The running server; set `should_exit` to stop it.
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def configure(port, host="127.0.0.1"):
+    """
+    Point every provider at the fake server and turn off caches that would hide its latency.
+
+    Args:
+    port (int): The fake server's port.
+    host (str): The fake server's host.
+    """
+    base = f"http://{host}:{port}"
+    Config.OPENAI_BASE_URL = f"{base}/openai/v1"
+    Config.GROQ_BASE_URL = f"{base}/groq"
+    Config.ELEVENLABS_BASE_URL = f"{base}/elevenlabs"
+    Config.CARTESIA_BASE_URL = f"{base}/cartesia"
+    Config.FASTWHISPERAPI_URL = f"{base}/fastwhisperapi"
+    Config.MELOTTS_URL = f"{base}/melotts/generate-audio/"
+    for name in ("OPENAI_API_KEY", "GROQ_API_KEY", "ELEVENLABS_API_KEY", "CARTESIA_API_KEY"):
+        setattr(Config, name, "fake-key")
+    Config.TTS_CACHE_ENABLED = False
+    transcription.checked_fastwhisperapi = False
+    clients.clear_clients()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the fake providers in the foreground")
+    parser.add_argument("--port", type=int, default=5196)
+    parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="error")
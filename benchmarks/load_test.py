@@ -0,0 +1,215 @@
+# benchmarks/load_test.py
+
+"""
+Ramp up simulated users against fake providers and find where one process saturates.
+
+Every simulated user runs in its own thread and holds a conversation:
+transcribe a voice sample, generate a reply with its own chat history,
+synthesize it, then "think" for an exponentially distributed pause before
+the next turn. Users get their own working directory, so no two sessions
+share the recording or reply files. The fake providers run in a separate
+process, so the CPU and memory reported are the pipeline's own.
+
+Each stage holds a fixed number of users for --stage-seconds and reports
+throughput, turn latency percentiles, CPU use and RSS. The process is
+considered saturated at the first stage where throughput grows by less than
+half of the added users' share, or p95 latency exceeds --max-slowdown times
+that of the first stage. The capacity figure is the last stage before that.
+
+Usage:
+    python -m benchmarks.load_test [--users 1 2 4 8 16 32] [--stage-seconds 20] [--think 2.0] [--tts openai] [--mode stream]
+"""
+
+import argparse
+import glob
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+from benchmarks import fake_providers
+from voice_assistant import voice_cache
+from voice_assistant.api_key_manager import get_transcription_api_key, get_response_api_key, get_tts_api_key
+from voice_assistant.config import Config
+from voice_assistant.metrics import Histogram
+from voice_assistant.response_generation import generate_response
+from voice_assistant.sentence_tts import synthesize_sentences
+from voice_assistant.text_to_speech import text_to_speech, text_to_speech_stream
+from voice_assistant.transcription import transcribe_audio
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SAMPLES = sorted(glob.glob(os.path.join(ROOT, "voice_samples", "*")))
+SYSTEM = {"role": "system", "content": "You are spark, a helpful voice assistant."}
+HISTORY_TURNS = 6  # user/assistant pairs kept per conversation
+
+
+class Stage:
+    """Counters for one concurrency level, shared by all user threads."""
+
+    def __init__(self):
+        self.turn = Histogram()
+        self.first_audio = Histogram()
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def record(self, turn, first_audio):
+        self.turn.record(turn)
+        self.first_audio.record(first_audio)
+
+    def error(self):
+        with self.lock:
+            self.errors += 1
+
+
+def speak(response, mode, directory):
+    """Synthesize the reply; returns seconds from the call to the first audio."""
+    start = time.perf_counter()
+    tts_api_key = get_tts_api_key()
+    if mode == "file":
+        text_to_speech(Config.TTS_MODEL, tts_api_key, response, os.path.join(directory, "reply.audio"))
+        return time.perf_counter() - start
+    first_audio = None
+    if mode == "stream":
+        _, chunks = text_to_speech_stream(Config.TTS_MODEL, tts_api_key, response)
+    else:
+        chunks = synthesize_sentences(Config.TTS_MODEL, tts_api_key, response, directory=directory)
+    for _ in chunks:
+        if first_audio is None:
+            first_audio = time.perf_counter() - start
+    return first_audio
+
+
+def user(stop, stages, mode, think, seed):
+    rng = random.Random(seed)
+    history = [SYSTEM]
+    with tempfile.TemporaryDirectory(prefix="session-") as directory:
+        # Give the first turns of each user a random offset so they don't arrive in lockstep
+        if stop.wait(rng.uniform(0, think)):
+            return
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                text = transcribe_audio(Config.TRANSCRIPTION_MODEL, get_transcription_api_key(), rng.choice(SAMPLES))
+                history.append({"role": "user", "content": text})
+                response = generate_response(Config.RESPONSE_MODEL, get_response_api_key(), history)
+                history.append({"role": "assistant", "content": response})
+                history[1:] = history[1:][-2 * HISTORY_TURNS:]
+                before_tts = time.perf_counter() - start
+                first_audio = before_tts + speak(response, mode, directory)
+                # Turns count toward the stage they finish in
+                stages[-1].record(time.perf_counter() - start, first_audio)
+            except Exception:
+                stages[-1].error()
+            stop.wait(rng.expovariate(1 / think) if think else 0)
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def wait_for(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise TimeoutError(f"{url} did not come up")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--stage-seconds", type=float, default=20)
+    parser.add_argument("--think", type=float, default=2.0, help="mean think time between turns, in seconds")
+    parser.add_argument("--stt", default="groq")
+    parser.add_argument("--llm", default="groq")
+    parser.add_argument("--tts", default="openai")
+    parser.add_argument("--mode", default="stream", choices=["file", "stream", "sentences"])
+    parser.add_argument("--max-slowdown", type=float, default=1.5, help="p95 growth over the first stage that counts as saturated")
+    parser.add_argument("--port", type=int, default=5195)
+    args = parser.parse_args()
+
+    server = subprocess.Popen([sys.executable, "-m", "benchmarks.fake_providers", "--port", str(args.port)], cwd=ROOT)
+    try:
+        wait_for(f"http://127.0.0.1:{args.port}/fastwhisperapi/info")
+        fake_providers.configure(args.port)
+        Config.TRANSCRIPTION_MODEL, Config.RESPONSE_MODEL, Config.TTS_MODEL = args.stt, args.llm, args.tts
+        with tempfile.TemporaryDirectory() as directory:
+            voice_cache.voice_catalog = voice_cache.VoiceCatalog(os.path.join(directory, "voices.json"), Config.VOICE_CACHE_TTL)
+            run(args)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(args):
+    stop = threading.Event()
+    stages = [Stage()]
+    threads = []
+    baseline_rss = rss_mb()
+    results = []
+    print(f"{'users':>5} {'turns/s':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'1st audio p95':>14} "
+          f"{'errors':>6} {'CPU':>6} {'CPU/turn':>9} {'RSS':>8} {'RSS/user':>9}")
+    try:
+        for users in args.users:
+            stage = Stage()
+            stages.append(stage)
+            while len(threads) < users:
+                thread = threading.Thread(target=user, args=(stop, stages, args.mode, args.think, len(threads)), daemon=True)
+                thread.start()
+                threads.append(thread)
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            time.sleep(args.stage_seconds)
+            cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+            rss = rss_mb()
+
+            turns = stage.turn.count
+            result = {
+                "users": users,
+                "throughput": turns / wall,
+                "p95": stage.turn.quantile(0.95),
+            }
+            results.append(result)
+            print(f"{users:>5} {result['throughput']:>8.2f} {stage.turn.quantile(0.5):>6.2f}s {result['p95']:>6.2f}s "
+                  f"{stage.turn.quantile(0.99):>6.2f}s {stage.first_audio.quantile(0.95):>13.2f}s {stage.errors:>6} "
+                  f"{cpu / wall * 100:>5.0f}% {cpu / turns * 1000 if turns else 0:>7.1f}ms "
+                  f"{rss:>6.0f}MB {(rss - baseline_rss) / users:>7.1f}MB")
+            if saturated(results, args.max_slowdown):
+                break
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=30)
+
+    capacity = results[-2]["users"] if len(results) > 1 and saturated(results, args.max_slowdown) else None
+    if capacity:
+        print(f"saturated at {results[-1]['users']} users; capacity about {capacity} concurrent users per process")
+    else:
+        print(f"not saturated at {results[-1]['users']} users; raise --users to find the limit")
+
+
+def saturated(results, max_slowdown):
+    if len(results) < 2:
+        return False
+    first, previous, current = results[0], results[-2], results[-1]
+    if first["p95"] and current["p95"] > first["p95"] * max_slowdown:
+        return True
+    # With think time, throughput should grow about in proportion to users
+    expected_gain = previous["throughput"] * (current["users"] / previous["users"] - 1)
+    return current["throughput"] - previous["throughput"] < expected_gain / 2
+
+
+if __name__ == "__main__":
+    main()
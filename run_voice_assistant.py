@@ -3,13 +3,17 @@
 import logging
 import time
 from colorama import Fore, init
-from voice_assistant.audio import record_audio, play_audio
+from voice_assistant.audio import record_audio, play_audio, play_audio_stream
 from voice_assistant.transcription import transcribe_audio
 from voice_assistant.response_generation import generate_response
-from voice_assistant.text_to_speech import text_to_speech
+from voice_assistant.text_to_speech import text_to_speech, text_to_speech_stream, prewarm_tts_cache
+from voice_assistant.sentence_tts import speak_sentences
 from voice_assistant.utils import delete_file
 from voice_assistant.config import Config
+from voice_assistant.metrics import metrics, start_metrics_server, dump_metrics
 from voice_assistant.api_key_manager import get_transcription_api_key, get_response_api_key, get_tts_api_key
+from voice_assistant.settings import Settings
+from voice_assistant.resilience import Deadline, StageError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -35,16 +39,47 @@ def main():
             Use the provided functions to retrieve information and assist the user. Always provide thoughtful and detailed responses. Assume today's date is 2025-05-08"""
         }]
 
+    # Pre-synthesize frequently spoken phrases in the background so they play from the TTS cache
+    threading.Thread(target=prewarm_tts_cache, args=(Config.TTS_MODEL, get_tts_api_key()), daemon=True).start()
+
+    # Serve the per-stage latency histograms if a port is configured
+    start_metrics_server()
+    try:
+        if Config.CONTINUOUS_LISTENING:
+            # Imported only when enabled: it and the wake word detector need numpy
+            from voice_assistant.orchestrator import Orchestrator
+            Orchestrator(chat_history, Settings.from_config()).run()
+        else:
+            _run(chat_history)
+    finally:
+        dump_metrics()
+
+
+def _run(chat_history):
+    """Record, transcribe, answer and speak until the user says goodbye."""
+    wake_word = None
+    if Config.WAKE_WORD_ENGINE:
+        from voice_assistant.wake_word import create_wake_word_detector, wait_for_wake_word
+        wake_word = create_wake_word_detector()
     while True:
         try:
+            # Only record (and pay for transcription) once someone talks to the assistant
+            if wake_word is not None:
+                wait_for_wake_word(wake_word)
+
             # Record audio from the microphone and save it as 'test.wav'
-            record_audio(Config.INPUT_AUDIO)
+            with metrics.span("record"):
+                record_audio(Config.INPUT_AUDIO)
+            turn_start = time.perf_counter()
+            # Shared by transcription, response and speech, so slow or failing providers can't stall the turn
+            deadline = Deadline.for_turn()
 
             # Get the API key for transcription
             transcription_api_key = get_transcription_api_key()
             
             # Transcribe the audio file
-            user_input = transcribe_audio(Config.TRANSCRIPTION_MODEL, transcription_api_key, Config.INPUT_AUDIO, Config.LOCAL_MODEL_PATH)
+            user_input = transcribe_audio(Config.TRANSCRIPTION_MODEL, transcription_api_key, Config.INPUT_AUDIO, Config.LOCAL_MODEL_PATH,
+                                          deadline=deadline)
 
             # Check if the transcription is empty and restart the recording if it is. This check will avoid empty requests if vad_filter is used in the fastwhisperapi.
             if not user_input:
@@ -63,11 +98,41 @@ def main():
             response_api_key = get_response_api_key()
 
             # Generate a response
-            response_text = generate_response(Config.RESPONSE_MODEL, response_api_key, chat_history, Config.LOCAL_MODEL_PATH)
+            try:
+                response_text = generate_response(Config.RESPONSE_MODEL, response_api_key, chat_history,
+                                                  Config.LOCAL_MODEL_PATH, deadline=deadline)
+            except StageError as e:
+                # Say so instead of going silent, and drop the unanswered question from the history
+                logging.error(Fore.RED + f"{e}" + Fore.RESET)
+                metrics.observe("turn_failed", time.perf_counter() - turn_start, stage=e.stage)
+                chat_history.pop()
+                response_text = Config.FAILURE_REPLY
+                deadline = Deadline(Config.STAGE_TIMEOUTS["tts"])
+            else:
+                # Append the assistant's response to the chat history
+                chat_history.append({"role": "assistant", "content": response_text})
             logging.info(Fore.CYAN + "Response: " + response_text + Fore.RESET)
 
-            # Append the assistant's response to the chat history
-            chat_history.append({"role": "assistant", "content": response_text})
+            # Get the API key for TTS
+            tts_api_key = get_tts_api_key()
+
+            # Synthesize sentence by sentence and play each as soon as it is ready
+            if Config.TTS_SENTENCE_PARALLEL:
+                first_audio = speak_sentences(Config.TTS_MODEL, tts_api_key, response_text, deadline=deadline)
+                if first_audio is not None:
+                    metrics.observe("playback_first_audio", first_audio, mode="sentences")
+                metrics.observe("turn", time.perf_counter() - turn_start)
+                continue
+
+            # Stream the speech straight to the speaker when enabled
+            if Config.TTS_STREAMING:
+                audio_format, audio_chunks = text_to_speech_stream(Config.TTS_MODEL, tts_api_key, response_text,
+                                                                   deadline=deadline)
+                playback = play_audio_stream(audio_chunks, prebuffer_ms=Config.PLAYBACK_PREBUFFER_MS, **audio_format)
+                if playback["time_to_first_audio"] is not None:
+                    metrics.observe("playback_first_audio", playback["time_to_first_audio"], mode="stream")
+                metrics.observe("turn", time.perf_counter() - turn_start)
+                continue
 
             # Determine the output file format based on the TTS model
             if Config.TTS_MODEL == 'openai' or Config.TTS_MODEL == 'elevenlabs' or Config.TTS_MODEL == 'melotts' or Config.TTS_MODEL == 'cartesia':
@@ -75,28 +140,51 @@ def main():
             else:
                 output_file = 'output.wav'
 
-            # Get the API key for TTS
-            tts_api_key = get_tts_api_key()
-
             # Convert the response text to speech and save it to the appropriate file
-            text_to_speech(Config.TTS_MODEL, tts_api_key, response_text, output_file, Config.LOCAL_MODEL_PATH)
+            text_to_speech(Config.TTS_MODEL, tts_api_key, response_text, output_file, Config.LOCAL_MODEL_PATH,
+                           deadline=deadline)
 
             # Play the generated speech audio
             if Config.TTS_MODEL=="cartesia":
                 pass
             else:
-                play_audio(output_file)
+                with metrics.span("playback"):
+                    play_audio(output_file)
+            metrics.observe("turn", time.perf_counter() - turn_start)
             
             # Clean up audio files
             # delete_file(Config.INPUT_AUDIO)
             # delete_file(output_file)
 
+        except StageError as e:
+            # Every provider of a stage failed or ran out of time; listen again right away
+            logging.error(Fore.RED + f"{e}" + Fore.RESET)
+            metrics.observe("turn_failed", time.perf_counter() - turn_start, stage=e.stage)
+            if e.stage == "tts" and response_text != Config.FAILURE_REPLY:
+                # The reply couldn't be spoken: say so rather than going silent, and
+                # drop the exchange the user never heard from the history
+                del chat_history[-2:]
+                _speak_failure_reply(tts_api_key)
+
         except Exception as e:
+            # Provider failures end up above; this backs off from e.g. a failing microphone
             logging.error(Fore.RED + f"An error occurred: {e}" + Fore.RESET)
             delete_file(Config.INPUT_AUDIO)
             if 'output_file' in locals():
                 delete_file(output_file)
             time.sleep(1)
 
+def _speak_failure_reply(tts_api_key):
+    """Speak Config.FAILURE_REPLY. It is pre-warmed, so it plays from the TTS cache even when the provider is down."""
+    output_file = 'output.mp3' if Config.TTS_MODEL in ('openai', 'elevenlabs', 'melotts', 'cartesia') else 'output.wav'
+    try:
+        text_to_speech(Config.TTS_MODEL, tts_api_key, Config.FAILURE_REPLY, output_file, Config.LOCAL_MODEL_PATH,
+                       deadline=Deadline(Config.STAGE_TIMEOUTS["tts"]))
+    except StageError as e:
+        logging.error(Fore.RED + f"{e}" + Fore.RESET)
+        return
+    with metrics.span("playback"):
+        play_audio(output_file)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,12 +1,10 @@
 import datetime
 import json
-from groq import Groq
 from voice_assistant.config import Config
+from voice_assistant.contact_index import ContactIndex
+from voice_assistant.tool_cache import ToolCache
 
 
-# client = Groq(api_key=userdata.get('GROQ_API_KEY'))
-MODEL = 'llama3-groq-70b-8192-tool-use-preview'
-
 # Expanded dummy data
 calendar_data = [
     {"date": "2025-03-10", "time": "09:00", "event": "Team meeting", "location": "Conference Room A"},
@@ -53,6 +51,8 @@ contacts_data = [
     {"name": "Mom", "phone": "777-888-9999", "email": "mom@family.com"}
 ]
 
+contact_index = ContactIndex(contacts_data)
+
 expenses_data = [
     {"date": "2025-03-10", "amount": 50.00, "category": "Groceries"},
     {"date": "2025-03-13", "amount": 30.00, "category": "Transportation"},
@@ -82,9 +82,15 @@ def get_news():
     return json.dumps(news_data)
 
 def search_contacts(query):
-    results = [contact for contact in contacts_data if query.lower() in contact['name'].lower() or query in contact['phone'] or query in contact['email']]
+    results = contact_index.search(query)
     return json.dumps(results)
 
+def add_contact(name, phone, email):
+    new_contact = {"name": name, "phone": phone, "email": email}
+    contact_index.add(new_contact)
+    contacts_data.append(new_contact)
+    return json.dumps({"status": "success", "message": "Contact added successfully"})
+
 def get_expenses(start_date, end_date):
     expenses = [expense for expense in expenses_data if start_date <= expense['date'] <= end_date]
     return json.dumps(expenses)
@@ -94,138 +100,197 @@ def add_task(task, due_date, priority):
     tasks_data.append(new_task)
     return json.dumps({"status": "success", "message": "Task added successfully"})
 
-def run_conversation(messages, client):
-    # messages = [
-    #     {
-    #         "role": "system",
-    #         "content": """You are spark, a comprehensive personal assistant with access to the user's calendar, emails, tasks, weather information, news, contacts, and expenses. 
-    #         Use the provided functions to retrieve information and assist the user. Always provide thoughtful and detailed responses. Assume today's date is 2024-11-09"""
-    #     },
-    #     {
-    #         "role": "user",
-    #         "content": user_prompt,
-    #     }
-    # ]
-    
-    tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": "get_calendar_events",
-                "description": "Get calendar events for a date range",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "start_date": {"type": "string", "description": "Start date (YYYY-MM-DD)"},
-                        "end_date": {"type": "string", "description": "End date (YYYY-MM-DD)"}
-                    },
-                    "required": ["start_date", "end_date"],
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "get_calendar_events",
+            "description": "Get calendar events for a date range",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "start_date": {"type": "string", "description": "Start date (YYYY-MM-DD)"},
+                    "end_date": {"type": "string", "description": "End date (YYYY-MM-DD)"}
                 },
+                "required": ["start_date", "end_date"],
             },
         },
-        {
-            "type": "function",
-            "function": {
-                "name": "get_recent_emails",
-                "description": "Get recent emails",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "count": {"type": "integer", "description": "Number of recent emails to retrieve"},
-                    },
-                    "required": ["count"],
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_recent_emails",
+            "description": "Get recent emails",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "count": {"type": "integer", "description": "Number of recent emails to retrieve"},
                 },
+                "required": ["count"],
             },
         },
-        {
-            "type": "function",
-            "function": {
-                "name": "get_tasks",
-                "description": "Get tasks, optionally filtered by status",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "status": {"type": "string", "enum": ["Not Started", "In Progress", "Completed"], "description": "Filter tasks by status"},
-                    },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_tasks",
+            "description": "Get tasks, optionally filtered by status",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "status": {"type": "string", "enum": ["Not Started", "In Progress", "Completed"], "description": "Filter tasks by status"},
                 },
             },
         },
-        {
-            "type": "function",
-            "function": {
-                "name": "get_weather",
-                "description": "Get weather for a specific date",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "date": {"type": "string", "description": "The date to check weather for (YYYY-MM-DD)"},
-                    },
-                    "required": ["date"],
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_weather",
+            "description": "Get weather for a specific date",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "date": {"type": "string", "description": "The date to check weather for (YYYY-MM-DD)"},
                 },
+                "required": ["date"],
             },
         },
-        {
-            "type": "function",
-            "function": {
-                "name": "get_news",
-                "description": "Get latest news",
-                "parameters": {
-                    "type": "object",
-                    "properties": {},
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_news",
+            "description": "Get latest news",
+            "parameters": {
+                "type": "object",
+                "properties": {},
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_contacts",
+            "description": "Search contacts by name, phone, or email",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Search query"},
                 },
+                "required": ["query"],
             },
         },
-        {
-            "type": "function",
-            "function": {
-                "name": "search_contacts",
-                "description": "Search contacts by name, phone, or email",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {"type": "string", "description": "Search query"},
-                    },
-                    "required": ["query"],
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_expenses",
+            "description": "Get expenses for a date range",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "start_date": {"type": "string", "description": "Start date (YYYY-MM-DD)"},
+                    "end_date": {"type": "string", "description": "End date (YYYY-MM-DD)"}
                 },
+                "required": ["start_date", "end_date"],
             },
         },
-        {
-            "type": "function",
-            "function": {
-                "name": "get_expenses",
-                "description": "Get expenses for a date range",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "start_date": {"type": "string", "description": "Start date (YYYY-MM-DD)"},
-                        "end_date": {"type": "string", "description": "End date (YYYY-MM-DD)"}
-                    },
-                    "required": ["start_date", "end_date"],
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "add_task",
+            "description": "Add a new task",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "task": {"type": "string", "description": "Task description"},
+                    "due_date": {"type": "string", "description": "Due date (YYYY-MM-DD)"},
+                    "priority": {"type": "string", "enum": ["Low", "Medium", "High"], "description": "Task priority"}
                 },
+                "required": ["task", "due_date", "priority"],
             },
         },
-        {
-            "type": "function",
-            "function": {
-                "name": "add_task",
-                "description": "Add a new task",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "task": {"type": "string", "description": "Task description"},
-                        "due_date": {"type": "string", "description": "Due date (YYYY-MM-DD)"},
-                        "priority": {"type": "string", "enum": ["Low", "Medium", "High"], "description": "Task priority"}
-                    },
-                    "required": ["task", "due_date", "priority"],
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "add_contact",
+            "description": "Add a new contact",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "description": "Contact name"},
+                    "phone": {"type": "string", "description": "Phone number"},
+                    "email": {"type": "string", "description": "Email address"}
                 },
+                "required": ["name", "phone", "email"],
             },
         },
-    ]
+    },
+]
+
+available_functions = {
+    "get_calendar_events": get_calendar_events,
+    "get_recent_emails": get_recent_emails,
+    "get_tasks": get_tasks,
+    "get_weather": get_weather,
+    "get_news": get_news,
+    "search_contacts": search_contacts,
+    "get_expenses": get_expenses,
+    "add_task": add_task,
+    "add_contact": add_contact,
+}
+
+tool_cache = ToolCache(Config.TOOL_CACHE_TTLS, Config.TOOL_CACHE_INVALIDATES)
+
+def call_tool(function_name, function_args):
+    """Run a tool through the result cache."""
+    return tool_cache.call(function_name, available_functions[function_name], function_args)
+
+def get_tool_cache_stats():
+    """Per-tool hit/miss counts for the tool result cache."""
+    return tool_cache.stats()
+
+def run_conversation(messages, client, model=None, use_tools=True):
+    """
+    Answer the conversation, letting the model call the assistant's tools.
+
+    Args:
+    messages (list): The chat history; tool calls and results are appended to it.
+    client: A Groq (or OpenAI-compatible) client.
+    model (str, optional): The tool-use model. Defaults to Config.AGENT_LLM.
+    use_tools (bool): Whether to offer the tool schemas to the model at all.
+
+    Returns:
+    str: The assistant's reply.
+    """
+    # messages = [
+    #     {
+    #         "role": "system",
+    #         "content": """You are spark, a comprehensive personal assistant with access to the user's calendar, emails, tasks, weather information, news, contacts, and expenses. 
+    #         Use the provided functions to retrieve information and assist the user. Always provide thoughtful and detailed responses. Assume today's date is 2024-11-09"""
+    #     },
+    #     {
+    #         "role": "user",
+    #         "content": user_prompt,
+    #     }
+    # ]
+    model = model or Config.AGENT_LLM
+
+    if not use_tools:
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=4096
+        )
+        return response.choices[0].message.content
 
     response = client.chat.completions.create(
-        model=MODEL,
+        model=model,
         messages=messages,
-        tools=tools,
+        tools=TOOLS,
         tool_choice="auto",
         max_tokens=4096
     )
@@ -234,23 +299,12 @@ def run_conversation(messages, client):
     tool_calls = response_message.tool_calls
     
     if tool_calls:
-        available_functions = {
-            "get_calendar_events": get_calendar_events,
-            "get_recent_emails": get_recent_emails,
-            "get_tasks": get_tasks,
-            "get_weather": get_weather,
-            "get_news": get_news,
-            "search_contacts": search_contacts,
-            "get_expenses": get_expenses,
-            "add_task": add_task,
-        }
         messages.append(response_message)
         
         for tool_call in tool_calls:
             function_name = tool_call.function.name
-            function_to_call = available_functions[function_name]
             function_args = json.loads(tool_call.function.arguments)
-            function_response = function_to_call(**function_args)
+            function_response = call_tool(function_name, function_args)
             
             messages.append(
                 {
@@ -262,7 +316,7 @@ def run_conversation(messages, client):
             )
         
         second_response = client.chat.completions.create(
-            model=MODEL,
+            model=model,
             messages=messages
         )
         return second_response.choices[0].message.content
@@ -1,46 +1,39 @@
 # voice_assistant/api_key_manager.py
 
-from voice_assistant.config import Config
+from voice_assistant.settings import Settings
 
-def get_transcription_api_key():
+def get_transcription_api_key(settings=None):
     """
     Select the correct API key for transcription based on the configured model.
+
+    Args:
+    settings (Settings, optional): The session's settings. Defaults to the current Config.
     
     Returns:
     str: The API key for the transcription service.
     """
-    if Config.TRANSCRIPTION_MODEL == 'openai':
-        return Config.OPENAI_API_KEY
-    elif Config.TRANSCRIPTION_MODEL == 'groq':
-        return Config.GROQ_API_KEY
-    elif Config.TRANSCRIPTION_MODEL == 'deepgram':
-        return Config.DEEPGRAM_API_KEY
-    return None
+    return (settings or Settings.from_config()).transcription_api_key
 
-def get_response_api_key():
+def get_response_api_key(settings=None):
     """
     Select the correct API key for response generation based on the configured model.
+
+    Args:
+    settings (Settings, optional): The session's settings. Defaults to the current Config.
     
     Returns:
     str: The API key for the response generation service.
     """
-    if Config.RESPONSE_MODEL == 'openai':
-        return Config.OPENAI_API_KEY
-    elif Config.RESPONSE_MODEL == 'groq':
-        return Config.GROQ_API_KEY
-    return None
+    return (settings or Settings.from_config()).response_api_key
 
-def get_tts_api_key():
+def get_tts_api_key(settings=None):
     """
     Select the correct API key for text-to-speech based on the configured model.
+
+    Args:
+    settings (Settings, optional): The session's settings. Defaults to the current Config.
     
     Returns:
     str: The API key for the TTS service.
     """
-    if Config.TTS_MODEL == 'openai':
-        return Config.OPENAI_API_KEY
-    elif Config.TTS_MODEL == 'deepgram':
-        return Config.DEEPGRAM_API_KEY
-    elif Config.TTS_MODEL == 'elevenlabs':
-        return Config.ELEVENLABS_API_KEY
-    return None
\ No newline at end of file
+    return (settings or Settings.from_config()).tts_api_key
@@ -2,6 +2,10 @@ import pyaudio
 import wave
 import logging
 import os
+import queue
+import subprocess
+import threading
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -143,6 +147,182 @@ def play_audio(file_path):
     except Exception as e:
         logging.error(f"An unexpected error occurred while playing audio: {e}")
 
+def decode_mp3_stream(chunks, sample_rate, channels=1):
+    """
+    Decode MP3 chunks into 16-bit PCM as they arrive.
+
+    The chunks are piped through an ffmpeg subprocess, so decoded audio comes
+    out while the rest of the MP3 is still downloading.
+
+    Args:
+    chunks (iterable): MP3 byte chunks.
+    sample_rate (int): The sample rate to resample the output to.
+    channels (int): The number of output channels.
+
+    Yields:
+    bytes: Little-endian int16 PCM.
+    """
+    process = subprocess.Popen(
+        ["ffmpeg", "-loglevel", "error", "-probesize", "32", "-analyzeduration", "0",
+         "-f", "mp3", "-i", "pipe:0",
+         "-f", "s16le", "-acodec", "pcm_s16le", "-ac", str(channels), "-ar", str(sample_rate), "pipe:1"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+
+    def feed():
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk)
+                process.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            pass
+        except Exception as e:
+            logging.error(f"MP3 stream failed: {e}")
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    threading.Thread(target=feed, daemon=True).start()
+    try:
+        while True:
+            data = os.read(process.stdout.fileno(), 8192)
+            if not data:
+                break
+            yield data
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+
+def pcm_stream(chunks, encoding, sample_rate, channels=1):
+    """
+    Turn a TTS byte stream into 16-bit PCM chunks.
+
+    Args:
+    chunks (iterable): Audio byte chunks from a streaming TTS call.
+    encoding (str): 'pcm_s16le' (passed through) or 'mp3' (decoded incrementally).
+    sample_rate (int): The sample rate of the stream.
+    channels (int): The number of channels.
+
+    Returns:
+    iterator: Little-endian int16 PCM chunks.
+    """
+    if encoding == 'pcm_s16le':
+        return iter(chunks)
+    elif encoding == 'mp3':
+        return decode_mp3_stream(chunks, sample_rate, channels)
+    else:
+        raise ValueError(f"Unsupported stream encoding: {encoding}")
+
+
+def play_audio_stream(chunks, encoding, sample_rate, channels=1, prebuffer_ms=200):
+    """
+    Play streamed TTS audio as it arrives instead of waiting for the whole file.
+
+    A reader thread pulls chunks off the network into a queue. Playback starts
+    once `prebuffer_ms` of audio is queued (or the stream has ended), and if
+    the network falls behind the device, playback pauses until the buffer
+    refills, rather than writing gaps.
+
+    Args:
+    chunks (iterable): Audio byte chunks from a streaming TTS call.
+    encoding (str): 'pcm_s16le' or 'mp3'.
+    sample_rate (int): The sample rate of the stream.
+    channels (int): The number of channels.
+    prebuffer_ms (int): Audio to buffer before starting or resuming playback.
+
+    Returns:
+    dict: 'time_to_first_audio' (seconds, or None if nothing played) and 'underruns'.
+    """
+    global playback_should_stop
+    playback_should_stop = False
+
+    start_time = time.time()
+    frame_bytes = 2 * channels
+    period_bytes = 1024 * frame_bytes
+    prebuffer_bytes = max(period_bytes, int(sample_rate * prebuffer_ms / 1000) * frame_bytes)
+
+    buffer = queue.Queue()
+
+    def read():
+        try:
+            for data in pcm_stream(chunks, encoding, sample_rate, channels):
+                buffer.put(data)
+                if playback_should_stop:
+                    break
+        except Exception as e:
+            logging.error(f"Audio stream failed: {e}")
+        finally:
+            buffer.put(None)
+
+    threading.Thread(target=read, daemon=True).start()
+
+    p = pyaudio.PyAudio()
+    stream = p.open(format=pyaudio.paInt16,
+                    channels=channels,
+                    rate=sample_rate,
+                    output=True,
+                    frames_per_buffer=1024)
+
+    pending = bytearray()
+    done = False
+    target = prebuffer_bytes
+    first_audio_at = None
+    underruns = 0
+
+    try:
+        while not playback_should_stop:
+            # Pull in anything that has arrived without blocking.
+            while not done:
+                try:
+                    item = buffer.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    done = True
+                else:
+                    pending += item
+
+            if not done and len(pending) < target:
+                if first_audio_at is not None and target == period_bytes:
+                    # The network fell behind the device: refill before resuming.
+                    underruns += 1
+                    target = prebuffer_bytes
+                try:
+                    # Wake up now and then so stop_audio() isn't stuck behind a stalled stream.
+                    item = buffer.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    done = True
+                else:
+                    pending += item
+                continue
+
+            if len(pending) < frame_bytes:
+                break
+
+            size = min(len(pending), period_bytes)
+            size -= size % frame_bytes
+            stream.write(bytes(pending[:size]))
+            del pending[:size]
+            if first_audio_at is None:
+                first_audio_at = time.time() - start_time
+                logging.info(f"⏱️ Time to first audio: {first_audio_at:.2f}s")
+            # Once playing, keep only about one period queued ahead.
+            target = period_bytes
+    finally:
+        stream.stop_stream()
+        stream.close()
+        p.terminate()
+
+    logging.info("Streamed audio playback complete")
+    return {"time_to_first_audio": first_audio_at, "underruns": underruns}
+
 def transcribe_audio(file_path):
     """
     Transcribe the audio file using an external API.
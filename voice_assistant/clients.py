@@ -0,0 +1,84 @@
+# voice_assistant/clients.py
+
+import math
+import threading
+
+from voice_assistant.config import Config
+
+# Long-lived SDK clients, keyed by (provider, api_key). Building a client per
+# call throws away its HTTP connection pool, so every request would pay a
+# fresh TCP + TLS handshake.
+_clients = {}
+_lock = threading.Lock()
+
+
+def _base_url(url):
+    # Only pass base_url when one is configured, so the SDK defaults apply otherwise
+    return {"base_url": url} if url else {}
+
+
+def _build_client(provider, api_key):
+    # Retries are left to voice_assistant/resilience.py, which knows how much
+    # of the turn is left; the SDKs' own backoff would ignore the deadline.
+    if provider == 'openai':
+        from openai import OpenAI
+        return OpenAI(api_key=api_key, max_retries=0, **_base_url(Config.OPENAI_BASE_URL))
+    elif provider == 'groq':
+        from groq import Groq
+        return Groq(api_key=api_key, max_retries=0, **_base_url(Config.GROQ_BASE_URL))
+    elif provider == 'elevenlabs':
+        from elevenlabs.client import ElevenLabs
+        return ElevenLabs(api_key=api_key, **_base_url(Config.ELEVENLABS_BASE_URL))
+    elif provider == 'cartesia':
+        from cartesia import Cartesia
+        return Cartesia(api_key=api_key, **_base_url(Config.CARTESIA_BASE_URL))
+    else:
+        raise ValueError(f"Unsupported client provider: {provider}")
+
+
+def get_client(provider, api_key, timeout=None):
+    """
+    Return a shared client for the given provider and API key, creating it on first use.
+
+    Args:
+    provider (str): The provider name ('openai', 'groq', 'elevenlabs', 'cartesia').
+    api_key (str): The API key the client authenticates with.
+    timeout (float, optional): Request timeout in seconds, e.g. resilience.attempt_timeout(). Only
+    for 'openai' and 'groq', whose copy shares the pooled client's connections; ElevenLabs and
+    Cartesia take it per request, see request_options().
+
+    Returns:
+    The provider SDK client.
+    """
+    key = (provider, api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _build_client(provider, api_key)
+                _clients[key] = client
+    if timeout is not None and provider in ('openai', 'groq'):
+        return client.with_options(timeout=timeout)
+    return client
+
+
+def request_options(timeout):
+    """
+    Per-request options for the ElevenLabs and Cartesia SDKs.
+
+    Args:
+    timeout (float): Request timeout in seconds, or None for the SDK default.
+
+    Returns:
+    dict: The request_options argument, or None.
+    """
+    if timeout is None:
+        return None
+    return {"timeout_in_seconds": math.ceil(timeout)}
+
+
+def clear_clients():
+    """Drop every pooled client, e.g. after API keys or base URLs change."""
+    with _lock:
+        _clients.clear()
@@ -9,7 +9,7 @@ class Config:
     
     Attributes:
     TRANSCRIPTION_MODEL (str): The model to use for transcription ('openai', 'groq', 'deepgram', 'fastwhisperapi', 'local').
-    RESPONSE_MODEL (str): The model to use for response generation ('openai', 'groq', 'local').
+    RESPONSE_MODEL (str): The model to use for response generation ('openai', 'groq', 'ollama', 'agent', 'local').
     TTS_MODEL (str): The model to use for text-to-speech ('openai', 'deepgram', 'elevenlabs', 'local').
     OPENAI_API_KEY (str): API key for OpenAI services.
     GROQ_API_KEY (str): API key for Groq services.
@@ -19,13 +19,14 @@ class Config:
     """
     # Model selection
     TRANSCRIPTION_MODEL = 'groq'  # possible values: openai, groq, deepgram, fastwhisperapi
-    RESPONSE_MODEL = 'groq'  # possible values: openai, groq, ollama
+    RESPONSE_MODEL = 'groq'  # possible values: openai, groq, ollama, agent
     TTS_MODEL = 'elevenlabs'  # possible values: openai, deepgram, elevenlabs, melotts, cartesia
 
     # LLM Selection
     OLLAMA_LLM="llama3:8b"
     GROQ_LLM="llama-3.1-8b-instant"
     OPENAI_LLM="gpt-4o"
+    AGENT_LLM="llama3-groq-70b-8192-tool-use-preview"  # tool-use model for the agent response model
 
     # API keys and paths
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -35,12 +36,137 @@ class Config:
     LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH")
     CARTESIA_API_KEY = os.getenv("CARTESIA_API_KEY")
 
-    # for serving the MeloTTS model
+    # Provider endpoints; None uses the SDK default. Point these at local
+    # stand-ins (benchmarks/fake_providers.py) or a proxy.
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")
+    ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL")
+    CARTESIA_BASE_URL = os.getenv("CARTESIA_BASE_URL")
+    FASTWHISPERAPI_URL = os.getenv("FASTWHISPERAPI_URL", "http://localhost:8000")
+    MELOTTS_URL = os.getenv("MELOTTS_URL")  # full generate-audio URL; None builds it from TTS_HOST_LOCAL and TTS_PORT_LOCAL
+
+    # Per-stage latency histograms (voice_assistant/metrics.py)
+    METRICS_ENABLED = True
+    METRICS_PORT = None  # e.g. 9464 to serve /metrics and /metrics.json on localhost
+    METRICS_DUMP_PATH = None  # JSON snapshot written when run_voice_assistant exits
+
+    # Stream TTS audio straight to the speaker instead of writing a file first
+    TTS_STREAMING = False
+    PLAYBACK_PREBUFFER_MS = 200  # audio buffered before playback starts or resumes
+
+    # Split long responses into sentences, synthesize them concurrently (up to
+    # the provider's limit) and play them in order as they become ready
+    TTS_SENTENCE_PARALLEL = False
+    TTS_CONCURRENCY = {
+        "openai": 4,
+        "elevenlabs": 2,
+        "cartesia": 4,
+        "melotts": 1,
+    }
+
+    # Turn deadlines, retries and provider fallback (voice_assistant/resilience.py)
+    TURN_BUDGET_SECONDS = 20  # transcription, response and speech of one turn together
+    STAGE_TIMEOUTS = {  # longest single attempt, cut short by what is left of the turn
+        "transcription": 8,
+        "response": 12,
+        "tts": 10,
+    }
+    RETRY_ATTEMPTS = 2  # per provider, counting the first
+    RETRY_BACKOFF = 0.25  # seconds; the jittered wait doubles with each retry
+    FALLBACK_CHAINS = {  # tried in order after the selected provider fails, e.g. "response": ["openai", "local"]
+        "transcription": [],
+        "response": [],
+        "tts": [],
+    }
+    FAILURE_REPLY = "Sorry, I couldn't answer that. Please try again."  # spoken when no response provider answers
+
+    # Synthesized speech cache
+    TTS_CACHE_ENABLED = True
+    TTS_CACHE_DIR = ".tts_cache"
+    TTS_CACHE_MAX_BYTES = 200 * 1024 * 1024  # on-disk tier
+    TTS_CACHE_MEMORY_ITEMS = 64  # entries kept memory-mapped
+    TTS_PREWARM_PHRASES = [
+        "Hello! I'm Spark",
+        "Goodbye! It was nice chatting with you.",
+        FAILURE_REPLY,
+    ]
+
+    # TTS voices
+    OPENAI_TTS_VOICE = "alloy"
+    ELEVENLABS_VOICE = "Paul J."
+    CARTESIA_VOICE_ID = "f114a467-c40a-4db8-964d-aaba89cd08fa"
+
+    # voice name -> id / embedding lookups, persisted between runs
+    VOICE_CACHE_PATH = ".voice_cache.json"
+    VOICE_CACHE_TTL = 24 * 60 * 60  # seconds
+
+    # for serving the MeloTTS model (the server may run on another machine)
+    TTS_HOST_LOCAL = "localhost"
     TTS_PORT_LOCAL = 5150
+    MELOTTS_CONNECT_TIMEOUT = 3  # seconds
+    MELOTTS_READ_TIMEOUT = 60  # seconds between bytes, not for the whole response
+    MELOTTS_RETRIES = 2  # on connection errors and 429/503 from a busy or starting server
+    MELOTTS_POOL_SIZE = 4  # keep-alive connections kept open to the server
+    MELOTTS_SAMPLE_RATE = 44100  # output rate of the MeloTTS English models
+    MELOTTS_MAX_QUEUE = 32  # queued sentences before the server answers 429
+    MELOTTS_MAX_BATCH_SIZE = 8
+    MELOTTS_BATCH_WINDOW_MS = 10  # how long to wait for more short texts to batch
+    MELOTTS_WARMUP_TEXT = "Hello, how can I help you today?"  # synthesized once at startup; None to skip
+    MELOTTS_WORKERS = 1  # forked server processes sharing one loaded model
+    MELOTTS_THREADS_PER_WORKER = None  # torch intra-op threads per worker; None splits the cores evenly
+
+    # Keep the microphone open and let the user interrupt the reply (voice_assistant/orchestrator.py)
+    CONTINUOUS_LISTENING = False
+    CAPTURE_SAMPLE_RATE = 16000
+    VAD_FRAME_MS = 20
+    VAD_MIN_RMS = 300  # 16-bit level below which nothing counts as speech
+    VAD_SNR = 3.0  # speech must be this many times louder than the noise floor
+    VAD_START_MS = 100  # speech needed to start an utterance (and to barge in)
+    VAD_END_MS = 700  # silence that ends an utterance
+    VAD_PREROLL_MS = 300  # audio kept from just before speech started
+    VAD_MAX_UTTERANCE_SECONDS = 30
+    ECHO_GATE_MARGIN = 2.0  # how much louder than the expected echo the user must be to barge in
+    ECHO_GATE_WINDOW_MS = 300  # how long played audio can still reach the microphone
+
+    # Wait for a wake word before recording (voice_assistant/wake_word.py)
+    WAKE_WORD_ENGINE = None  # 'template'; None records right away
+    WAKE_WORD_TEMPLATES = "wake_word"  # directory of WAV recordings of the wake word
+    WAKE_WORD_THRESHOLD = 0.2  # lower is stricter; tune with benchmarks/bench_wake_word.py
+    WAKE_WORD_SAMPLE_RATE = 16000  # keep equal to CAPTURE_SAMPLE_RATE when listening continuously
+
+    # Streamlit app
+    APP_TURN_WORKERS = 16  # turns running in the background at once, shared by all sessions
+    APP_POLL_SECONDS = 0.25  # how often the page picks up a running turn's progress
+    APP_CHAT_PAGE_SIZE = 50  # chat messages drawn at first; None draws the whole conversation
+
+    # Headless WebSocket server (python -m voice_assistant.ws_server)
+    WS_HOST = "127.0.0.1"
+    WS_PORT = 8765
+    WS_SAMPLE_RATE = 16000  # microphone PCM rate when the client doesn't send one
+    WS_MAX_SESSIONS = 500  # connections per process; more are closed with 1013
+    WS_MAX_WORKERS = 256  # threads for blocking provider calls, shared by all sessions
+    WS_MAX_UTTERANCE_SECONDS = 30
+    WS_PARTIAL_TRANSCRIPT_SECONDS = None  # e.g. 1.0 to transcribe the utterance so far every second of audio
 
     # temp file generated by the initial STT model
     INPUT_AUDIO = "test.mp3"
 
+    # Agent tool result caching: seconds to keep each tool's results (tools
+    # not listed are never cached), and which cached reads each write drops.
+    TOOL_CACHE_TTLS = {
+        "get_news": 60,
+        "get_weather": 900,
+        "get_calendar_events": 300,
+        "get_recent_emails": 60,
+        "get_tasks": 300,
+        "search_contacts": 3600,
+        "get_expenses": 300,
+    }
+    TOOL_CACHE_INVALIDATES = {
+        "add_task": ["get_tasks"],
+        "add_contact": ["search_contacts"],
+    }
+
     @staticmethod
     def validate_config():
         """
@@ -51,8 +177,8 @@ class Config:
         """
         if Config.TRANSCRIPTION_MODEL not in ['openai', 'groq', 'deepgram', 'fastwhisperapi', 'local']:
             raise ValueError("Invalid TRANSCRIPTION_MODEL. Must be one of ['openai', 'groq', 'deepgram', 'fastwhisperapi', 'local']")
-        if Config.RESPONSE_MODEL not in ['openai', 'groq', 'ollama', 'local']:
-            raise ValueError("Invalid RESPONSE_MODEL. Must be one of ['openai', 'groq', 'local']")
+        if Config.RESPONSE_MODEL not in ['openai', 'groq', 'ollama', 'agent', 'local']:
+            raise ValueError("Invalid RESPONSE_MODEL. Must be one of ['openai', 'groq', 'ollama', 'agent', 'local']")
         if Config.TTS_MODEL not in ['openai', 'deepgram', 'elevenlabs', 'melotts', 'cartesia', 'local']:
             raise ValueError("Invalid TTS_MODEL. Must be one of ['openai', 'deepgram', 'elevenlabs', 'melotts', 'cartesia', 'local']")
 
@@ -65,7 +191,7 @@ class Config:
 
         if Config.RESPONSE_MODEL == 'openai' and not Config.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is required for OpenAI models")
-        if Config.RESPONSE_MODEL == 'groq' and not Config.GROQ_API_KEY:
+        if Config.RESPONSE_MODEL in ('groq', 'agent') and not Config.GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY is required for Groq models")
 
 
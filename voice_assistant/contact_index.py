@@ -0,0 +1,296 @@
+# voice_assistant/contact_index.py
+
+import re
+from collections import defaultdict
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_NON_DIGIT = re.compile(r"\D+")
+
+# Phone numbers are also indexed by their trailing digits so that
+# "the number ending in 4567" style queries resolve without a scan.
+PHONE_SUFFIX_LENGTH = 4
+
+
+def normalize_name(text):
+    """
+    Lowercase a name and collapse punctuation and whitespace into single spaces.
+
+    Args:
+    text (str): The raw name or query.
+
+    Returns:
+    str: The normalized name.
+    """
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def normalize_phone(text):
+    """
+    Strip everything except digits from a phone number or query.
+
+    Args:
+    text (str): The raw phone number or query.
+
+    Returns:
+    str: The digits of the input, in order.
+    """
+    return _NON_DIGIT.sub("", text)
+
+
+def name_ngrams(text, n=3):
+    """
+    Build the set of character n-grams for a name.
+
+    Each token is padded with a space on both sides so that word boundaries
+    produce their own grams ("jon" -> " jo", "jon", "on ").
+
+    Args:
+    text (str): The name to split into n-grams.
+    n (int): The n-gram length.
+
+    Returns:
+    frozenset: The n-grams of every token in the name.
+    """
+    grams = set()
+    for token in normalize_name(text).split():
+        padded = " " + token + " "
+        for i in range(len(padded) - n + 1):
+            grams.add(padded[i:i + n])
+    return frozenset(grams)
+
+
+def _searchable_text(contact):
+    # Lowercased, so the grams narrow case-insensitive and exact substring
+    # tests alike; _is_substring makes the final decision
+    return "\n".join(contact.get(field, "").lower() for field in ("name", "phone", "email"))
+
+
+def _is_substring(query, contact):
+    """The match test of the original linear search_contacts."""
+    return (query.lower() in contact.get("name", "").lower() or query in contact.get("phone", "")
+            or query in contact.get("email", ""))
+
+
+class ContactIndex:
+    """
+    In-memory search index over contacts.
+
+    Names are matched fuzzily through character n-gram postings so that
+    transcription slips ("Jon Doe") still find the right contact. Whole name
+    tokens are indexed too: a slip usually leaves at least one word intact,
+    and that word's postings are a much smaller candidate set to score than
+    the n-gram postings, which are only walked when it finds nothing. Phone
+    numbers are matched on normalized digits and emails through an exact
+    hash map. Partial queries ("Jo", "555-123", "example.com") still find
+    every contact they are a substring of, as the old linear search did:
+    n-grams of the raw name, phone and email text narrow the candidates,
+    which are then checked with the same substring test. The index is
+    maintained incrementally with add/update/remove.
+    """
+
+    def __init__(self, contacts=(), ngram=3):
+        self.ngram = ngram
+        self._contacts = {}
+        self._grams = {}
+        self._postings = defaultdict(set)
+        self._tokens = defaultdict(set)
+        self._phones = defaultdict(set)
+        self._phone_suffixes = defaultdict(set)
+        self._emails = defaultdict(set)
+        self._text_grams = {}
+        self._text_postings = defaultdict(set)
+        self._next_id = 0
+        for contact in contacts:
+            self.add(contact)
+
+    def __len__(self):
+        return len(self._contacts)
+
+    def add(self, contact):
+        """
+        Index a contact.
+
+        Args:
+        contact (dict): A contact with 'name', 'phone' and 'email' keys.
+
+        Returns:
+        int: The id assigned to the contact.
+        """
+        contact_id = self._next_id
+        self._next_id += 1
+        self._insert(contact_id, contact)
+        return contact_id
+
+    def update(self, contact_id, contact):
+        """
+        Replace the indexed entry for an existing contact.
+
+        Args:
+        contact_id (int): The id returned by add().
+        contact (dict): The new contact data.
+        """
+        self.remove(contact_id)
+        self._insert(contact_id, contact)
+
+    def remove(self, contact_id):
+        """
+        Drop a contact from the index.
+
+        Args:
+        contact_id (int): The id returned by add().
+
+        Raises:
+        KeyError: If the contact is not indexed.
+        """
+        contact = self._contacts.pop(contact_id)
+        for gram in self._grams.pop(contact_id):
+            postings = self._postings[gram]
+            postings.discard(contact_id)
+            if not postings:
+                del self._postings[gram]
+        for gram in self._text_grams.pop(contact_id):
+            postings = self._text_postings[gram]
+            postings.discard(contact_id)
+            if not postings:
+                del self._text_postings[gram]
+
+        phone = normalize_phone(contact.get("phone", ""))
+        email = contact.get("email", "").strip().lower()
+        keys = [(self._tokens, token) for token in normalize_name(contact.get("name", "")).split()]
+        keys += [(self._phones, phone),
+                 (self._phone_suffixes, phone[-PHONE_SUFFIX_LENGTH:]),
+                 (self._emails, email)]
+        for table, key in keys:
+            if key and key in table:
+                table[key].discard(contact_id)
+                if not table[key]:
+                    del table[key]
+
+    def _insert(self, contact_id, contact):
+        grams = name_ngrams(contact.get("name", ""), self.ngram)
+        self._contacts[contact_id] = contact
+        self._grams[contact_id] = grams
+        for gram in grams:
+            self._postings[gram].add(contact_id)
+        for token in normalize_name(contact.get("name", "")).split():
+            self._tokens[token].add(contact_id)
+        text = _searchable_text(contact)
+        text_grams = {text[i:i + self.ngram] for i in range(len(text) - self.ngram + 1)}
+        self._text_grams[contact_id] = text_grams
+        for gram in text_grams:
+            self._text_postings[gram].add(contact_id)
+
+        phone = normalize_phone(contact.get("phone", ""))
+        if phone:
+            self._phones[phone].add(contact_id)
+            self._phone_suffixes[phone[-PHONE_SUFFIX_LENGTH:]].add(contact_id)
+        email = contact.get("email", "").strip().lower()
+        if email:
+            self._emails[email].add(contact_id)
+
+    def search(self, query, limit=10, threshold=0.6):
+        """
+        Find the contacts that best match a query.
+
+        Exact email and phone matches rank first, then contacts the query is
+        a substring of, then fuzzy name matches ordered by score.
+
+        Args:
+        query (str): A name, phone number or email address.
+        limit (int): Maximum number of contacts to return.
+        threshold (float): Minimum name similarity score between 0 and 1.
+
+        Returns:
+        list: The matching contacts, best match first.
+        """
+        scores = {}
+
+        email = query.strip().lower()
+        for contact_id in self._emails.get(email, ()):
+            scores[contact_id] = 2.0
+
+        digits = normalize_phone(query)
+        if len(digits) >= PHONE_SUFFIX_LENGTH:
+            for contact_id in self._phones.get(digits, ()):
+                scores[contact_id] = 2.0
+            if len(digits) == PHONE_SUFFIX_LENGTH:
+                for contact_id in self._phone_suffixes.get(digits, ()):
+                    scores.setdefault(contact_id, 1.5)
+
+        for contact_id in self._substring_matches(query):
+            scores[contact_id] = max(scores.get(contact_id, 0.0), 1.0)
+
+        # Queries that are clearly an email or a number never need the
+        # (comparatively expensive) fuzzy name pass.
+        if "@" not in email and any(ch.isalpha() for ch in email):
+            for contact_id, score in self._match_name(query, threshold):
+                if score > scores.get(contact_id, 0.0):
+                    scores[contact_id] = score
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [self._contacts[contact_id] for contact_id, _ in ranked[:limit]]
+
+    def _substring_matches(self, query):
+        """The contacts the old linear search matched: a case-insensitive name substring, or a phone or email substring."""
+        lowered = query.lower()
+        if len(lowered) < self.ngram:
+            # Too short to have a gram; scan, as the old search did
+            candidates = self._contacts.keys()
+        else:
+            grams = sorted({lowered[i:i + self.ngram] for i in range(len(lowered) - self.ngram + 1)},
+                           key=lambda gram: len(self._text_postings.get(gram, ())))
+            candidates = set(self._text_postings.get(grams[0], ()))
+            for gram in grams[1:]:
+                if not candidates:
+                    break
+                candidates &= self._text_postings.get(gram, set())
+        return [contact_id for contact_id in candidates if _is_substring(query, self._contacts[contact_id])]
+
+    def _match_name(self, query, threshold):
+        query_grams = name_ngrams(query, self.ngram)
+        size = len(query_grams)
+        if not size:
+            return []
+
+        # Score is the mean of the Dice coefficient and the fraction of the
+        # query covered, so both "Jon Doe" and a bare "Doe" rank well. Given
+        # the overlap alone, the best possible score is reached when the
+        # candidate has no extra grams; that bound tells us how many grams a
+        # candidate must share to be able to clear the threshold.
+        min_overlap = size
+        for overlap in range(1, size + 1):
+            if 0.5 * (2 * overlap / (size + overlap)) + 0.5 * (overlap / size) >= threshold:
+                min_overlap = overlap
+                break
+
+        candidates = set()
+        for token in normalize_name(query).split():
+            candidates.update(self._tokens.get(token, ()))
+        matches = self._score(query_grams, candidates, min_overlap, threshold)
+        if matches:
+            return matches
+
+        # Prefix filtering: any candidate with min_overlap shared grams must
+        # contain at least one of the (len(present) - min_overlap + 1) rarest
+        # query grams, so only those posting lists are walked.
+        present = [gram for gram in query_grams if gram in self._postings]
+        if len(present) < min_overlap:
+            return []
+        present.sort(key=lambda gram: len(self._postings[gram]))
+        candidates = set()
+        for gram in present[:len(present) - min_overlap + 1]:
+            candidates.update(self._postings[gram])
+        return self._score(query_grams, candidates, min_overlap, threshold)
+
+    def _score(self, query_grams, candidates, min_overlap, threshold):
+        size = len(query_grams)
+        matches = []
+        for contact_id in candidates:
+            grams = self._grams[contact_id]
+            overlap = len(query_grams & grams)
+            if overlap < min_overlap:
+                continue
+            score = 0.5 * (2 * overlap / (size + len(grams))) + 0.5 * (overlap / size)
+            if score >= threshold:
+                matches.append((contact_id, score))
+        return matches
@@ -0,0 +1,45 @@
+# voice_assistant/intent.py
+
+import re
+
+# Words that suggest the user wants one of the agent tools in agent_action.py
+# (calendar, email, tasks, weather, news, contacts, expenses). Matching is on
+# whole words so "rain" does not fire on "brain".
+TOOL_KEYWORDS = {
+    "calendar", "schedule", "scheduled", "meeting", "meetings", "appointment", "appointments",
+    "event", "events", "agenda", "busy",
+    "email", "emails", "mail", "inbox", "message", "messages",
+    "task", "tasks", "todo", "to-do", "remind", "reminder", "due", "deadline",
+    "weather", "forecast", "rain", "raining", "sunny", "temperature", "umbrella",
+    "news", "headlines", "headline",
+    "contact", "contacts", "phone", "number", "call",
+    "expense", "expenses", "spent", "spend", "spending", "budget",
+}
+
+TOOL_PHRASES = [
+    re.compile(r"\b(what|anything)\b.*\b(today|tomorrow|tonight|this week|next week|on monday|on friday)\b"),
+    re.compile(r"\badd\b.*\b(task|reminder|to my list)\b"),
+    re.compile(r"\bhow much\b.*\b(spend|spent|cost)\b"),
+]
+
+_WORD = re.compile(r"[a-z][a-z'-]*")
+
+
+def needs_tools(text):
+    """
+    Guess whether a user utterance needs the agent tools.
+
+    This is a keyword and pattern check that costs microseconds, so plain
+    chit-chat can skip sending the tool schemas to the LLM.
+
+    Args:
+    text (str): The user's latest message.
+
+    Returns:
+    bool: True if the message likely needs a tool call.
+    """
+    lowered = text.lower()
+    words = set(_WORD.findall(lowered))
+    if words & TOOL_KEYWORDS:
+        return True
+    return any(pattern.search(lowered) for pattern in TOOL_PHRASES)
@@ -1,11 +1,22 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-from melo.api import TTS
-from config import Config
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from voice_assistant.config import Config
+from voice_assistant.pcm import Float32ToInt16Converter
+from voice_assistant.prefork import serve_prefork, default_threads_per_worker
+from voice_assistant.tts_scheduler import SynthesisScheduler, QueueFullError
+from voice_assistant.utils import split_sentences
+from collections import namedtuple
+from contextlib import asynccontextmanager
+import argparse
+import asyncio
+import logging
+import os
+import struct
+import threading
+import time
 import torch
-import uuid
 
-app = FastAPI()
 
 class TextToSpeechRequest(BaseModel):
     """
@@ -16,13 +27,16 @@ class TextToSpeechRequest(BaseModel):
         language (str): The language of the text.
         accent (str): The accent to use for the speech.
         speed (float): The speed of the speech.
-        filename (str): The desired name for the output audio file.
+        format (str): 'wav' for a streamed WAV file, 'pcm' for raw 16-bit little-endian samples.
+        split_sentences (bool): Synthesize and send the text sentence by sentence, so the
+            first audio goes out before the whole text is synthesized.
     """
     text: str
     language: str = 'EN'
     accent: str = 'EN-US'
     speed: float = 1.0
-    filename: str = Field(default_factory=lambda: f"{uuid.uuid4()}.wav")
+    format: str = 'wav'
+    split_sentences: bool = True
 
 def get_device():
     """
@@ -38,40 +52,241 @@ def get_device():
     else:
         return 'cpu'
 
-# Initialize the TTS model
-device = get_device()  # Determine the appropriate device
-model = TTS(language='EN', device=device)
-speaker_ids = model.hps.data.spk2id
+# The model is loaded by load_model(): in the background when the server
+# starts, or up front in the parent process when forking workers.
+model = None
+speaker_ids = {}
+sample_rate = Config.MELOTTS_SAMPLE_RATE
+state = {"status": "loading", "load_seconds": None, "warmup_seconds": None, "error": None}
+_load_lock = threading.Lock()
+_started = time.perf_counter()
+
+
+def load_model():
+    """
+    Load the MeloTTS model once per process and cache its speaker ids and sample rate.
+
+    Safe to call from several threads; later calls return right away.
+    """
+    global model, speaker_ids, sample_rate
+    with _load_lock:
+        if model is not None:
+            return
+        start = time.perf_counter()
+        from melo.api import TTS  # pulls in the whole model stack, so only when needed
+        loaded = TTS(language='EN', device=get_device())
+        speaker_ids = dict(loaded.hps.data.spk2id)
+        sample_rate = loaded.hps.data.sampling_rate
+        model = loaded
+        state["load_seconds"] = round(time.perf_counter() - start, 3)
+        logging.info(f"MeloTTS model loaded in {state['load_seconds']}s")
+
+
+def streaming_wav_header(sample_rate, channels=1, sample_width=2):
+    """
+    Build a WAV header for a stream whose length is not known up front.
+
+    The RIFF and data sizes are set to the maximum, the usual convention for
+    streamed WAV; players read until the connection closes.
+    """
+    byte_rate = sample_rate * channels * sample_width
+    return (b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate, channels * sample_width, sample_width * 8)
+            + b"data" + struct.pack("<I", 0xFFFFFFFF))
+
+
+# One piece of text (usually a sentence) queued for synthesis
+SynthesisJob = namedtuple("SynthesisJob", ["text", "speaker_id", "speed"])
+
+
+def synthesize_batch(jobs):
+    """
+    Synthesize a batch of jobs on the scheduler's model thread.
+
+    MeloTTS has no batched inference API, so the jobs run back to back; the
+    batch still saves a thread handoff and queue round trip per job.
+
+    Args:
+        jobs (list): SynthesisJob entries.
+
+    Returns:
+        list: 16-bit PCM bytes for each job, in order.
+    """
+    results = []
+    with torch.inference_mode():
+        for job in jobs:
+            audio = model.tts_to_file(job.text, job.speaker_id, None, speed=job.speed, quiet=True)
+            converter = Float32ToInt16Converter()
+            results.append(b"".join(bytes(pcm) for pcm in converter.convert_samples(audio.astype("float32", copy=False))))
+    return results
+
+
+scheduler = SynthesisScheduler(
+    synthesize_batch,
+    max_queue=Config.MELOTTS_MAX_QUEUE,
+    max_batch_size=Config.MELOTTS_MAX_BATCH_SIZE,
+    batch_window_ms=Config.MELOTTS_BATCH_WINDOW_MS,
+)
+
+
+async def start_model():
+    """
+    Load the model if needed, then run the warmup synthesis and mark the server ready.
+
+    The first inference pays one-off costs (allocations, kernel selection), so
+    a short warmup text is synthesized through the scheduler before any real
+    request is admitted. Set Config.MELOTTS_WARMUP_TEXT to None to skip it.
+    """
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, load_model)
+        if Config.MELOTTS_WARMUP_TEXT:
+            state["status"] = "warming"
+            start = time.perf_counter()
+            accent = next(iter(speaker_ids))
+            await scheduler.submit(SynthesisJob(Config.MELOTTS_WARMUP_TEXT, speaker_ids[accent], 1.0), wait=True)
+            state["warmup_seconds"] = round(time.perf_counter() - start, 3)
+        state["status"] = "ready"
+        logging.info(f"MeloTTS ready {time.perf_counter() - _started:.2f}s after start "
+                     f"(load {state['load_seconds']}s, warmup {state['warmup_seconds']}s)")
+    except Exception as e:
+        state["status"] = "failed"
+        state["error"] = str(e)
+        logging.error(f"MeloTTS failed to start: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Start loading in the background so /health and /ready answer right away.
+    task = asyncio.create_task(start_model())
+    yield
+    task.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.post("/generate-audio/")
-def generate_audio(request: TextToSpeechRequest):
+async def generate_audio(request: TextToSpeechRequest):
     """
-    Generate an audio file from the given text.
+    Stream synthesized speech for the given text.
 
     Args:
         request (TextToSpeechRequest): The request containing text and other parameters.
 
     Returns:
-        dict: A dictionary containing a message and the file path of the generated audio.
+        StreamingResponse: Chunked audio, as a WAV file or raw PCM. The sample rate and
+        channel count are also sent in the X-Sample-Rate and X-Channels headers.
     
     Raises:
-        HTTPException: If the specified accent is invalid or if there is an error during audio generation.
+        HTTPException: 400 if the specified accent or format is invalid, 429 with a
+        Retry-After header if the synthesis queue is full, 500 if synthesis fails,
+        503 while the model is still loading.
     """
+    if state["status"] != "ready":
+        raise HTTPException(status_code=503, detail=f"Model is {state['status']}", headers={"Retry-After": "1"})
     if request.accent not in speaker_ids:
         raise HTTPException(status_code=400, detail="Invalid accent specified")
-    
+    if request.format not in ('wav', 'pcm'):
+        raise HTTPException(status_code=400, detail="Invalid format specified")
+
+    pieces = split_sentences(request.text) if request.split_sentences else [request.text]
+    jobs = [SynthesisJob(piece, speaker_ids[request.accent], request.speed) for piece in pieces]
+
+    # Admission control happens on the first piece, so a full queue is
+    # reported as 429 before any audio is sent.
     try:
-        # Use the provided filename or generate a unique one
-        output_filename = request.filename
-        
-        # Generate the audio file
-        model.tts_to_file(request.text, speaker_ids[request.accent], output_filename, speed=request.speed)
-        
-        return {"message": "Audio file generated successfully", "file_path": output_filename}
+        first = await scheduler.submit(jobs[0])
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail="TTS server is busy", headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    async def pcm_stream():
+        # Keep the next piece queued while the current one is being sent.
+        pending = asyncio.ensure_future(scheduler.submit(jobs[1], wait=True)) if len(jobs) > 1 else None
+        try:
+            yield first
+            for i in range(2, len(jobs) + 1):
+                try:
+                    audio = await pending
+                except Exception as e:
+                    # The status line has already been sent, so all we can do is stop the stream.
+                    logging.error(f"MeloTTS synthesis failed: {e}")
+                    return
+                pending = asyncio.ensure_future(scheduler.submit(jobs[i], wait=True)) if i < len(jobs) else None
+                yield audio
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    headers = {"X-Sample-Rate": str(sample_rate), "X-Channels": "1"}
+    if request.format == 'pcm':
+        return StreamingResponse(pcm_stream(), media_type="audio/L16", headers=headers)
+
+    async def wav_stream():
+        yield streaming_wav_header(sample_rate)
+        async for chunk in pcm_stream():
+            yield chunk
+
+    return StreamingResponse(wav_stream(), media_type="audio/wav", headers=headers)
+
+
+@app.get("/health")
+def health():
+    """
+    Liveness check: the process is up and serving HTTP.
+
+    Returns:
+        dict: The current model status.
+    """
+    return {"status": "ok", "model": state["status"]}
+
+
+@app.get("/ready")
+def ready():
+    """
+    Readiness check: the model is loaded and warmed up.
+
+    Returns:
+        JSONResponse: 200 once ready, 503 while loading or after a failed load,
+        with the load and warmup timings.
+    """
+    return JSONResponse(state, status_code=200 if state["status"] == "ready" else 503)
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    Report synthesis queue depth, batch sizes and throughput counters.
+
+    Returns:
+        dict: The scheduler metrics of the worker that answered, with its pid.
+    """
+    return {"pid": os.getpid(), **scheduler.metrics()}
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=Config.TTS_PORT_LOCAL)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="MeloTTS server")
+    parser.add_argument("--workers", type=int, default=Config.MELOTTS_WORKERS)
+    parser.add_argument("--threads", type=int, default=Config.MELOTTS_THREADS_PER_WORKER,
+                        help="torch intra-op threads per worker")
+    parser.add_argument("--port", type=int, default=Config.TTS_PORT_LOCAL)
+    parser.add_argument("--no-warmup", action="store_true", help="skip the warmup synthesis")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.no_warmup:
+        Config.MELOTTS_WARMUP_TEXT = None
+    threads = args.threads or default_threads_per_worker(args.workers)
+    if args.workers > 1:
+        # Workers share the weights only if they are loaded before the fork.
+        # The warmup still runs in each worker, since torch thread pools do
+        # not survive a fork.
+        load_model()
+        # Each worker gets its share of the cores; letting every worker use
+        # all of them oversubscribes the CPU and slows everyone down.
+        serve_prefork(app, "0.0.0.0", args.port, args.workers,
+                      on_worker_start=lambda: torch.set_num_threads(threads))
+    else:
+        import uvicorn
+        torch.set_num_threads(threads)
+        uvicorn.run(app, host="0.0.0.0", port=args.port)
\ No newline at end of file
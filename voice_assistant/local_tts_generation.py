@@ -1,49 +1,250 @@
+import asyncio
+import threading
+import uuid
+import wave
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from voice_assistant.config import Config
 
+# Shared connections to the MeloTTS server. A bare requests.post opens (and
+# closes) a TCP connection per utterance; with sentence-level synthesis that
+# is several handshakes per reply.
+_session = None
+_session_lock = threading.Lock()
+_async_client = None
+_async_client_loop = None
 
-def generate_audio_file_melotts(text, language='EN', accent='EN-US', speed=1.0, filename=None):
+MAX_RETRY_AFTER = 5  # seconds; the scheduler's Retry-After grows with its queue
+
+
+class _CappedRetry(Retry):
+    # urllib3 sleeps for whatever Retry-After says, which could outlast the
+    # caller's timeout; wait at most MAX_RETRY_AFTER, as the async path does.
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, MAX_RETRY_AFTER)
+
+
+def _melotts_url():
+    if Config.MELOTTS_URL:
+        return Config.MELOTTS_URL
+    return f"http://{Config.TTS_HOST_LOCAL}:{Config.TTS_PORT_LOCAL}/generate-audio/"
+
+
+def _payload(text, language, accent, speed):
+    return {
+        "text": text,
+        "language": language,
+        "accent": accent,
+        "speed": speed,
+        "format": "pcm",
+    }
+
+
+def _audio_format(headers):
+    return {
+        "encoding": "pcm_s16le",
+        "sample_rate": int(headers.get("X-Sample-Rate", Config.MELOTTS_SAMPLE_RATE)),
+        "channels": int(headers.get("X-Channels", 1)),
+    }
+
+
+def get_session():
     """
-    Generate an audio file from the given text using the FastAPI endpoint.
+    Return the shared keep-alive session for the MeloTTS server, creating it on first use.
+
+    Connection errors, and 429/503 answers from a busy or still-loading
+    server, are retried up to Config.MELOTTS_RETRIES times with backoff (or
+    the server's Retry-After, up to MAX_RETRY_AFTER seconds). Nothing is retried once the server has
+    started answering a request.
+
+    Returns:
+        requests.Session: The pooled session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = _CappedRetry(
+                    total=Config.MELOTTS_RETRIES,
+                    read=0,
+                    backoff_factor=0.2,
+                    status_forcelist=(429, 503),
+                    allowed_methods=None,  # the server did no work on a 429/503, so POST is safe to retry
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=Config.MELOTTS_POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def get_async_client():
+    """
+    Return the shared httpx.AsyncClient for the MeloTTS server.
+
+    An AsyncClient's connections belong to the event loop that opened them,
+    so a new client is made when called from a different loop.
+
+    Returns:
+        httpx.AsyncClient: A keep-alive client limited to Config.MELOTTS_POOL_SIZE connections.
+    """
+    global _async_client, _async_client_loop
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(retries=Config.MELOTTS_RETRIES),  # connection errors only
+            timeout=httpx.Timeout(Config.MELOTTS_READ_TIMEOUT, connect=Config.MELOTTS_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=Config.MELOTTS_POOL_SIZE,
+                                max_keepalive_connections=Config.MELOTTS_POOL_SIZE),
+        )
+        _async_client_loop = loop
+    return _async_client
+
+
+def stream_audio_melotts(text, language='EN', accent='EN-US', speed=1.0, timeout=None):
+    """
+    Stream 16-bit PCM speech for the given text from the MeloTTS server.
+
+    Nothing touches the filesystem on either side, so the server can run on a
+    different machine (see Config.TTS_HOST_LOCAL).
 
     Args:
         text (str): The text to convert to speech.
         language (str): The language of the text. Default is 'EN'.
         accent (str): The accent to use for the speech. Default is 'EN-US'.
         speed (float): The speed of the speech. Default is 1.0.
-        filename (str, optional): The desired name for the output audio file. If None, a unique name will be generated.
+        timeout (float, optional): Seconds to wait for the server, if less than the configured timeouts.
 
     Returns:
-        dict: A dictionary containing the message and the file path of the generated audio.
+        tuple: (format dict with 'encoding', 'sample_rate' and 'channels', iterator of PCM byte chunks).
     """
-    # Define the API endpoint
-    url = f"http://localhost:{Config.TTS_PORT_LOCAL}/generate-audio/"
+    connect_timeout, read_timeout = Config.MELOTTS_CONNECT_TIMEOUT, Config.MELOTTS_READ_TIMEOUT
+    if timeout is not None:
+        connect_timeout, read_timeout = min(connect_timeout, timeout), min(read_timeout, timeout)
+    # Stream the body on a pooled connection; it goes back to the pool once read
+    response = get_session().post(
+        _melotts_url(),
+        json=_payload(text, language, accent, speed),
+        stream=True,
+        timeout=(connect_timeout, read_timeout),
+    )
+    if response.status_code != 200:
+        response.close()
+        response.raise_for_status()
 
-    # Define the payload
-    payload = {
-        "text": text,
-        "language": language,
-        "accent": accent,
-        "speed": speed
-    }
+    def chunks():
+        with response:
+            yield from response.iter_content(chunk_size=4096)
 
-    if filename:
-        payload["filename"] = filename
+    return _audio_format(response.headers), chunks()
 
-    # Set the headers
-    headers = {
-        "Content-Type": "application/json"
-    }
 
-    # Make the POST request
-    response = requests.post(url, json=payload, headers=headers)
+async def _post_with_retry(client, payload, attempts):
+    # httpx's transport only retries failed connections; a busy server's
+    # 429/503 is retried here, after the delay the server asks for.
+    for attempt in range(attempts + 1):
+        request = client.build_request("POST", _melotts_url(), json=payload)
+        response = await client.send(request, stream=True)
+        if response.status_code not in (429, 503) or attempt == attempts:
+            return response
+        await response.aclose()
+        await asyncio.sleep(min(float(response.headers.get("Retry-After", 1)), MAX_RETRY_AFTER))
 
-    # Check the response
-    if response.status_code == 200:
-        return response.json()
-    else:
+
+async def stream_audio_melotts_async(text, language='EN', accent='EN-US', speed=1.0):
+    """
+    Async version of stream_audio_melotts, on the shared httpx client.
+
+    Args:
+        text (str): The text to convert to speech.
+        language (str): The language of the text. Default is 'EN'.
+        accent (str): The accent to use for the speech. Default is 'EN-US'.
+        speed (float): The speed of the speech. Default is 1.0.
+
+    Returns:
+        tuple: (format dict, async iterator of PCM byte chunks).
+    """
+    response = await _post_with_retry(get_async_client(), _payload(text, language, accent, speed), Config.MELOTTS_RETRIES)
+    if response.status_code != 200:
+        await response.aread()
+        await response.aclose()
         response.raise_for_status()
 
+    async def chunks():
+        try:
+            async for chunk in response.aiter_bytes(4096):
+                yield chunk
+        finally:
+            await response.aclose()
+
+    return _audio_format(response.headers), chunks()
+
+
+async def synthesize_sentences_melotts_async(sentences, language='EN', accent='EN-US', speed=1.0):
+    """
+    Request every sentence at once and yield the audio in sentence order.
+
+    The requests share the client's keep-alive pool, so at most
+    Config.MELOTTS_POOL_SIZE are in flight and no new connections are opened
+    after the first few.
+
+    Args:
+        sentences (list): The sentences to synthesize.
+        language (str): The language of the text. Default is 'EN'.
+        accent (str): The accent to use for the speech. Default is 'EN-US'.
+        speed (float): The speed of the speech. Default is 1.0.
+
+    Yields:
+        tuple: (format dict, PCM bytes) for each sentence, in order.
+    """
+    async def fetch(sentence):
+        audio_format, chunks = await stream_audio_melotts_async(sentence, language, accent, speed)
+        return audio_format, b"".join([chunk async for chunk in chunks])
+
+    tasks = [asyncio.ensure_future(fetch(sentence)) for sentence in sentences]
+    try:
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def generate_audio_file_melotts(text, language='EN', accent='EN-US', speed=1.0, filename=None, timeout=None):
+    """
+    Generate an audio file from the given text using the FastAPI endpoint.
+
+    The audio is streamed from the server and written to a local WAV file.
+
+    Args:
+        text (str): The text to convert to speech.
+        language (str): The language of the text. Default is 'EN'.
+        accent (str): The accent to use for the speech. Default is 'EN-US'.
+        speed (float): The speed of the speech. Default is 1.0.
+        filename (str, optional): The desired name for the output audio file. If None, a unique name will be generated.
+        timeout (float, optional): Seconds to wait for the server, if less than the configured timeouts.
+
+    Returns:
+        dict: A dictionary containing the message and the file path of the generated audio.
+    """
+    filename = filename or f"{uuid.uuid4()}.wav"
+    audio_format, chunks = stream_audio_melotts(text, language=language, accent=accent, speed=speed, timeout=timeout)
+
+    with wave.open(filename, 'wb') as wav_file:
+        wav_file.setnchannels(audio_format["channels"])
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(audio_format["sample_rate"])
+        for chunk in chunks:
+            wav_file.writeframes(chunk)
+
+    return {"message": "Audio file generated successfully", "file_path": filename}
+
 # Example usage of the function
 if __name__ == "__main__":
     try:
@@ -59,4 +260,4 @@ if __name__ == "__main__":
     except requests.HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
     except Exception as err:
-        print(f"Other error occurred: {err}")
\ No newline at end of file
+        print(f"Other error occurred: {err}")
@@ -0,0 +1,259 @@
+# voice_assistant/metrics.py
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from voice_assistant.config import Config
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """
+    Log-linear latency histogram in the style of HdrHistogram.
+
+    Values are kept in microseconds. Each power of two is split into
+    2**significant_bits buckets, so any reported quantile is within about
+    1 / 2**significant_bits of the true value (1.6% by default) whatever
+    the range, and memory only grows with the number of distinct buckets hit.
+
+    Args:
+    significant_bits (int): Linear sub-buckets per power of two, as a bit count.
+    """
+
+    def __init__(self, significant_bits=6):
+        self._width = significant_bits + 1
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Add one observation, in seconds."""
+        micros = max(0, int(seconds * 1_000_000))
+        shift = max(0, micros.bit_length() - self._width)
+        # (shift, mantissa) pairs sort in the same order as the values they hold
+        bucket = (shift, micros >> shift)
+        with self._lock:
+            self._counts[bucket] += 1
+            self.count += 1
+            self.sum += seconds
+            self.min = min(self.min, seconds)
+            self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """
+        Estimate a quantile.
+
+        Args:
+        q (float): The quantile, between 0 and 1.
+
+        Returns:
+        float: The value in seconds, or 0.0 if nothing was recorded.
+        """
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, q * self.count)
+            seen = 0
+            for (shift, mantissa), count in sorted(self._counts.items()):
+                seen += count
+                if seen >= rank:
+                    middle = (mantissa << shift) + ((1 << shift) - 1) / 2
+                    return min(self.max, max(self.min, middle / 1_000_000))
+            return self.max
+
+    def summary(self):
+        """
+        Returns:
+        dict: count, sum, min, max and p50/p95/p99, in seconds.
+        """
+        result = {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "min": round(self.min, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+        }
+        for q in QUANTILES:
+            result[f"p{round(q * 100)}"] = round(self.quantile(q), 6)
+        return result
+
+
+class _Span:
+    __slots__ = ("_metrics", "_name", "_labels", "_start")
+
+    def __init__(self, metrics, name, labels):
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._metrics.observe(self._name, time.perf_counter() - self._start, **self._labels)
+        return False
+
+
+_NULL_SPAN = nullcontext()
+
+
+class Metrics:
+    """
+    Named latency histograms, one per combination of labels.
+
+    Stage names are used as metric names ('stt', 'llm', 'tts', ...), and
+    labels such as the provider tell apart the series within a stage. When
+    disabled, span() returns a shared no-op context manager and observe()
+    returns right away.
+
+    Args:
+    enabled (bool): Whether to record anything.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, name, seconds, **labels):
+        """
+        Record a duration.
+
+        Args:
+        name (str): The stage name.
+        seconds (float): The duration.
+        **labels: Extra labels for the series, e.g. provider='groq'.
+        """
+        if self.enabled:
+            self._histogram(name, labels).record(seconds)
+
+    def span(self, name, **labels):
+        """
+        Time a block of code: `with metrics.span('stt', provider='groq'): ...`
+
+        Durations are recorded even if the block raises.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, labels)
+
+    def snapshot(self):
+        """
+        Returns:
+        dict: Stage name -> list of {'labels', and the histogram summary}.
+        """
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        result = defaultdict(list)
+        for (name, labels), histogram in histograms:
+            result[name].append({"labels": dict(labels), **histogram.summary()})
+        return dict(result)
+
+    def to_json(self):
+        """The snapshot as a JSON string."""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """
+        Render every histogram in the Prometheus text exposition format, as summaries.
+
+        Returns:
+        str: The exposition text.
+        """
+        lines = []
+        for name, series in self.snapshot().items():
+            metric = f"voice_assistant_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for entry in series:
+                labels = entry["labels"]
+                for q in QUANTILES:
+                    lines.append(f"{metric}{_labels(labels, quantile=q)} {entry[f'p{round(q * 100)}']}")
+                lines.append(f"{metric}_sum{_labels(labels)} {entry['sum']}")
+                lines.append(f"{metric}_count{_labels(labels)} {entry['count']}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop every recorded value."""
+        with self._lock:
+            self._histograms.clear()
+
+
+def _labels(labels, **extra):
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+metrics = Metrics(enabled=Config.METRICS_ENABLED)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = metrics.to_prometheus(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = metrics.to_json(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=None, host="127.0.0.1"):
+    """
+    Serve /metrics (Prometheus text) and /metrics.json from a background thread.
+
+    Args:
+    port (int, optional): The port. Defaults to Config.METRICS_PORT.
+    host (str): The interface to bind; local only by default.
+
+    Returns:
+    ThreadingHTTPServer: The running server, or None if no port is configured.
+    """
+    port = port or Config.METRICS_PORT
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(f"Metrics available at http://{host}:{port}/metrics")
+    return server
+
+
+def dump_metrics(path=None):
+    """
+    Write the JSON snapshot to a file.
+
+    Args:
+    path (str, optional): The file. Defaults to Config.METRICS_DUMP_PATH; nothing is written if neither is set.
+    """
+    path = path or Config.METRICS_DUMP_PATH
+    if path:
+        with open(path, "w") as f:
+            f.write(metrics.to_json())
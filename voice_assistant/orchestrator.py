@@ -0,0 +1,418 @@
+# voice_assistant/orchestrator.py
+
+import collections
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+import pyaudio
+from colorama import Fore
+
+from voice_assistant.audio import pcm_stream
+from voice_assistant.config import Config
+from voice_assistant.metrics import metrics
+from voice_assistant.resilience import Deadline
+from voice_assistant.response_generation import stream_response
+from voice_assistant.text_to_speech import text_to_speech_stream
+from voice_assistant.transcription import transcribe_audio
+from voice_assistant.utils import SentenceStream
+from voice_assistant.wake_word import create_wake_word_detector
+
+
+def rms(frame):
+    """Root mean square level of 16-bit PCM."""
+    samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+
+
+class EchoGate:
+    """
+    Tell the assistant's own voice coming back through the microphone from the user talking over it.
+
+    The player reports every block it sends to the speaker. While something
+    was played in the last `window_ms`, a microphone frame only counts as
+    speech if it is `margin` times louder than the echo that playback would
+    cause. The echo level is the loudest recent block times the speaker-to-mic
+    coupling. The coupling is learned from frames that are quiet enough to
+    be echo alone.
+
+    Args:
+    margin (float): How much louder than the expected echo the user must be.
+    window_ms (int): How long played audio can still be heard, including device latency.
+    """
+
+    def __init__(self, margin=2.0, window_ms=300):
+        self.margin = margin
+        self.window = window_ms / 1000
+        self.coupling = 1.0  # conservative until learned: echo as loud as the signal played
+        self._played = collections.deque()
+        self._lock = threading.Lock()
+
+    def played(self, pcm):
+        """Record a block of 16-bit PCM sent to the speaker."""
+        with self._lock:
+            self._played.append((time.monotonic(), rms(pcm)))
+
+    def active(self, now=None):
+        """Whether playback may be audible right now."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            while self._played and self._played[0][0] < now - self.window:
+                self._played.popleft()
+            return bool(self._played)
+
+    def is_echo(self, level, now=None):
+        """
+        Args:
+        level (float): RMS of a microphone frame.
+
+        Returns:
+        bool: True if the frame can be explained by playback alone.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            while self._played and self._played[0][0] < now - self.window:
+                self._played.popleft()
+            reference = max((played for _, played in self._played), default=0.0)
+        if reference <= 0:
+            return False
+        expected = self.coupling * reference
+        if level <= expected * self.margin:
+            if level > 0:
+                # Track the echo path slowly, so a burst of speech can't teach it much
+                self.coupling = 0.95 * self.coupling + 0.05 * (level / reference)
+            return True
+        return False
+
+
+class VoiceActivityDetector:
+    """
+    Energy-based voice activity detection that cuts a microphone stream into utterances.
+
+    A frame is speech when it is louder than both `min_rms` and `snr` times
+    the noise floor, which follows the level of non-speech frames. An
+    utterance starts after `start_ms` of speech and keeps `preroll_ms` of the
+    audio before it, so the first syllable isn't lost. It ends after `end_ms`
+    of silence or at `max_seconds`.
+
+    Args:
+    sample_rate (int): The microphone sample rate.
+    frame_ms (int): The length of the frames passed to process().
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, min_rms=300, snr=3.0,
+                 start_ms=100, end_ms=700, preroll_ms=300, max_seconds=30):
+        self.min_rms = min_rms
+        self.snr = snr
+        self.noise_floor = min_rms / snr
+        self._start_frames = max(1, start_ms // frame_ms)
+        self._end_frames = max(1, end_ms // frame_ms)
+        self._max_frames = int(max_seconds * 1000 // frame_ms)
+        self._preroll = collections.deque(maxlen=max(1, preroll_ms // frame_ms))
+        self._frames = []
+        self._speech_run = 0
+        self._silence_run = 0
+        self.in_utterance = False
+
+    def is_speech(self, level):
+        return level > max(self.min_rms, self.snr * self.noise_floor)
+
+    def process(self, frame, speech, update_floor=True):
+        """
+        Feed one frame.
+
+        Args:
+        frame (bytes): 16-bit PCM.
+        speech (bool): Whether the frame is speech, from is_speech() and any gating.
+        update_floor (bool): Whether the frame may update the noise floor.
+
+        Returns:
+        tuple: (event, audio), where event is 'start', 'end' or None and audio
+        is the whole utterance for 'end'.
+        """
+        if not speech and update_floor:
+            self.noise_floor = 0.98 * self.noise_floor + 0.02 * rms(frame)
+
+        if not self.in_utterance:
+            self._preroll.append(frame)
+            self._speech_run = self._speech_run + 1 if speech else 0
+            if self._speech_run >= self._start_frames:
+                self.in_utterance = True
+                self._frames = list(self._preroll)
+                self._preroll.clear()
+                self._silence_run = 0
+                return "start", None
+            return None, None
+
+        self._frames.append(frame)
+        self._silence_run = 0 if speech else self._silence_run + 1
+        if self._silence_run >= self._end_frames or len(self._frames) >= self._max_frames:
+            audio = b"".join(self._frames)
+            self._frames = []
+            self._speech_run = 0
+            self.in_utterance = False
+            return "end", audio
+        return None, None
+
+
+class Capture:
+    """
+    Keep the microphone open on its own thread and hand out utterances as the user finishes them.
+
+    Args:
+    gate (EchoGate): Filters out the assistant's own playback.
+    on_speech_start (callable): Called from the capture thread when the user starts talking.
+    wake_word (optional): A wake word detector. With one, each utterance has to be preceded by the wake word.
+    """
+
+    def __init__(self, gate, on_speech_start=None, wake_word=None):
+        self.sample_rate = Config.CAPTURE_SAMPLE_RATE
+        self.frame_samples = self.sample_rate * Config.VAD_FRAME_MS // 1000
+        self.gate = gate
+        self.on_speech_start = on_speech_start
+        self.wake_word = wake_word
+        self._awake = wake_word is None
+        self.vad = VoiceActivityDetector(
+            self.sample_rate, Config.VAD_FRAME_MS, Config.VAD_MIN_RMS, Config.VAD_SNR,
+            Config.VAD_START_MS, Config.VAD_END_MS, Config.VAD_PREROLL_MS, Config.VAD_MAX_UTTERANCE_SECONDS,
+        )
+        self.utterances = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _run(self):
+        p = pyaudio.PyAudio()
+        stream = p.open(format=pyaudio.paInt16, channels=1, rate=self.sample_rate,
+                        frames_per_buffer=self.frame_samples, input=True)
+        logging.info("Listening")
+        try:
+            while not self._stop.is_set():
+                frame = stream.read(self.frame_samples, exception_on_overflow=False)
+                self.feed(frame)
+        finally:
+            stream.stop_stream()
+            stream.close()
+            p.terminate()
+
+    def feed(self, frame):
+        """Process one microphone frame."""
+        if not self._awake:
+            self._awake = self.wake_word.process(frame)
+            if self._awake:
+                logging.info("Wake word detected")
+            return
+        level = rms(frame)
+        playing = self.gate.active()
+        speech = self.vad.is_speech(level) and not (playing and self.gate.is_echo(level))
+        # Echo is not background noise; keep it out of the noise floor
+        event, audio = self.vad.process(frame, speech, update_floor=not playing)
+        if event == "start":
+            if self.on_speech_start:
+                self.on_speech_start()
+        elif event == "end":
+            self.utterances.put((time.perf_counter(), audio))
+            if self.wake_word is not None:
+                self._awake = False
+                self.wake_word.reset()
+
+
+class Player:
+    """
+    Play 16-bit PCM blocks on one output stream, reporting each to the echo gate.
+
+    Args:
+    gate (EchoGate): Told about everything played.
+    """
+
+    def __init__(self, gate):
+        self.gate = gate
+        self._pyaudio = pyaudio.PyAudio()
+        self._stream = None
+        self._format = None
+
+    def play(self, pcm, sample_rate, channels=1, cancelled=None):
+        """
+        Play a block, a period at a time so cancelling takes effect within about 20 ms.
+
+        Returns:
+        bool: False if playback was cancelled.
+        """
+        if self._format != (sample_rate, channels):
+            self.close()
+            self._stream = self._pyaudio.open(format=pyaudio.paInt16, channels=channels,
+                                              rate=sample_rate, output=True)
+            self._format = (sample_rate, channels)
+        period = sample_rate * channels * 2 // 50
+        for i in range(0, len(pcm), period):
+            if cancelled is not None and cancelled.is_set():
+                return False
+            block = pcm[i:i + period]
+            self.gate.played(block)
+            self._stream.write(block)
+        return True
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+            self._format = None
+
+
+class Orchestrator:
+    """
+    Run the conversation with the microphone always open and let the user interrupt the assistant.
+
+    Capture and voice activity detection run on their own thread. Each
+    finished utterance is transcribed right away. The reply is generated,
+    synthesized and played sentence by sentence on a turn thread. If the user
+    starts talking while a turn is in progress (barge-in), playback stops and
+    the turn's LLM and TTS streams are abandoned. The new utterance becomes
+    the next turn.
+
+    Args:
+    chat_history (list): The conversation so far, starting with the system prompt.
+    settings (Settings): The models, voices and keys to use.
+    """
+
+    def __init__(self, chat_history, settings):
+        self.chat_history = chat_history
+        self.settings = settings
+        self.gate = EchoGate(Config.ECHO_GATE_MARGIN, Config.ECHO_GATE_WINDOW_MS)
+        wake_word = create_wake_word_detector() if Config.WAKE_WORD_ENGINE else None
+        self.capture = Capture(self.gate, on_speech_start=self.barge_in, wake_word=wake_word)
+        self.player = Player(self.gate)
+        self._turn = None
+        self._cancelled = threading.Event()
+        self._directory = tempfile.mkdtemp(prefix="orchestrator-")
+
+    def barge_in(self):
+        """Stop the turn in progress, if any, because the user started talking."""
+        if self._turn is not None and self._turn.is_alive() and not self._cancelled.is_set():
+            logging.info(Fore.YELLOW + "Barge-in: stopping the reply" + Fore.RESET)
+            self._cancelled.set()
+
+    def run(self):
+        """Converse until the user says goodbye."""
+        self.capture.start()
+        try:
+            while True:
+                ended_at, audio = self.capture.utterances.get()
+                deadline = Deadline.for_turn()
+                user_input = self._transcribe(audio, deadline)
+                metrics.observe("stt_after_speech", time.perf_counter() - ended_at)
+                if not user_input:
+                    continue
+                logging.info(Fore.GREEN + "You said: " + user_input + Fore.RESET)
+                if "goodbye" in user_input.lower() or "arrivederci" in user_input.lower():
+                    break
+                # A turn still running was interrupted; wait for it to wind down
+                self._cancelled.set()
+                if self._turn is not None:
+                    self._turn.join()
+                self._cancelled = threading.Event()
+                self._turn = threading.Thread(target=self._respond,
+                                              args=(user_input, deadline, self._cancelled, ended_at),
+                                              name="turn", daemon=True)
+                self._turn.start()
+        finally:
+            self._cancelled.set()
+            self.capture.stop()
+            if self._turn is not None:
+                self._turn.join(timeout=5)
+            self.player.close()
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+    def _transcribe(self, audio, deadline):
+        path = os.path.join(self._directory, "utterance.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.capture.sample_rate)
+            f.writeframes(audio)
+        try:
+            return transcribe_audio(self.settings.transcription_model, self.settings.transcription_api_key,
+                                    path, settings=self.settings, deadline=deadline)
+        except Exception as e:
+            logging.error(Fore.RED + f"An error occurred: {e}" + Fore.RESET)
+            return None
+
+    def _respond(self, user_input, deadline, cancelled, ended_at):
+        settings = self.settings
+        self.chat_history.append({"role": "user", "content": user_input})
+        sentences = queue.Queue()
+        spoken = []  # sentences that reached the speaker, even if cut off
+
+        def generate():
+            splitter = SentenceStream()
+            try:
+                for delta in stream_response(settings.response_model, settings.response_api_key,
+                                             list(self.chat_history), settings, deadline=deadline):
+                    if cancelled.is_set():
+                        return
+                    for sentence in splitter.feed(delta):
+                        sentences.put(sentence)
+                for sentence in splitter.flush():
+                    sentences.put(sentence)
+            except Exception as e:
+                logging.error(Fore.RED + f"An error occurred: {e}" + Fore.RESET)
+            finally:
+                sentences.put(None)
+
+        generator = threading.Thread(target=generate, name="llm", daemon=True)
+        generator.start()
+        first_audio = True
+        try:
+            while not cancelled.is_set():
+                sentence = sentences.get()
+                if sentence is None:
+                    break
+                audio_format, chunks = text_to_speech_stream(settings.tts_model, settings.tts_api_key,
+                                                             sentence, settings=settings, deadline=deadline)
+                pcm = pcm_stream(chunks, **audio_format)
+                playing_since = None
+                try:
+                    for block in pcm:
+                        if playing_since is None:
+                            playing_since = time.perf_counter()
+                            spoken.append(sentence)
+                        if first_audio:
+                            metrics.observe("playback_first_audio", time.perf_counter() - ended_at, mode="continuous")
+                            first_audio = False
+                        if not self.player.play(block, audio_format["sample_rate"], audio_format["channels"], cancelled):
+                            break
+                finally:
+                    # Abandons the TTS request and any decoder when interrupted
+                    for stream in (pcm, chunks):
+                        if hasattr(stream, "close"):
+                            stream.close()
+                    # The next sentence's wait starts now, not when this one started playing
+                    if playing_since is not None:
+                        deadline.extend(time.perf_counter() - playing_since)
+        except Exception as e:
+            logging.error(Fore.RED + f"An error occurred: {e}" + Fore.RESET)
+        finally:
+            generator.join()
+            # Keep what the user heard, even if interrupted, so the next turn
+            # has context; text generated but never played was never said
+            response = " ".join(spoken)
+            if response:
+                self.chat_history.append({"role": "assistant", "content": response})
+                logging.info(Fore.CYAN + "Response: " + response + Fore.RESET)
+            else:
+                self.chat_history.pop()
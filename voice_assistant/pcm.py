@@ -0,0 +1,137 @@
+# voice_assistant/pcm.py
+
+import wave
+
+import numpy as np
+
+
+class Float32ToInt16Converter:
+    """
+    Convert streamed float32 PCM to int16 without per-chunk allocations.
+
+    Samples are scaled and clipped in a preallocated float32 scratch buffer
+    and cast into a preallocated int16 buffer, `chunk_samples` at a time, so
+    memory stays O(chunk) however long the utterance is. Network chunks do
+    not have to be aligned to whole samples; a split sample is carried over
+    to the next call.
+
+    Args:
+    chunk_samples (int): Samples converted per step.
+    """
+
+    def __init__(self, chunk_samples=4096):
+        self.chunk_samples = chunk_samples
+        self._scratch = np.empty(chunk_samples, dtype=np.float32)
+        self._out = np.empty(chunk_samples, dtype=np.int16)
+        self._carry = bytearray()
+
+    def convert(self, data):
+        """
+        Convert one chunk of little-endian float32 bytes.
+
+        Args:
+        data (bytes-like): The next piece of the float32 stream.
+
+        Yields:
+        memoryview: int16 little-endian bytes. Each view is only valid until
+        the next one is produced, so write or copy it right away.
+        """
+        data = memoryview(data).cast("B")
+        offset = 0
+        if self._carry:
+            offset = min(4 - len(self._carry), len(data))
+            self._carry += data[:offset]
+            if len(self._carry) < 4:
+                return
+            yield from self.convert_samples(np.frombuffer(bytes(self._carry), dtype="<f4"))
+            self._carry.clear()
+
+        count = (len(data) - offset) // 4
+        if count:
+            yield from self.convert_samples(np.frombuffer(data, dtype="<f4", count=count, offset=offset))
+        self._carry += data[offset + count * 4:]
+
+    def convert_samples(self, samples):
+        """
+        Convert a float32 sample array, e.g. the output of a local TTS model.
+
+        Args:
+        samples (np.ndarray): float32 samples in [-1, 1].
+
+        Yields:
+        memoryview: int16 little-endian bytes, valid until the next one is produced.
+        """
+        for start in range(0, len(samples), self.chunk_samples):
+            block = samples[start:start + self.chunk_samples]
+            size = len(block)
+            scratch = self._scratch[:size]
+            out = self._out[:size]
+            np.multiply(block, 32767, out=scratch)
+            np.clip(scratch, -32768, 32767, out=scratch)
+            np.copyto(out, scratch, casting="unsafe")
+            yield memoryview(out).cast("B")
+
+
+def float32_to_int16_stream(chunks, chunk_samples=4096):
+    """
+    Convert an iterable of float32 PCM chunks to int16 PCM bytes.
+
+    Args:
+    chunks (iterable): Little-endian float32 byte chunks.
+    chunk_samples (int): Samples converted per step.
+
+    Yields:
+    memoryview: int16 bytes, valid until the next item is requested.
+    """
+    converter = Float32ToInt16Converter(chunk_samples)
+    for chunk in chunks:
+        yield from converter.convert(chunk)
+
+
+def write_float32_wav(chunks, sink, sample_rate, channels=1, chunk_samples=4096):
+    """
+    Write a float32 PCM stream to a 16-bit WAV file as it arrives.
+
+    Args:
+    chunks (iterable): Little-endian float32 byte chunks.
+    sink (str or file): A path or a writable binary file object (e.g. io.BytesIO).
+    sample_rate (int): The sample rate of the stream.
+    channels (int): The number of interleaved channels.
+    chunk_samples (int): Samples converted per step.
+
+    Returns:
+    int: The number of frames written.
+    """
+    with wave.open(sink, 'wb') as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        for pcm in float32_to_int16_stream(chunks, chunk_samples):
+            wav_file.writeframes(pcm)
+        return wav_file.getnframes()
+
+
+def read_wav_int16(path, sample_rate=None):
+    """
+    Read a 16-bit WAV file as mono int16 samples.
+
+    Args:
+    path (str): The WAV file.
+    sample_rate (int, optional): Resample to this rate (linear interpolation, fine for analysis, not for playback).
+
+    Returns:
+    tuple: (np.ndarray of int16 samples, sample rate).
+    """
+    with wave.open(path, 'rb') as wav_file:
+        if wav_file.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit WAV files are supported")
+        channels = wav_file.getnchannels()
+        rate = wav_file.getframerate()
+        samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype="<i2")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    if sample_rate and sample_rate != rate:
+        positions = np.arange(0, len(samples), rate / sample_rate)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+        rate = sample_rate
+    return samples, rate
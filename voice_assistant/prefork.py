@@ -0,0 +1,98 @@
+# voice_assistant/prefork.py
+
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+
+
+def default_threads_per_worker(workers):
+    """
+    Split the available cores evenly between workers.
+
+    Args:
+    workers (int): The number of worker processes.
+
+    Returns:
+    int: Intra-op threads each worker should use, at least 1.
+    """
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    return max(1, cores // workers)
+
+
+def serve_prefork(app, host, port, workers, on_worker_start=None):
+    """
+    Serve an ASGI app from several forked uvicorn workers sharing one socket.
+
+    Whatever the parent loaded before calling this (e.g. model weights) is
+    shared with the workers copy-on-write, so N workers cost far less than N
+    separate model loads. The workers all accept on the same listening
+    socket and the kernel hands each connection to whichever worker is idle.
+    Workers that die are restarted; SIGINT/SIGTERM stop them all.
+
+    Only available where os.fork exists (Linux, macOS).
+
+    Args:
+    app: The ASGI application.
+    host (str): The interface to bind.
+    port (int): The port to bind.
+    workers (int): The number of worker processes.
+    on_worker_start (callable, optional): Called in each worker right after the fork,
+        e.g. to set per-worker thread counts.
+    """
+    import uvicorn
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # Objects allocated so far live for the whole process. Moving them out of
+    # the collector's reach stops gc passes in the workers from writing to
+    # (and so un-sharing) the pages they sit on.
+    gc.collect()
+    gc.freeze()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            if on_worker_start:
+                on_worker_start()
+            server = uvicorn.Server(uvicorn.Config(app, log_level="info"))
+            server.run(sockets=[sock])
+            os._exit(0)
+        return pid
+
+    children = {spawn() for _ in range(workers)}
+    logging.info(f"MeloTTS serving on {host}:{port} with {workers} workers: {sorted(children)}")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            logging.warning(f"Worker {pid} exited with status {status}, restarting it")
+            time.sleep(1)
+            children.add(spawn())
+    sock.close()
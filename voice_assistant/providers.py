@@ -0,0 +1,76 @@
+# voice_assistant/providers.py
+
+import importlib
+import threading
+
+
+class ProviderRegistry:
+    """
+    Table of backend functions by provider name, loaded on first use.
+
+    A backend is either a function or a "package.module:function" string. A
+    string entry costs nothing to register: its module, and the SDK that
+    module imports, is only loaded the first time the provider is looked up.
+    The built-in backends import their SDKs inside the function for the same
+    reason, so only the providers actually configured are ever imported.
+
+    Args:
+    kind (str): What the registry holds, for error messages (e.g. 'TTS model').
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self._targets = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, target=None):
+        """
+        Register a backend under a provider name, replacing any previous one.
+
+        Args:
+        name (str): The provider name used in Config (e.g. 'groq').
+        target (callable or str, optional): The backend, or "module:function" to import lazily.
+            Leave it out to use register as a decorator.
+
+        Returns:
+        The target, or a decorator when no target is given.
+        """
+        if target is None:
+            def decorator(function):
+                self.register(name, function)
+                return function
+            return decorator
+        with self._lock:
+            self._targets[name] = target
+        return target
+
+    def get(self, name):
+        """
+        Return the backend for a provider, importing it if it was registered by name.
+
+        Args:
+        name (str): The provider name.
+
+        Returns:
+        callable: The backend function.
+
+        Raises:
+        ValueError: If no backend is registered under that name.
+        """
+        target = self._targets.get(name)
+        if target is None:
+            raise ValueError(f"Unsupported {self.kind}: {name}")
+        if isinstance(target, str):
+            module_name, _, attribute = target.partition(":")
+            function = getattr(importlib.import_module(module_name), attribute)
+            with self._lock:
+                self._targets[name] = function
+            return function
+        return target
+
+    def names(self):
+        """The registered provider names."""
+        return list(self._targets)
+
+    def __contains__(self, name):
+        return name in self._targets
@@ -0,0 +1,185 @@
+# voice_assistant/resilience.py
+
+import logging
+import random
+import threading
+import time
+
+from voice_assistant.config import Config
+from voice_assistant.metrics import metrics
+
+MIN_ATTEMPT_SECONDS = 0.5  # no attempt is started with less of the budget left
+
+# When the attempt running on this thread has to be done by, for attempt_timeout()
+_attempt = threading.local()
+
+
+class StageError(Exception):
+    """
+    A pipeline stage failed with every provider it had time to try.
+
+    Args:
+    stage (str): 'transcription', 'response' or 'tts'.
+    errors (list): (provider, exception) for each failed attempt, in order.
+    """
+
+    def __init__(self, stage, errors):
+        self.stage = stage
+        self.errors = errors
+        detail = "; ".join(f"{provider}: {error}" for provider, error in errors) or "no time left in the turn"
+        super().__init__(f"{stage} failed ({detail})")
+
+
+class Deadline:
+    """
+    The time left for one turn, shared by all of its stages.
+
+    Args:
+    seconds (float, optional): The budget. None never runs out.
+    """
+
+    def __init__(self, seconds=None):
+        self.expires = None if seconds is None else time.monotonic() + seconds
+
+    @classmethod
+    def for_turn(cls):
+        """A deadline of Config.TURN_BUDGET_SECONDS from now."""
+        return cls(Config.TURN_BUDGET_SECONDS)
+
+    def remaining(self):
+        """Seconds left, never negative."""
+        if self.expires is None:
+            return float("inf")
+        return max(0.0, self.expires - time.monotonic())
+
+    def extend(self, seconds):
+        """
+        Push the deadline back, for time the budget doesn't cover.
+
+        A reply spoken sentence by sentence opens each sentence's stream after
+        the one before has played; the playing isn't waiting on a provider.
+        """
+        if self.expires is not None:
+            self.expires += seconds
+
+    def timeout(self, stage):
+        """The longest one attempt of a stage may take: its own limit, cut short by the budget left."""
+        return min(Config.STAGE_TIMEOUTS.get(stage, float("inf")), self.remaining())
+
+
+def provider_chain(stage, model):
+    """The selected provider followed by the stage's fallbacks from Config.FALLBACK_CHAINS, without repeats."""
+    chain = [model]
+    for provider in Config.FALLBACK_CHAINS.get(stage, []):
+        if provider not in chain:
+            chain.append(provider)
+    return chain
+
+
+def attempt_timeout():
+    """
+    Seconds left for the provider attempt running on this thread.
+
+    Backends pass this to their HTTP client as the request timeout, so a
+    provider that hangs is given up by the client itself and its thread ends
+    about when call_with_fallback stops waiting for it.
+
+    Returns:
+    float: The time left, or None outside call_with_fallback.
+    """
+    expires = getattr(_attempt, "expires", None)
+    if expires is None:
+        return None
+    return max(0.01, expires - time.monotonic())
+
+
+def _is_timeout(error):
+    # The SDKs raise their own timeout types (openai.APITimeoutError,
+    # requests' and httpx's ReadTimeout, ...); match them by name rather than
+    # importing every SDK here.
+    return isinstance(error, TimeoutError) or any("Timeout" in cls.__name__ for cls in type(error).__mro__)
+
+
+def _run_attempt(call, provider, timeout):
+    # Each attempt gets its own thread rather than a slot in a shared pool, so
+    # it starts right away and one provider hanging can't hold up other turns.
+    # The thread is abandoned after `timeout`; the request's own timeout
+    # (attempt_timeout()) ends it soon after.
+    outcome = {}
+    limit = None if timeout == float("inf") else timeout
+
+    def run():
+        _attempt.expires = None if limit is None else time.monotonic() + limit
+        try:
+            outcome["result"] = call(provider)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, name=f"provider-call-{provider}", daemon=True)
+    thread.start()
+    thread.join(limit)
+    if thread.is_alive():
+        raise TimeoutError(f"no answer within {timeout:.1f}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def call_with_fallback(stage, model, call, deadline=None):
+    """
+    Run one stage of a turn, retrying and falling back to other providers within the turn's deadline.
+
+    Each provider in the chain gets up to Config.RETRY_ATTEMPTS attempts, each
+    limited to the stage's timeout or whatever is left of the deadline. A
+    retry waits a jittered, doubling backoff first, and is skipped, moving on
+    to the next provider, when the wait would leave too little time for it.
+    A provider that timed out is not retried, since another attempt would
+    likely hang too, and neither are ValueErrors (an unknown provider, a
+    missing key). Backends bound their requests with attempt_timeout().
+
+    Every success is counted in the 'stage_served' histogram, labelled with
+    the provider and whether it was the selected one, a fallback or a retry;
+    every failed attempt in 'stage_failed'.
+
+    Args:
+    stage (str): 'transcription', 'response' or 'tts'.
+    model (str): The selected provider, tried first.
+    call (callable): call(provider) makes one attempt, on a thread of its own, and returns its result.
+    deadline (Deadline, optional): The turn's deadline. Defaults to a fresh Config.TURN_BUDGET_SECONDS.
+
+    Returns:
+    The result of the first successful attempt.
+
+    Raises:
+    StageError: If no provider succeeded in time.
+    """
+    deadline = deadline or Deadline.for_turn()
+    start = time.perf_counter()
+    errors = []
+    for position, provider in enumerate(provider_chain(stage, model)):
+        for attempt in range(Config.RETRY_ATTEMPTS):
+            timeout = deadline.timeout(stage)
+            if timeout < MIN_ATTEMPT_SECONDS:
+                raise StageError(stage, errors)
+            attempt_start = time.perf_counter()
+            try:
+                result = _run_attempt(call, provider, timeout)
+            except Exception as e:
+                error, reason = e, "timeout" if _is_timeout(e) else "error"
+            else:
+                path = "primary" if position == 0 else "fallback"
+                metrics.observe("stage_served", time.perf_counter() - start, stage=stage, provider=provider,
+                                path=path if attempt == 0 else f"{path}_retry")
+                return result
+
+            errors.append((provider, error))
+            metrics.observe("stage_failed", time.perf_counter() - attempt_start, stage=stage, provider=provider,
+                            reason=reason)
+            logging.warning(f"{stage} with {provider} failed (attempt {attempt + 1}): {error}")
+            if reason == "timeout" or isinstance(error, ValueError) or attempt + 1 == Config.RETRY_ATTEMPTS:
+                break
+            backoff = random.uniform(0, Config.RETRY_BACKOFF * 2 ** attempt)
+            if deadline.remaining() - backoff < MIN_ATTEMPT_SECONDS:
+                break
+            time.sleep(backoff)
+    raise StageError(stage, errors)
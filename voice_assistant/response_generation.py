@@ -2,64 +2,160 @@
 # voice_assistant/response_generation.py
 
 import logging
+import time
 
-from openai import OpenAI
-from groq import Groq
-import ollama
+from voice_assistant.clients import get_client
+from voice_assistant.metrics import metrics
+from voice_assistant.providers import ProviderRegistry
+from voice_assistant.resilience import Deadline, attempt_timeout, call_with_fallback
+from voice_assistant.settings import Settings
 
-from voice_assistant.config import Config
+# Response backends by Settings.response_model value. Each takes
+# (api_key, chat_history, settings) and returns the reply text. Streaming backends
+# take the same arguments and yield the text in pieces as it is generated.
+RESPONDERS = ProviderRegistry("response generation model")
+STREAMING_RESPONDERS = ProviderRegistry("streaming response model")
 
 
-def generate_response(model:str, api_key:str, chat_history:list, local_model_path:str=None):
+def generate_response(model:str, api_key:str, chat_history:list, local_model_path:str=None, settings:Settings=None,
+                      deadline:Deadline=None):
     """
     Generate a response using the specified model.
-    
+
+    Falls back to the providers in Config.FALLBACK_CHAINS['response'] if the
+    model fails or times out (see voice_assistant/resilience.py).
+
     Args:
-    model (str): The model to use for response generation ('openai', 'groq', 'local').
+    model (str): The model to use for response generation ('openai', 'groq', 'ollama', 'agent', 'local').
     api_key (str): The API key for the response generation service.
     chat_history (list): The chat history as a list of messages.
     local_model_path (str): The path to the local model (if applicable).
+    settings (Settings, optional): The session's settings. Defaults to the current Config.
+    deadline (Deadline, optional): The turn's deadline. Defaults to a whole turn's budget.
 
     Returns:
     str: The generated response text.
+
+    Raises:
+    StageError: If no provider answered in time.
     """
-    try:
-        if model == 'openai':
-            return _generate_openai_response(api_key, chat_history)
-        elif model == 'groq':
-            return _generate_groq_response(api_key, chat_history)
-        elif model == 'ollama':
-            return _generate_ollama_response(chat_history)
-        elif model == 'local':
-            # Placeholder for local LLM response generation
-            return "Generated response from local model"
+    settings = settings or Settings.from_config()
+    if local_model_path:
+        settings = settings.replace(local_model_path=local_model_path)
+
+    def attempt(provider):
+        respond = RESPONDERS.get(provider)
+        key = api_key if provider == model else settings.model_api_key("response", provider)
+        with metrics.span("llm", provider=provider):
+            return respond(key, chat_history, settings)
+
+    return call_with_fallback("response", model, attempt, deadline)
+
+def stream_response(model, api_key, chat_history, settings=None, deadline=None):
+    """
+    Generate a response and yield it in pieces as they arrive.
+
+    Backends without streaming support yield the whole response at once.
+    Retries and fallback providers only apply until the first piece arrives;
+    after that the reply is committed to the provider that sent it, and
+    errors are raised.
+
+    Args:
+    model (str): The model to use for response generation.
+    api_key (str): The API key for the response generation service.
+    chat_history (list): The chat history as a list of messages.
+    settings (Settings, optional): The session's settings. Defaults to the current Config.
+    deadline (Deadline, optional): The turn's deadline. Defaults to a whole turn's budget.
+
+    Yields:
+    str: Consecutive pieces of the response text.
+
+    Raises:
+    StageError: If no provider started answering in time.
+    """
+    settings = settings or Settings.from_config()
+
+    def first_piece(provider):
+        key = api_key if provider == model else settings.model_api_key("response", provider)
+        if provider in STREAMING_RESPONDERS:
+            pieces = iter(STREAMING_RESPONDERS.get(provider)(key, chat_history, settings))
         else:
-            raise ValueError("Unsupported response generation model")
-    except Exception as e:
-        logging.error(f"Failed to generate response: {e}")
-        return "Error in generating response"
-
-def _generate_openai_response(api_key, chat_history):
-    client = OpenAI(api_key=api_key)
-    response = client.chat.completions.create(
-        model=Config.OPENAI_LLM,
-        messages=chat_history
-    )
-    return response.choices[0].message.content
+            pieces = iter([RESPONDERS.get(provider)(key, chat_history, settings)])
+        return provider, next(pieces, ""), pieces
 
+    start = time.perf_counter()
+    provider, piece, pieces = call_with_fallback("response", model, first_piece, deadline)
+    try:
+        yield piece
+        yield from pieces
+    finally:
+        metrics.observe("llm", time.perf_counter() - start, provider=provider)
 
-def _generate_groq_response(api_key, chat_history):
-    client = Groq(api_key=api_key)
-    response = client.chat.completions.create(
-        model=Config.GROQ_LLM,
-        messages=chat_history
-    )
-    return response.choices[0].message.content
+def _completion_deltas(client, model, chat_history, provider):
+    # Streaming also shows when the first token arrives, which is what a
+    # sentence-by-sentence TTS pipeline waits on.
+    start = time.perf_counter()
+    first = True
+    for chunk in client.chat.completions.create(model=model, messages=chat_history, stream=True):
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            if first:
+                metrics.observe("llm_first_token", time.perf_counter() - start, provider=provider)
+                first = False
+            yield delta
+
+
+@STREAMING_RESPONDERS.register('openai')
+def _stream_openai_response(api_key, chat_history, settings):
+    client = get_client('openai', api_key, timeout=attempt_timeout())
+    return _completion_deltas(client, settings.openai_llm, chat_history, 'openai')
+
+
+@STREAMING_RESPONDERS.register('groq')
+def _stream_groq_response(api_key, chat_history, settings):
+    client = get_client('groq', api_key, timeout=attempt_timeout())
+    return _completion_deltas(client, settings.groq_llm, chat_history, 'groq')
+
+
+@RESPONDERS.register('openai')
+def _generate_openai_response(api_key, chat_history, settings):
+    return "".join(_stream_openai_response(api_key, chat_history, settings))
 
 
-def _generate_ollama_response(chat_history):
-    response = ollama.chat(
-        model=Config.OLLAMA_LLM,
+@RESPONDERS.register('groq')
+def _generate_groq_response(api_key, chat_history, settings):
+    return "".join(_stream_groq_response(api_key, chat_history, settings))
+
+
+@RESPONDERS.register('ollama')
+def _generate_ollama_response(api_key, chat_history, settings):
+    import ollama
+
+    response = ollama.Client(timeout=attempt_timeout()).chat(
+        model=settings.ollama_llm,
         messages=chat_history,
     )
     return response['message']['content']
+
+
+@RESPONDERS.register('agent')
+def _generate_agent_response(api_key, chat_history, settings):
+    from voice_assistant.intent import needs_tools
+    from voice_assistant.agent_action import run_conversation
+
+    client = get_client('groq', api_key, timeout=attempt_timeout())
+    # Tool schemas add latency and prompt tokens, so only send them when the
+    # latest user message looks like it needs calendar/email/task/... data.
+    user_messages = [message for message in chat_history if message.get("role") == "user"]
+    use_tools = bool(user_messages) and needs_tools(user_messages[-1]["content"])
+    # Tool calls and results stay in a scratch copy; the caller's history
+    # only records the final answer.
+    return run_conversation(list(chat_history), client, model=settings.agent_llm, use_tools=use_tools)
+
+
+@RESPONDERS.register('local')
+def _generate_local_response(api_key, chat_history, settings):
+    # Placeholder for local LLM response generation
+    return "Generated response from local model"
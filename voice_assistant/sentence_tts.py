@@ -0,0 +1,112 @@
+# voice_assistant/sentence_tts.py
+
+import functools
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from voice_assistant import audio
+from voice_assistant.config import Config
+from voice_assistant.text_to_speech import text_to_speech
+from voice_assistant.utils import split_sentences
+
+# File extension of each provider's output, so play_audio picks the right player.
+SENTENCE_SUFFIX = {
+    "openai": ".mp3",
+    "elevenlabs": ".mp3",
+    "cartesia": ".wav",
+    "melotts": ".wav",
+}
+
+
+def synthesize_sentences(model, api_key, text, synthesize=text_to_speech, concurrency=None, directory=None, settings=None,
+                         deadline=None):
+    """
+    Synthesize a response sentence by sentence, concurrently.
+
+    Every sentence is submitted up front to a pool sized to the provider's
+    concurrency limit, and the audio files are yielded strictly in order:
+    the first one as soon as it is ready, while the rest keep synthesizing.
+
+    Args:
+    model (str): The TTS model.
+    api_key (str): The API key for the TTS service.
+    text (str): The response text.
+    synthesize (callable): The TTS function, with text_to_speech's signature.
+    concurrency (int, optional): Maximum requests in flight. Defaults to Config.TTS_CONCURRENCY[model].
+    directory (str, optional): Where to write the sentence files. Defaults to a temporary directory.
+    settings (Settings, optional): The session's settings, passed on to `synthesize`.
+    deadline (Deadline, optional): The turn's deadline, passed on to `synthesize`.
+
+    Yields:
+    str: The path of each sentence's audio file, in sentence order.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return
+    if concurrency is None:
+        concurrency = Config.TTS_CONCURRENCY.get(model, 1)
+    suffix = SENTENCE_SUFFIX.get(model, ".wav")
+    if settings is not None:
+        synthesize = functools.partial(synthesize, settings=settings)
+    if deadline is not None:
+        synthesize = functools.partial(synthesize, deadline=deadline)
+
+    owns_directory = directory is None
+    if owns_directory:
+        directory = tempfile.mkdtemp(prefix="tts-")
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(sentences))))
+    futures = []
+    try:
+        for i, sentence in enumerate(sentences):
+            path = os.path.join(directory, f"sentence_{i:03d}{suffix}")
+            futures.append(executor.submit(synthesize, model, api_key, sentence, path))
+        for future in futures:
+            yield future.result()
+    finally:
+        # Reached early when playback is interrupted: drop queued sentences.
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+        if owns_directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def speak_sentences(model, api_key, text, play=audio.play_audio, settings=None, deadline=None):
+    """
+    Speak a response, starting playback as soon as the first sentence is synthesized.
+
+    Args:
+    model (str): The TTS model.
+    api_key (str): The API key for the TTS service.
+    text (str): The response text.
+    play (callable): Plays one audio file.
+    settings (Settings, optional): The session's settings.
+    deadline (Deadline, optional): The turn's deadline for synthesizing every sentence.
+
+    Returns:
+    float: Seconds until the first sentence started playing, or None if nothing played.
+
+    Raises:
+    StageError: If a sentence couldn't be synthesized in time.
+    """
+    start_time = time.time()
+    first_audio = None
+    sentences = synthesize_sentences(model, api_key, text, settings=settings, deadline=deadline)
+    try:
+        for path in sentences:
+            if first_audio is None:
+                first_audio = time.time() - start_time
+                logging.info(f"⏱️ Time to first audio: {first_audio:.2f}s")
+            play(path)
+            # play_audio resets the stop flag when it starts, so check it
+            # between sentences to let stop_audio() end the whole response.
+            if audio.playback_should_stop:
+                break
+    finally:
+        sentences.close()
+    return first_audio
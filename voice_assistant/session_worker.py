@@ -0,0 +1,157 @@
+# voice_assistant/session_worker.py
+
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from voice_assistant.audio import record_audio
+from voice_assistant.config import Config
+from voice_assistant.metrics import metrics
+from voice_assistant.resilience import Deadline
+from voice_assistant.response_generation import stream_response
+from voice_assistant.text_to_speech import text_to_speech
+from voice_assistant.transcription import transcribe_audio
+from voice_assistant.utils import audio_mime_type
+
+# Turns of every session share this pool, so a UI thread is never held for a
+# whole turn and the number of turns in flight per process is bounded.
+_executor = ThreadPoolExecutor(max_workers=Config.APP_TURN_WORKERS, thread_name_prefix="session-turn")
+
+
+class SessionWorker:
+    """
+    Runs one session's turns in the background and reports their progress as events.
+
+    The UI submits a turn and returns right away; the turn records (if asked
+    to), transcribes, streams the reply and synthesizes it on a shared thread
+    pool. Progress comes back through poll() as dicts with a 'type':
+
+        {'type': 'status', 'text': 'Thinking...'}
+        {'type': 'transcript', 'text': ...}    the user's words, for recorded turns
+        {'type': 'delta', 'text': ...}         the next piece of the reply
+        {'type': 'response', 'text': ...}      the whole reply
+        {'type': 'audio', 'data': bytes, 'mime_type': ...}
+        {'type': 'error', 'message': ...}
+        {'type': 'done'}                       always the last event of a turn
+
+    The worker owns the session's chat history, and only its turn thread
+    appends to it.
+
+    Args:
+    chat_history (list): The conversation so far, starting with the system prompt.
+    """
+
+    def __init__(self, chat_history):
+        self.chat_history = chat_history
+        self._events = queue.SimpleQueue()
+        self._cancelled = threading.Event()
+        self._future = None
+
+    @property
+    def busy(self):
+        """Whether a turn is in progress."""
+        return self._future is not None and not self._future.done()
+
+    def submit(self, settings, text=None):
+        """
+        Start a turn in the background.
+
+        Args:
+        settings (Settings): The settings for the whole turn.
+        text (str, optional): Typed input. Without it the turn records from the microphone first.
+
+        Returns:
+        bool: False if a turn is already in progress.
+        """
+        if self.busy:
+            return False
+        self._cancelled = threading.Event()
+        self._future = _executor.submit(self._run_turn, settings, text, self._cancelled)
+        return True
+
+    def cancel(self):
+        """Stop the turn in progress after the step it is on; its audio is dropped."""
+        self._cancelled.set()
+
+    def poll(self):
+        """
+        Returns:
+        list: The events emitted since the last call, in order.
+        """
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _emit(self, kind, **data):
+        self._events.put({"type": kind, **data})
+
+    def _run_turn(self, settings, text, cancelled):
+        directory = tempfile.mkdtemp(prefix="turn-")
+        try:
+            with metrics.span("turn"):
+                self._turn(settings, text, cancelled, directory)
+        except Exception as e:
+            logging.error(f"An error occurred: {e}")
+            self._emit("error", message=str(e))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+            self._emit("done")
+
+    def _turn(self, settings, text, cancelled, directory):
+        deadline = None
+        if text is None:
+            recording = os.path.join(directory, "input.wav")
+            self._emit("status", text="Recording...")
+            with metrics.span("record"):
+                record_audio(recording)
+            self._emit("status", text="Transcribing audio...")
+            deadline = Deadline.for_turn()
+            text = transcribe_audio(settings.transcription_model, settings.transcription_api_key,
+                                    recording, settings=settings, deadline=deadline)
+            if not text:
+                self._emit("error", message="No speech detected. Please try again.")
+                return
+            self._emit("transcript", text=text)
+        if cancelled.is_set():
+            return
+
+        self.chat_history.append({"role": "user", "content": text})
+        self._emit("status", text="Thinking...")
+        # Typed turns start their budget here
+        deadline = deadline or Deadline.for_turn()
+        parts = []
+        try:
+            for delta in stream_response(settings.response_model, settings.response_api_key,
+                                         list(self.chat_history), settings, deadline=deadline):
+                parts.append(delta)
+                self._emit("delta", text=delta)
+                if cancelled.is_set():
+                    break
+        finally:
+            # Keep whatever was said, even if interrupted, so the next turn has context
+            response = "".join(parts)
+            if response:
+                self.chat_history.append({"role": "assistant", "content": response})
+            else:
+                # Nothing was answered (e.g. every provider failed): drop the
+                # question too, so the history doesn't hold two user turns in a row
+                self.chat_history.pop()
+        self._emit("response", text=response)
+        if cancelled.is_set() or not response:
+            return
+
+        self._emit("status", text="Generating audio response...")
+        output_file = os.path.join(directory, "reply.audio")
+        text_to_speech(settings.tts_model, settings.tts_api_key, response, output_file, settings=settings,
+                       deadline=deadline)
+        if cancelled.is_set():
+            return
+        with open(output_file, "rb") as f:
+            self._emit("audio", data=f.read(), mime_type=audio_mime_type(output_file))
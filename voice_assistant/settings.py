@@ -0,0 +1,95 @@
+# voice_assistant/settings.py
+
+import dataclasses
+from dataclasses import dataclass, field
+
+from voice_assistant.config import Config
+
+# Provider whose API key each backend uses, for every model that needs one
+_KEY_PROVIDERS = {
+    "transcription": {"openai": "openai", "groq": "groq", "deepgram": "deepgram"},
+    "response": {"openai": "openai", "groq": "groq", "agent": "groq"},
+    "tts": {"openai": "openai", "deepgram": "deepgram", "elevenlabs": "elevenlabs", "cartesia": "cartesia"},
+}
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    The per-session choices of models, voices and API keys, fixed for the session's turns.
+
+    Config holds the process-wide defaults; a Settings object is a snapshot of
+    them that a session (a Streamlit user, a WebSocket connection) can change
+    with replace() without affecting any other session. It is immutable and
+    hashable, so it is safe to share between threads and to use as a cache key.
+
+    Deployment settings that are the same for every session (base URLs, the
+    MeloTTS server, caches) stay on Config.
+    """
+    transcription_model: str
+    response_model: str
+    tts_model: str
+    openai_llm: str
+    groq_llm: str
+    ollama_llm: str
+    agent_llm: str
+    openai_tts_voice: str
+    elevenlabs_voice: str
+    cartesia_voice_id: str
+    openai_api_key: str = field(default=None, repr=False)
+    groq_api_key: str = field(default=None, repr=False)
+    deepgram_api_key: str = field(default=None, repr=False)
+    elevenlabs_api_key: str = field(default=None, repr=False)
+    cartesia_api_key: str = field(default=None, repr=False)
+    local_model_path: str = None
+
+    @classmethod
+    def from_config(cls):
+        """
+        Returns:
+        Settings: The current Config values.
+        """
+        return cls(**{f.name: getattr(Config, f.name.upper()) for f in dataclasses.fields(cls)})
+
+    def replace(self, **changes):
+        """
+        Args:
+        **changes: Fields to change, e.g. tts_model='cartesia'.
+
+        Returns:
+        Settings: A copy with the changes applied.
+        """
+        return dataclasses.replace(self, **changes)
+
+    def api_key(self, provider):
+        """
+        Args:
+        provider (str): The provider ('openai', 'groq', 'deepgram', 'elevenlabs', 'cartesia').
+
+        Returns:
+        str: The API key for the provider, or None.
+        """
+        return getattr(self, f"{provider}_api_key", None)
+
+    def model_api_key(self, stage, model):
+        """
+        Args:
+        stage (str): 'transcription', 'response' or 'tts'.
+        model (str): A model of that stage, not necessarily the selected one (e.g. a fallback).
+
+        Returns:
+        str: The API key the model's backend uses, or None.
+        """
+        return self.api_key(_KEY_PROVIDERS[stage].get(model, ""))
+
+    @property
+    def transcription_api_key(self):
+        return self.model_api_key("transcription", self.transcription_model)
+
+    @property
+    def response_api_key(self):
+        return self.model_api_key("response", self.response_model)
+
+    @property
+    def tts_api_key(self):
+        return self.model_api_key("tts", self.tts_model)
@@ -1,61 +1,275 @@
+import itertools
 import logging
 import time
 import os
-import wave
-import numpy as np
-from openai import OpenAI
-from cartesia import Cartesia
-from elevenlabs.client import ElevenLabs
-from voice_assistant.local_tts_generation import generate_audio_file_melotts
+import tempfile
+import threading
+from voice_assistant.config import Config
+from voice_assistant.clients import get_client, request_options
+from voice_assistant.voice_cache import get_elevenlabs_voice_id, get_cartesia_embedding
+from voice_assistant.tts_cache import tts_cache, cache_key
+from voice_assistant.metrics import metrics
+from voice_assistant.providers import ProviderRegistry
+from voice_assistant.resilience import attempt_timeout, call_with_fallback
+from voice_assistant.settings import Settings
 
 logging.basicConfig(level=logging.INFO)
 
-def text_to_speech(model, api_key, text, output_file_path, local_model_path=None):
-    """Generate speech from text using specified TTS model"""
+# TTS backends by Settings.tts_model value. File backends take
+# (api_key, text, output_file_path, settings) and return the path; stream
+# backends take (api_key, text, settings) and return (format dict, chunk iterator).
+TTS_BACKENDS = ProviderRegistry("TTS model")
+TTS_STREAM_BACKENDS = ProviderRegistry("streaming TTS model")
+
+# Output format of each provider, for the file and the streaming path. Part of
+# the TTS cache key, so changing a provider's format must change its entry here.
+FILE_FORMATS = {
+    "openai": "mp3",
+    "elevenlabs": "mp3_44100_128",
+    "cartesia": "wav_22050",
+    "melotts": "wav",
+}
+STREAM_FORMATS = {
+    "openai": "pcm_s16le_24000",
+    "elevenlabs": "mp3_44100_128",
+    "cartesia": "pcm_s16le_22050",
+    "melotts": f"pcm_s16le_{Config.MELOTTS_SAMPLE_RATE}",
+}
+
+def _voice(model, settings):
+    """The voice setting that applies to a provider"""
+    return {
+        "openai": settings.openai_tts_voice,
+        "elevenlabs": settings.elevenlabs_voice,
+        "cartesia": settings.cartesia_voice_id,
+        "melotts": "EN-US",
+    }.get(model, "")
+
+def text_to_speech(model, api_key, text, output_file_path, local_model_path=None, settings=None, deadline=None):
+    """
+    Generate speech from text using specified TTS model, with the session's settings if given.
+
+    Falls back to the providers in Config.FALLBACK_CHAINS['tts'] if the model
+    fails or times out (see voice_assistant/resilience.py). A fallback writes
+    its own format, so check the file's type rather than trusting its name.
+
+    Raises:
+    StageError: If no provider synthesized the text in time.
+    """
+    settings = settings or Settings.from_config()
+    if local_model_path:
+        settings = settings.replace(local_model_path=local_model_path)
     start_time = time.time()
     logging.info(f"🚀 Starting {model.upper()} TTS")
-    
+
+    if Config.TTS_CACHE_ENABLED and model in FILE_FORMATS:
+        key = cache_key(text, model, _voice(model, settings), FILE_FORMATS[model])
+        if tts_cache.get_to_file(key, output_file_path):
+            logging.info(f"✅ {model.upper()} TTS served from cache in: {time.time() - start_time:.2f}s")
+            return output_file_path
+
+    directory = os.path.dirname(os.path.abspath(output_file_path))
+    finished = threading.Event()
+
+    def attempt(provider):
+        synthesize = TTS_BACKENDS.get(provider)
+        backend_key = api_key if provider == model else settings.model_api_key("tts", provider)
+        # Each attempt writes its own file, so one abandoned after its timeout
+        # can't overwrite the audio of the attempt that replaced it
+        fd, path = tempfile.mkstemp(prefix=".tts-", suffix=os.path.splitext(output_file_path)[1], dir=directory)
+        os.close(fd)
+        try:
+            with metrics.span("tts", provider=provider):
+                synthesize(backend_key, text, path, settings)
+        except BaseException:
+            os.remove(path)
+            raise
+        if finished.is_set():
+            os.remove(path)
+        return provider, path
+
     try:
-        if model == "openai":
-            result = openai_tts(api_key, text, output_file_path)
-        elif model == "elevenlabs":
-            result = elevenlabs_tts(api_key, text, output_file_path)
-        elif model == "cartesia":
-            result = cartesia_tts(api_key, text, output_file_path)
-        elif model == "melotts":
-            result = melotts_tts(api_key, text, output_file_path)
-        else:
-            raise ValueError(f"Unknown TTS model: {model}")
-        
-        end_time = time.time()
-        total_time = end_time - start_time
-        logging.info(f"✅ {model.upper()} TTS completed in: {total_time:.2f}s")
-        return result
-    
+        provider, path = call_with_fallback("tts", model, attempt, deadline)
+    finally:
+        finished.set()
+    os.replace(path, output_file_path)
+    if Config.TTS_CACHE_ENABLED and provider in FILE_FORMATS:
+        tts_cache.put_file(cache_key(text, provider, _voice(provider, settings), FILE_FORMATS[provider]), output_file_path)
+    logging.info(f"✅ {provider.upper()} TTS completed in: {time.time() - start_time:.2f}s")
+    return output_file_path
+
+def text_to_speech_stream(model, api_key, text, settings=None, deadline=None):
+    """
+    Start streaming speech for text without writing a file.
+
+    Falls back to the providers in Config.FALLBACK_CHAINS['tts'] if the model
+    fails or times out before its first audio arrives; after that the stream
+    is committed to the provider that sent it, and errors are raised while
+    iterating. A fallback streams its own format, so use the returned one.
+
+    Args:
+    model (str): The TTS model ('openai', 'elevenlabs', 'cartesia', 'melotts').
+    api_key (str): The API key for the TTS service.
+    text (str): The text to speak.
+    settings (Settings, optional): The session's settings. Defaults to the current Config.
+    deadline (Deadline, optional): The turn's deadline. Defaults to a whole turn's budget.
+
+    Returns:
+    tuple: (format dict with 'encoding', 'sample_rate' and 'channels', iterator of audio byte chunks).
+    The first chunk has already arrived when this returns.
+
+    Raises:
+    StageError: If no provider started streaming in time.
+    """
+    settings = settings or Settings.from_config()
+    logging.info(f"🚀 Starting {model.upper()} streaming TTS")
+
+    if Config.TTS_CACHE_ENABLED and model in STREAM_FORMATS:
+        cached = tts_cache.get(cache_key(text, model, _voice(model, settings), STREAM_FORMATS[model]))
+        if cached is not None:
+            # The backend only sends its request once its chunks are read
+            audio_format, _ = TTS_STREAM_BACKENDS.get(model)(api_key, text, settings)
+            logging.info(f"✅ {model.upper()} TTS served from cache")
+            return audio_format, _mapped_chunks(cached)
+
+    def first_chunk(provider):
+        backend_key = api_key if provider == model else settings.model_api_key("tts", provider)
+        start = time.perf_counter()
+        audio_format, chunks = TTS_STREAM_BACKENDS.get(provider)(backend_key, text, settings)
+        chunks = iter(chunks)
+        first = next(chunks, None)
+        metrics.observe("tts_first_audio", time.perf_counter() - start, provider=provider)
+        return provider, audio_format, first, chunks
+
+    provider, audio_format, first, chunks = call_with_fallback("tts", model, first_chunk, deadline)
+    if first is not None:
+        chunks = itertools.chain([first], chunks)
+    if Config.TTS_CACHE_ENABLED and provider in STREAM_FORMATS:
+        chunks = _caching_chunks(cache_key(text, provider, _voice(provider, settings), STREAM_FORMATS[provider]), chunks)
+    return audio_format, chunks
+
+def _mapped_chunks(mapped, chunk_size=4096):
+    """Yield zero-copy slices of cached audio"""
+    view = memoryview(mapped)
+    for i in range(0, len(view), chunk_size):
+        yield view[i:i + chunk_size]
+
+def _caching_chunks(key, chunks):
+    """Pass chunks through, storing the audio in the TTS cache if the stream completes"""
+    audio = bytearray()
+    for chunk in chunks:
+        audio += chunk
+        yield chunk
+    tts_cache.put(key, audio)
+
+def prewarm_tts_cache(model, api_key, phrases=None, settings=None):
+    """
+    Synthesize phrases that are spoken often so they are served from the TTS cache.
+
+    Args:
+    model (str): The TTS model.
+    api_key (str): The API key for the TTS service.
+    phrases (list, optional): The phrases to cache. Defaults to Config.TTS_PREWARM_PHRASES.
+    settings (Settings, optional): The session's settings. Defaults to the current Config.
+    """
+    settings = settings or Settings.from_config()
+    if not Config.TTS_CACHE_ENABLED or model not in FILE_FORMATS:
+        return
+    fd, path = tempfile.mkstemp(suffix=".audio")
+    os.close(fd)
+    try:
+        for phrase in phrases if phrases is not None else Config.TTS_PREWARM_PHRASES:
+            if tts_cache.get(cache_key(phrase, model, _voice(model, settings), FILE_FORMATS[model])) is None:
+                text_to_speech(model, api_key, phrase, path, settings=settings)
     except Exception as e:
-        logging.error(f"❌ {model} TTS error: {e}")
-        raise
+        logging.warning(f"TTS cache pre-warm failed: {e}")
+    finally:
+        os.remove(path)
+
+@TTS_STREAM_BACKENDS.register('openai')
+def openai_tts_stream(api_key, text, settings):
+    """OpenAI TTS streamed as raw 24 kHz PCM"""
+    client = get_client('openai', api_key, timeout=attempt_timeout())
+
+    def chunks():
+        with client.audio.speech.with_streaming_response.create(
+            model="tts-1",
+            voice=settings.openai_tts_voice,
+            input=text,
+            response_format="pcm"
+        ) as response:
+            yield from response.iter_bytes(4096)
+
+    return {"encoding": "pcm_s16le", "sample_rate": 24000, "channels": 1}, chunks()
+
+@TTS_STREAM_BACKENDS.register('elevenlabs')
+def elevenlabs_tts_stream(api_key, text, settings):
+    """ElevenLabs TTS streamed as MP3"""
+    client = get_client('elevenlabs', api_key)
+
+    def chunks():
+        voice_id = get_elevenlabs_voice_id(client, settings.elevenlabs_voice)
+        yield from client.text_to_speech.stream(
+            voice_id=voice_id,
+            text=text,
+            model_id="eleven_turbo_v2_5",
+            output_format="mp3_44100_128",
+            request_options=request_options(attempt_timeout()),
+        )
+
+    return {"encoding": "mp3", "sample_rate": 44100, "channels": 1}, chunks()
 
-def elevenlabs_tts(api_key, text, output_file_path):
+@TTS_STREAM_BACKENDS.register('cartesia')
+def cartesia_tts_stream(api_key, text, settings):
+    """Cartesia TTS streamed as raw 16-bit PCM, playable without any conversion"""
+    client = get_client('cartesia', api_key)
+
+    def chunks():
+        from cartesia.tts.requests.tts_request_embedding_specifier import TtsRequestEmbeddingSpecifierParams
+        from cartesia.tts.requests.output_format import OutputFormat_RawParams
+        embedding = get_cartesia_embedding(client, settings.cartesia_voice_id)
+        yield from client.tts.bytes(
+            model_id='sonic-english',
+            transcript=text,
+            voice=TtsRequestEmbeddingSpecifierParams(embedding=embedding),
+            output_format=OutputFormat_RawParams(container='raw', encoding='pcm_s16le', sample_rate=22050),
+            request_options=request_options(attempt_timeout()),
+        )
+
+    return {"encoding": "pcm_s16le", "sample_rate": 22050, "channels": 1}, chunks()
+
+@TTS_STREAM_BACKENDS.register('melotts')
+def melotts_tts_stream(api_key, text, settings):
+    """MeloTTS streamed from the local server as raw 16-bit PCM"""
+    audio_format = {"encoding": "pcm_s16le", "sample_rate": Config.MELOTTS_SAMPLE_RATE, "channels": 1}
+
+    def chunks():
+        from voice_assistant.local_tts_generation import stream_audio_melotts
+        server_format, server_chunks = stream_audio_melotts(text, timeout=attempt_timeout())
+        if server_format != audio_format:
+            raise ValueError(f"MeloTTS server streams {server_format}, expected {audio_format}; check Config.MELOTTS_SAMPLE_RATE")
+        yield from server_chunks
+
+    return audio_format, chunks()
+
+@TTS_BACKENDS.register('elevenlabs')
+def elevenlabs_tts(api_key, text, output_file_path, settings):
     """Ultrafast ElevenLabs TTS - Performance optimized"""
-    client = ElevenLabs(api_key=api_key)
-    
-    # Get fastest available voice
-    voices = client.voices.get_all()
-    selected_voice = voices.voices[0] if len(voices.voices) > 0 else None
+    client = get_client('elevenlabs', api_key)
     
-    if not selected_voice:
-        raise Exception("No voices available in ElevenLabs")
+    # Resolve the configured voice from the on-disk catalog (no API call once cached)
+    voice_id = get_elevenlabs_voice_id(client, settings.elevenlabs_voice)
     
-    logging.info(f"🎤 ElevenLabs voice: {selected_voice.name}")
+    logging.info(f"🎤 ElevenLabs voice: {settings.elevenlabs_voice} ({voice_id})")
     
     # Generate audio with speed optimization - using text_to_speech method
     # Updated to newer model that's available on free tier
     audio_content = client.text_to_speech.convert(
-        voice_id=selected_voice.voice_id,
+        voice_id=voice_id,
         text=text,
         model_id="eleven_turbo_v2_5",
-        output_format="mp3_44100_128"
+        output_format="mp3_44100_128",
+        request_options=request_options(attempt_timeout()),
     )
 
     # Save as MP3 - handle generator input
@@ -63,63 +277,60 @@ def elevenlabs_tts(api_key, text, output_file_path):
         if hasattr(audio_content, 'content'):
             f.write(audio_content.content)
         elif hasattr(audio_content, '__iter__'):
-            # Handle generator/iterator
-            f.write(b''.join(audio_content))
+            # Handle generator/iterator, writing chunks as they arrive
+            for chunk in audio_content:
+                f.write(chunk)
         else:
             f.write(audio_content)
     
     return output_file_path
 
-def cartesia_tts(api_key, text, output_file_path):
+@TTS_BACKENDS.register('cartesia')
+def cartesia_tts(api_key, text, output_file_path, settings):
     """Optimized Cartesia TTS with voice caching"""
-    client = Cartesia(api_key=api_key)
+    client = get_client('cartesia', api_key)
     
-    # Cached voice
-    voice_id = "f114a467-c40a-4db8-964d-aaba89cd08fa"
-    voice = client.voices.get(id=voice_id)
+    # Cached voice embedding
+    embedding = get_cartesia_embedding(client, settings.cartesia_voice_id)
     
     # Prepare voice parameters
     from cartesia.tts.requests.tts_request_embedding_specifier import TtsRequestEmbeddingSpecifierParams
-    voice_params = TtsRequestEmbeddingSpecifierParams(embedding=voice.embedding)
+    voice_params = TtsRequestEmbeddingSpecifierParams(embedding=embedding)
     
     # Speed-optimized format
     from cartesia.tts.requests.output_format import OutputFormat_RawParams
     output_format = OutputFormat_RawParams(container='raw', encoding='pcm_f32le', sample_rate=22050)
     
-    # Generate audio
-    audio_bytes = b''.join(client.tts.bytes(
+    # Generate audio, converting to 16-bit WAV chunk by chunk as it streams in
+    from voice_assistant.pcm import write_float32_wav
+    audio_chunks = client.tts.bytes(
         model_id='sonic-english',
         transcript=text,
         voice=voice_params,
         output_format=output_format,
-    ))
-    
-    # Convert PCM to WAV
-    audio_array = np.frombuffer(audio_bytes, dtype=np.float32)
-    audio_16bit = (audio_array * 32767).astype(np.int16)
-    
-    with wave.open(output_file_path, 'wb') as wav_file:
-        wav_file.setnchannels(1)
-        wav_file.setsampwidth(2)
-        wav_file.setframerate(22050)
-        wav_file.writeframes(audio_16bit.tobytes())
+        request_options=request_options(attempt_timeout()),
+    )
+    write_float32_wav(audio_chunks, output_file_path, sample_rate=22050)
     
     return output_file_path
 
-def openai_tts(api_key, text, output_file_path):
+@TTS_BACKENDS.register('openai')
+def openai_tts(api_key, text, output_file_path, settings):
     """Standard OpenAI TTS"""
-    client = OpenAI(api_key=api_key)
+    client = get_client('openai', api_key, timeout=attempt_timeout())
     
     response = client.audio.speech.create(
         model="tts-1",
-        voice="alloy",
+        voice=settings.openai_tts_voice,
         input=text
     )
     
     response.stream_to_file(output_file_path)
     return output_file_path
 
-def melotts_tts(api_key, text, output_file_path):
+@TTS_BACKENDS.register('melotts')
+def melotts_tts(api_key, text, output_file_path, settings):
     """MeloTTS local generation"""
-    generate_audio_file_melotts(text=text, filename=output_file_path)
+    from voice_assistant.local_tts_generation import generate_audio_file_melotts
+    generate_audio_file_melotts(text=text, filename=output_file_path, timeout=attempt_timeout())
     return output_file_path
\ No newline at end of file
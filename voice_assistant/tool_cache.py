@@ -0,0 +1,114 @@
+# voice_assistant/tool_cache.py
+
+import json
+import threading
+import time
+from collections import defaultdict
+
+
+def canonical_args(args):
+    """
+    Serialize tool arguments into a stable cache key.
+
+    Arguments set to None are dropped so that an omitted optional argument
+    and an explicit null share the same entry.
+
+    Args:
+    args (dict): The keyword arguments passed to the tool.
+
+    Returns:
+    str: The canonical JSON form of the arguments.
+    """
+    args = {key: value for key, value in (args or {}).items() if value is not None}
+    return json.dumps(args, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ToolCache:
+    """
+    Memoize agent tool results keyed by (tool name, canonical arguments).
+
+    Only tools with a positive TTL are cached. Calling a tool listed in
+    `invalidates` drops every cached result of the tools it names, so a
+    write such as add_task is immediately visible to the next get_tasks.
+    A read that was already running when its tool was invalidated returns
+    its result but doesn't cache it, since it may predate the write.
+
+    Args:
+    ttls (dict): Seconds to keep results for, per tool name.
+    invalidates (dict): Tool name -> list of tool names whose results it invalidates.
+    clock (callable): Monotonic time source, in seconds.
+    """
+
+    def __init__(self, ttls=None, invalidates=None, clock=time.monotonic):
+        self.ttls = dict(ttls or {})
+        self.invalidates = {name: tuple(targets) for name, targets in (invalidates or {}).items()}
+        self.clock = clock
+        self._entries = defaultdict(dict)
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0, "invalidations": 0})
+        self._generations = defaultdict(int)  # bumped by every invalidation of the tool
+        self._lock = threading.Lock()
+
+    def call(self, name, function, args):
+        """
+        Return the cached result of a tool call, running the tool on a miss.
+
+        Args:
+        name (str): The tool name.
+        function (callable): The tool implementation.
+        args (dict): The keyword arguments for the tool.
+
+        Returns:
+        The tool result.
+        """
+        ttl = self.ttls.get(name, 0)
+        key = canonical_args(args)
+
+        if ttl > 0:
+            with self._lock:
+                entry = self._entries[name].get(key)
+                if entry is not None and entry[0] > self.clock():
+                    self._stats[name]["hits"] += 1
+                    return entry[1]
+                self._stats[name]["misses"] += 1
+                generation = self._generations[name]
+
+        result = function(**(args or {}))
+
+        with self._lock:
+            for target in self.invalidates.get(name, ()):
+                self._invalidate_locked(target)
+            if ttl > 0 and self._generations[name] == generation:
+                self._entries[name][key] = (self.clock() + ttl, result)
+        return result
+
+    def invalidate(self, name=None):
+        """
+        Drop cached results for one tool, or for every tool when name is None.
+
+        Args:
+        name (str, optional): The tool whose results should be dropped.
+        """
+        with self._lock:
+            for target in ([name] if name else set(self._entries) | set(self.ttls)):
+                self._invalidate_locked(target)
+
+    def _invalidate_locked(self, name):
+        self._generations[name] += 1
+        if self._entries.pop(name, None):
+            self._stats[name]["invalidations"] += 1
+
+    def stats(self):
+        """
+        Report cache effectiveness per tool.
+
+        Returns:
+        dict: Tool name -> {'hits', 'misses', 'invalidations', 'hit_rate', 'entries'}.
+        """
+        with self._lock:
+            report = {}
+            for name, counts in self._stats.items():
+                lookups = counts["hits"] + counts["misses"]
+                report[name] = dict(counts,
+                                    hit_rate=counts["hits"] / lookups if lookups else 0.0,
+                                    entries=len(self._entries.get(name, ())))
+            return report
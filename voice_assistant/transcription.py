@@ -1,6 +1,10 @@
 from colorama import Fore, init
-from openai import OpenAI
-from groq import Groq
+from voice_assistant.clients import get_client
+from voice_assistant.config import Config
+from voice_assistant.metrics import metrics
+from voice_assistant.providers import ProviderRegistry
+from voice_assistant.resilience import attempt_timeout, call_with_fallback
+from voice_assistant.settings import Settings
 # Deepgram imports commented due to version compatibility
 # from deepgram import (
 #     DeepgramClient,
@@ -9,17 +13,15 @@ from groq import Groq
 # )
 import json
 import logging
-import requests
 import time
 
-fast_url = "http://localhost:8000"
 checked_fastwhisperapi = False
 
 def check_fastwhisperapi():
     global checked_fastwhisperapi
-    global fast_url
     if not checked_fastwhisperapi:
-        infopoint = fast_url + "/info"
+        import requests
+        infopoint = Config.FASTWHISPERAPI_URL + "/info"
         try:
             response = requests.get(infopoint)
             if response.status_code != 200:
@@ -28,92 +30,118 @@ def check_fastwhisperapi():
             raise Exception("FastWhisperAPI is not running")
         checked_fastwhisperapi = True
 
-def transcribe_audio(model, api_key, audio_file_path, local_model_path=None):
+# Transcription backends by Settings.transcription_model value. Each takes
+# (api_key, audio_file_path, settings) and returns the text.
+TRANSCRIBERS = ProviderRegistry("transcription model")
+
+def transcribe_audio(model, api_key, audio_file_path, local_model_path=None, settings=None, deadline=None):
     """
     Transcribe an audio file using the specified model.
-    
+
+    Falls back to the providers in Config.FALLBACK_CHAINS['transcription'] if
+    the model fails or times out (see voice_assistant/resilience.py).
+
     Args:
     model (str): The model to use for transcription ('openai', 'groq', 'deepgram', 'fastwhisper', 'local').
     api_key (str): The API key for the transcription service.
     audio_file_path (str): The path to the audio file to transcribe.
     local_model_path (str): The path to the local model (if applicable).
+    settings (Settings, optional): The session's settings. Defaults to the current Config.
+    deadline (Deadline, optional): The turn's deadline. Defaults to a whole turn's budget.
 
     Returns:
     str: The transcribed text.
+
+    Raises:
+    StageError: If no provider could transcribe the audio in time.
     """
+    settings = settings or Settings.from_config()
+    if local_model_path:
+        settings = settings.replace(local_model_path=local_model_path)
+
+    def attempt(provider):
+        transcribe = TRANSCRIBERS.get(provider)
+        key = api_key if provider == model else settings.model_api_key("transcription", provider)
+        # Includes uploading the recording
+        with metrics.span("stt", provider=provider):
+            return transcribe(key, audio_file_path, settings)
+
+    return call_with_fallback("transcription", model, attempt, deadline)
+
+@TRANSCRIBERS.register('openai')
+def _transcribe_openai(api_key, audio_file_path, settings):
+    client = get_client('openai', api_key, timeout=attempt_timeout())
+    with open(audio_file_path, "rb") as audio_file:
+        transcription = client.audio.transcriptions.create(
+            model="whisper-1",
+            file=audio_file,
+            language='en'
+        )
+    return transcription.text
+
+@TRANSCRIBERS.register('groq')
+def _transcribe_groq(api_key, audio_file_path, settings):
+    client = get_client('groq', api_key, timeout=attempt_timeout())
+    with open(audio_file_path, "rb") as audio_file:
+        transcription = client.audio.transcriptions.create(
+            model="whisper-large-v3",
+            file=audio_file,
+            language='en'
+        )
+    return transcription.text
+
+@TRANSCRIBERS.register('deepgram')
+def _transcribe_deepgram(api_key, audio_file_path, settings):
     try:
-        if model == 'openai':
-            client = OpenAI(api_key=api_key)
-            with open(audio_file_path, "rb") as audio_file:
-                transcription = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language='en'
-                )
-            return transcription.text
-        elif model == 'groq':
-            client = Groq(api_key=api_key)
-            with open(audio_file_path, "rb") as audio_file:
-                transcription = client.audio.transcriptions.create(
-                    model="whisper-large-v3",
-                    file=audio_file,
-                    language='en'
-                )
-            return transcription.text
-        elif model == 'deepgram':
-            try:
-                deepgram = DeepgramClient(api_key)
-
-                with open(audio_file_path, "rb") as file:
-                    buffer_data = file.read()
-
-                payload: FileSource = {
-                    "buffer": buffer_data,
-                }
-                options = PrerecordedOptions(
-                    model="nova-2",
-                    smart_format=True,
-                )
-                response = deepgram.listen.prerecorded.v("1").transcribe_file(payload, options)
-                response_json = response.to_json()
-                data = json.loads(response_json)
-
-                transcript = data['results']['channels'][0]['alternatives'][0]['transcript']
-
-                return transcript
-
-            except Exception as e:
-                print(f"Exception: {e}")
-        
-        elif model == 'fastwhisperapi':
-            global fast_url
-            check_fastwhisperapi()
-
-            endpoint = fast_url + "/v1/transcriptions"
-
-            files = {
-                'file': (audio_file_path, open(audio_file_path, 'rb')),
-            }
-            data = {
-                'model': "base",
-                'language': "en",
-                'initial_prompt': None,
-                'vad_filter': True,
-            }
-            headers = {
-                'Authorization': 'Bearer dummy_api_key',
-                
-            }
-            response = requests.post(endpoint, files=files, data=data, headers=headers)
-            response_json = response.json()
-            return response_json.get('text', 'No text found in the response.')
-          
-        elif model == 'local':
-            # Placeholder for local STT model transcription
-            return "Transcribed text from local model"
-        else:
-            raise ValueError("Unsupported transcription model")
+        deepgram = DeepgramClient(api_key)
+
+        with open(audio_file_path, "rb") as file:
+            buffer_data = file.read()
+
+        payload: FileSource = {
+            "buffer": buffer_data,
+        }
+        options = PrerecordedOptions(
+            model="nova-2",
+            smart_format=True,
+        )
+        response = deepgram.listen.prerecorded.v("1").transcribe_file(payload, options)
+        response_json = response.to_json()
+        data = json.loads(response_json)
+
+        transcript = data['results']['channels'][0]['alternatives'][0]['transcript']
+
+        return transcript
 
     except Exception as e:
-        logging.error(Fore.RED + f"Failed to transcribe audio: {e}" + Fore.RESET)
-        raise Exception("Error in transcribing audio")
\ No newline at end of file
+        print(f"Exception: {e}")
+
+@TRANSCRIBERS.register('fastwhisperapi')
+def _transcribe_fastwhisperapi(api_key, audio_file_path, settings):
+    import requests
+
+    check_fastwhisperapi()
+
+    endpoint = Config.FASTWHISPERAPI_URL + "/v1/transcriptions"
+
+    files = {
+        'file': (audio_file_path, open(audio_file_path, 'rb')),
+    }
+    data = {
+        'model': "base",
+        'language': "en",
+        'initial_prompt': None,
+        'vad_filter': True,
+    }
+    headers = {
+        'Authorization': 'Bearer dummy_api_key',
+        
+    }
+    response = requests.post(endpoint, files=files, data=data, headers=headers, timeout=attempt_timeout())
+    response_json = response.json()
+    return response_json.get('text', 'No text found in the response.')
+
+@TRANSCRIBERS.register('local')
+def _transcribe_local(api_key, audio_file_path, settings):
+    # Placeholder for local STT model transcription
+    return "Transcribed text from local model"
@@ -0,0 +1,207 @@
+# voice_assistant/tts_cache.py
+
+import hashlib
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from voice_assistant.config import Config
+
+
+def normalize_text(text):
+    """
+    Normalize text for cache lookups.
+
+    Unicode forms and whitespace are folded; case and punctuation are kept
+    because they change how the sentence is spoken.
+
+    Args:
+    text (str): The text to be spoken.
+
+    Returns:
+    str: The normalized text.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def cache_key(text, provider, voice, audio_format, speed=1.0):
+    """
+    Build the cache key for one synthesized utterance.
+
+    Args:
+    text (str): The text to be spoken.
+    provider (str): The TTS provider, e.g. 'elevenlabs'.
+    voice (str): The voice name or id.
+    audio_format (str): The output format, e.g. 'mp3_44100_128'.
+    speed (float): The speaking rate.
+
+    Returns:
+    str: A hex digest identifying the audio.
+    """
+    material = "\x1f".join([normalize_text(text), provider, str(voice), audio_format, f"{float(speed):g}"])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Two-tier cache of synthesized speech.
+
+    Audio is stored as files in `directory`, evicted least-recently-used once
+    the directory grows past `max_disk_bytes`. The memory tier keeps the most
+    recently used entries mapped with mmap, so hits are served straight from
+    the page cache without reading the file into a new buffer.
+
+    Args:
+    directory (str): Where cached audio files live.
+    max_disk_bytes (int): Size bound for the on-disk tier.
+    max_memory_items (int): How many entries to keep mapped in memory.
+    """
+
+    def __init__(self, directory, max_disk_bytes, max_memory_items):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_items = max_memory_items
+        self._mapped = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """
+        Look up cached audio.
+
+        Args:
+        key (str): The cache key from cache_key().
+
+        Returns:
+        mmap.mmap: A read-only mapping of the audio, or None on a miss.
+        """
+        with self._lock:
+            mapped = self._mapped.get(key)
+            if mapped is not None:
+                self._mapped.move_to_end(key)
+                self.hits += 1
+                return mapped
+
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                os.utime(path)  # mtime doubles as the disk tier's LRU clock
+            except (FileNotFoundError, ValueError):
+                # ValueError: an empty file cannot be mapped
+                self.misses += 1
+                return None
+
+            self._mapped[key] = mapped
+            # Evicted mappings are simply dropped rather than closed: a caller
+            # may still hold a memoryview into them, and the mapping is
+            # released once the last view goes away.
+            while len(self._mapped) > self.max_memory_items:
+                self._mapped.popitem(last=False)
+            self.hits += 1
+            return mapped
+
+    def get_to_file(self, key, output_file_path):
+        """
+        Copy cached audio to a file, using the kernel's file-to-file copy.
+
+        Args:
+        key (str): The cache key.
+        output_file_path (str): Where to write the audio.
+
+        Returns:
+        bool: True on a hit.
+        """
+        if self.get(key) is None:
+            return False
+        try:
+            shutil.copyfile(self._path(key), output_file_path)
+        except FileNotFoundError:
+            # Evicted by another thread between the lookup and the copy
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+            return False
+        return True
+
+    def put(self, key, data):
+        """
+        Store audio bytes under a key.
+
+        Args:
+        key (str): The cache key.
+        data (bytes-like): The audio.
+        """
+        if not data:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        self._commit(key, tmp_path)
+
+    def put_file(self, key, file_path):
+        """
+        Store an audio file under a key.
+
+        Args:
+        key (str): The cache key.
+        file_path (str): The audio file to copy into the cache.
+        """
+        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        os.close(fd)
+        shutil.copyfile(file_path, tmp_path)
+        self._commit(key, tmp_path)
+
+    def _commit(self, key, tmp_path):
+        path = self._path(key)
+        with self._lock:
+            size = os.path.getsize(tmp_path)
+            try:
+                previous = os.path.getsize(path)
+            except FileNotFoundError:
+                previous = 0
+            os.replace(tmp_path, path)
+            self._mapped.pop(key, None)
+            self._disk_bytes = self._scan_disk_bytes() if self._disk_bytes is None else self._disk_bytes + size - previous
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk(keep=key)
+
+    def _scan_disk_bytes(self):
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith(".tmp-"):
+                total += entry.stat().st_size
+        return total
+
+    def _evict_disk(self, keep):
+        entries = [entry for entry in os.scandir(self.directory)
+                   if entry.is_file() and not entry.name.startswith(".tmp-") and entry.name != keep]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+            except OSError as e:
+                logging.warning(f"Failed to evict TTS cache entry {entry.path}: {e}")
+                continue
+            self._disk_bytes -= size
+            self._mapped.pop(entry.name, None)
+
+
+tts_cache = TTSCache(Config.TTS_CACHE_DIR, Config.TTS_CACHE_MAX_BYTES, Config.TTS_CACHE_MEMORY_ITEMS)
@@ -0,0 +1,156 @@
+# voice_assistant/tts_scheduler.py
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler cannot accept more work."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Synthesis queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SynthesisScheduler:
+    """
+    Bounded queue and micro-batcher in front of a single TTS model.
+
+    Jobs wait in an asyncio queue of at most `max_queue` entries, and one
+    worker thread owns the model, so requests never contend for it across
+    threadpool workers. When the worker picks up a short job it waits up to
+    `batch_window_ms` for more short jobs and hands them to
+    `synthesize_batch` together.
+
+    Args:
+    synthesize_batch (callable): Takes a list of jobs and returns one result per job,
+        in order. Runs on the scheduler's worker thread.
+    max_queue (int): Maximum queued jobs before submissions are rejected.
+    max_batch_size (int): Maximum jobs per batch.
+    batch_window_ms (float): How long to wait to fill a batch of short jobs.
+    max_batch_chars (int): Jobs with longer text are run on their own.
+    """
+
+    def __init__(self, synthesize_batch, max_queue=32, max_batch_size=8, batch_window_ms=10, max_batch_chars=200):
+        self.synthesize_batch = synthesize_batch
+        self.max_queue = max_queue
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_chars = max_batch_chars
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-model")
+        self._batch_sizes = Counter()
+        self._completed = 0
+        self._rejected = 0
+        self._max_depth = 0
+        self._busy_seconds = 0.0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # The queue and worker belong to the loop that created them, so a
+            # new event loop in the same process gets its own.
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, job, wait=False):
+        """
+        Queue a job and wait for its result.
+
+        Args:
+        job: The job; must have a `text` attribute.
+        wait (bool): Wait for queue space instead of failing when the queue is full.
+            Use it for follow-up pieces of a request that was already admitted.
+
+        Returns:
+        The result produced by synthesize_batch for this job.
+
+        Raises:
+        QueueFullError: If the queue is full and wait is False.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        if wait:
+            await self._queue.put((job, future))
+        else:
+            try:
+                self._queue.put_nowait((job, future))
+            except asyncio.QueueFull:
+                self._rejected += 1
+                raise QueueFullError(self.retry_after())
+        self._max_depth = max(self._max_depth, self._queue.qsize())
+        return await future
+
+    def retry_after(self):
+        """Seconds until the current queue is likely drained, for Retry-After headers."""
+        per_job = self._busy_seconds / self._completed if self._completed else 1.0
+        return max(1, round(per_job * self._queue.qsize()))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            if len(batch[0][0].text) <= self.max_batch_chars:
+                deadline = loop.time() + self.batch_window
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    batch.append(item)
+                    if len(item[0].text) > self.max_batch_chars:
+                        break
+
+            # Jobs whose caller went away (client disconnected) are skipped.
+            batch = [(job, future) for job, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._executor, self.synthesize_batch, [job for job, _ in batch])
+            except Exception as e:
+                logging.error(f"Synthesis batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self._busy_seconds += time.perf_counter() - start
+
+            self._batch_sizes[len(batch)] += 1
+            self._completed += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def metrics(self):
+        """
+        Report queue and batching statistics.
+
+        Returns:
+        dict: queue_depth, max_queue_depth, queue_capacity, completed, rejected,
+        batch_sizes (size -> count), mean_batch_size and busy_seconds.
+        """
+        batches = sum(self._batch_sizes.values())
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_depth": self._max_depth,
+            "queue_capacity": self.max_queue,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "batch_sizes": dict(sorted(self._batch_sizes.items())),
+            "mean_batch_size": self._completed / batches if batches else 0.0,
+            "busy_seconds": round(self._busy_seconds, 3),
+        }
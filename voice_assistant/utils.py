@@ -1,5 +1,16 @@
 import os
+import re
 import logging
+import mimetypes
+
+# Sentence ends: terminal punctuation (optionally followed by a closing quote
+# or bracket) and whitespace, or a line break. Common abbreviations and list
+# numbers ("Dr.", "2.") are not sentence ends.
+_SENTENCE_END = re.compile(
+    r'(?:(?<=[.!?])|(?<=[.!?]["\')\]]))'
+    r'(?<!\b(?:Dr|Mr|Ms|St)\.)(?<!\bMrs\.)(?<!^\d\.)(?<!\s\d\.)'
+    r'\s+|\n+'
+)
 
 def delete_file(file_path):
     """
@@ -16,4 +27,109 @@ def delete_file(file_path):
     except PermissionError:
         logging.error(f"Permission denied when trying to delete file: {file_path}")
     except OSError as e:
-        logging.error(f"Error deleting file {file_path}: {e}")
\ No newline at end of file
+        logging.error(f"Error deleting file {file_path}: {e}")
+
+# Leading bytes of the audio containers the TTS providers produce
+_AUDIO_SIGNATURES = (
+    (b"RIFF", "audio/wav"),
+    (b"ID3", "audio/mpeg"),
+    (b"OggS", "audio/ogg"),
+    (b"fLaC", "audio/flac"),
+)
+
+def audio_mime_type(file_path):
+    """
+    Detect the MIME type of an audio file from its content.
+
+    The providers' output doesn't always match the file name (Cartesia and
+    MeloTTS write WAV to 'output.mp3'), so the extension is only a fallback.
+
+    Args:
+    file_path (str): The path to the audio file.
+
+    Returns:
+    str: The MIME type, e.g. 'audio/wav'.
+    """
+    with open(file_path, "rb") as f:
+        header = f.read(4)
+    for signature, mime_type in _AUDIO_SIGNATURES:
+        if header.startswith(signature):
+            return mime_type
+    # MP3 without an ID3 tag starts right at a frame sync
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0:
+        return "audio/mpeg"
+    return mimetypes.guess_type(file_path)[0] or "audio/mpeg"
+
+def split_sentences(text, min_chars=20):
+    """
+    Split a response into sentences for synthesis.
+
+    Fragments shorter than `min_chars` ("Sure!", list numbers) are merged into
+    the following sentence, since each request has a fixed latency cost.
+
+    Args:
+    text (str): The response text.
+    min_chars (int): Minimum length of a synthesized chunk.
+
+    Returns:
+    list: The sentences, in order.
+    """
+    sentences = []
+    pending = ""
+    for part in _SENTENCE_END.split(text):
+        part = part.strip()
+        if not part:
+            continue
+        pending = f"{pending} {part}" if pending else part
+        if len(pending) >= min_chars:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+class SentenceStream:
+    """
+    Turn streamed text into sentences as soon as each one is complete.
+
+    Used to start synthesizing a reply while the LLM is still writing it.
+    Sentences are split the same way as split_sentences.
+
+    Args:
+    min_chars (int): Minimum length of a sentence handed out.
+    """
+
+    def __init__(self, min_chars=20):
+        self.min_chars = min_chars
+        self._text = ""
+
+    def feed(self, text):
+        """
+        Add the next piece of text.
+
+        Args:
+        text (str): The new text.
+
+        Returns:
+        list: Sentences completed by this piece, possibly none.
+        """
+        self._text += text
+        end = None
+        for end in _SENTENCE_END.finditer(self._text):
+            pass
+        if end is None or len(self._text[:end.start()].strip()) < self.min_chars:
+            return []
+        complete, self._text = self._text[:end.start()], self._text[end.end():]
+        return split_sentences(complete, self.min_chars)
+
+    def flush(self):
+        """
+        Returns:
+        list: Whatever text is left, as sentences, once the stream has ended.
+        """
+        text, self._text = self._text, ""
+        return split_sentences(text, self.min_chars)
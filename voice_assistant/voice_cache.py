@@ -0,0 +1,170 @@
+# voice_assistant/voice_cache.py
+
+import json
+import logging
+import os
+import threading
+import time
+
+from voice_assistant.config import Config
+
+
+class VoiceCatalog:
+    """
+    Disk-backed cache of provider voice metadata.
+
+    Entries live in namespaces (one per provider) and are persisted as JSON
+    so that a restart does not pay the voice lookup round trip either. A
+    stale namespace keeps serving its entries while a background thread
+    refreshes it; only a key that has never been seen is fetched inline.
+
+    Args:
+    path (str): The JSON file the catalog is persisted to.
+    ttl (float): Seconds before a namespace is considered stale.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._data = None
+        self._lock = threading.Lock()
+        self._refreshing = set()
+
+    def get(self, namespace, key, loader):
+        """
+        Look up a cached entry, fetching it with the loader if needed.
+
+        Args:
+        namespace (str): The provider namespace, e.g. 'elevenlabs'.
+        key (str): The entry to look up, e.g. a voice name or id.
+        loader (callable): Fetches fresh data and returns a dict of entries
+            to merge into the namespace. It must include `key` when it exists.
+
+        Returns:
+        The cached value, or None if the loader does not know the key.
+        """
+        with self._lock:
+            section = self._load().setdefault(namespace, {"fetched_at": 0, "entries": {}})
+            value = section["entries"].get(key)
+            stale = time.time() - section["fetched_at"] > self.ttl
+
+        if value is None:
+            self._refresh(namespace, loader)
+            with self._lock:
+                return self._data[namespace]["entries"].get(key)
+
+        if stale:
+            self._refresh_in_background(namespace, loader)
+        return value
+
+    def entries(self, namespace):
+        """Return a copy of every cached entry in a namespace."""
+        with self._lock:
+            return dict(self._load().get(namespace, {}).get("entries", {}))
+
+    def _refresh(self, namespace, loader):
+        entries = loader()
+        with self._lock:
+            section = self._load().setdefault(namespace, {"fetched_at": 0, "entries": {}})
+            section["entries"].update(entries)
+            section["fetched_at"] = time.time()
+            self._save()
+
+    def _refresh_in_background(self, namespace, loader):
+        with self._lock:
+            if namespace in self._refreshing:
+                return
+            self._refreshing.add(namespace)
+
+        def run():
+            try:
+                self._refresh(namespace, loader)
+                logging.info(f"Refreshed {namespace} voice catalog")
+            except Exception as e:
+                logging.warning(f"Failed to refresh {namespace} voice catalog: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(namespace)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path, "r") as f:
+                    self._data = json.load(f)
+            except FileNotFoundError:
+                self._data = {}
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable voice cache {self.path}: {e}")
+                self._data = {}
+        return self._data
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self._data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Failed to write voice cache {self.path}: {e}")
+
+
+voice_catalog = VoiceCatalog(Config.VOICE_CACHE_PATH, Config.VOICE_CACHE_TTL)
+
+
+def _match_voice_name(entries, name):
+    """Find a voice by exact name, then case-insensitively, then by prefix ("Paul J." -> "Paul")."""
+    if name in entries:
+        return entries[name]
+    lowered = {voice_name.lower(): voice_id for voice_name, voice_id in entries.items()}
+    wanted = name.lower().rstrip(".")
+    if wanted in lowered:
+        return lowered[wanted]
+    for voice_name, voice_id in lowered.items():
+        if voice_name.startswith(wanted) or wanted.startswith(voice_name):
+            return voice_id
+    return None
+
+
+def get_elevenlabs_voice_id(client, name):
+    """
+    Resolve an ElevenLabs voice name to its voice id through the catalog.
+
+    Falls back to the first voice on the account when the name is unknown.
+
+    Args:
+    client (ElevenLabs): The ElevenLabs client, used only on a cache miss or refresh.
+    name (str): The voice name, e.g. 'Rachel'.
+
+    Returns:
+    str: The voice id.
+    """
+    def load():
+        voices = client.voices.get_all().voices
+        if not voices:
+            raise Exception("No voices available in ElevenLabs")
+        entries = {voice.name: voice.voice_id for voice in voices}
+        # Store the configured name under whatever it resolved to (or the
+        # account's first voice), so every later lookup is a plain hit.
+        entries[name] = _match_voice_name(entries, name) or voices[0].voice_id
+        return entries
+
+    return voice_catalog.get("elevenlabs", name, load)
+
+
+def get_cartesia_embedding(client, voice_id):
+    """
+    Fetch a Cartesia voice embedding through the catalog.
+
+    Args:
+    client (Cartesia): The Cartesia client, used only on a cache miss or refresh.
+    voice_id (str): The Cartesia voice id.
+
+    Returns:
+    list: The voice embedding.
+    """
+    def load():
+        return {voice_id: list(client.voices.get(id=voice_id).embedding)}
+
+    return voice_catalog.get("cartesia", voice_id, load)
@@ -0,0 +1,240 @@
+# voice_assistant/wake_word.py
+
+import glob
+import logging
+import os
+
+import numpy as np
+import pyaudio
+
+from voice_assistant.config import Config
+from voice_assistant.pcm import read_wav_int16
+
+
+class LogMelFeatures:
+    """
+    Streaming log-mel features for keyword spotting.
+
+    Frames are `frame_ms` long every `hop_ms`. Each feature vector has its
+    mean removed and is scaled to unit length, so the cosine distance between
+    two frames is one minus their dot product and does not depend on how
+    loud the speaker is.
+
+    Args:
+    sample_rate (int): The rate of the samples passed to process().
+    bands (int): The number of mel bands.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=25, hop_ms=10, bands=24):
+        self.frame = sample_rate * frame_ms // 1000
+        self.hop = sample_rate * hop_ms // 1000
+        n_fft = 1 << (self.frame - 1).bit_length()
+        self._window = np.hanning(self.frame).astype(np.float32)
+        self._n_fft = n_fft
+        self._filters = _mel_filters(sample_rate, n_fft, bands, 100, min(7600, sample_rate / 2))
+        self._buffer = np.zeros(0, dtype=np.float32)
+
+    def process(self, samples):
+        """
+        Args:
+        samples (np.ndarray): The next int16 samples.
+
+        Returns:
+        np.ndarray: (frames, bands) features for every hop completed, possibly none.
+        """
+        self._buffer = np.concatenate([self._buffer, samples.astype(np.float32)])
+        count = (len(self._buffer) - self.frame) // self.hop + 1
+        if count <= 0:
+            return np.zeros((0, self._filters.shape[0]), dtype=np.float32)
+        frames = np.lib.stride_tricks.sliding_window_view(self._buffer, self.frame)[::self.hop][:count]
+        self._buffer = self._buffer[count * self.hop:]
+        spectrum = np.abs(np.fft.rfft(frames * self._window, self._n_fft)) ** 2
+        features = np.log(spectrum @ self._filters.T + 1e-3)
+        features -= features.mean(axis=1, keepdims=True)
+        features /= np.linalg.norm(features, axis=1, keepdims=True) + 1e-6
+        return features.astype(np.float32)
+
+    def reset(self):
+        self._buffer = np.zeros(0, dtype=np.float32)
+
+
+def _mel_filters(sample_rate, n_fft, bands, low, high):
+    mel = lambda hz: 2595 * np.log10(1 + hz / 700)
+    hz = lambda m: 700 * (10 ** (m / 2595) - 1)
+    edges = hz(np.linspace(mel(low), mel(high), bands + 2))
+    bins = np.fft.rfftfreq(n_fft, 1 / sample_rate)
+    filters = np.zeros((bands, len(bins)), dtype=np.float32)
+    for i in range(bands):
+        left, center, right = edges[i:i + 3]
+        rising = (bins - left) / (center - left)
+        falling = (right - bins) / (right - center)
+        filters[i] = np.maximum(0, np.minimum(rising, falling))
+    return filters
+
+
+class TemplateMatcher:
+    """
+    Find a recorded template anywhere in a stream of features, one frame at a time.
+
+    This is subsequence dynamic time warping computed column by column: for
+    every incoming frame, each template frame keeps the cheapest path that
+    ends on it, coming from the same template frame (the input is slower),
+    the previous one, or the one before that (the input is faster). A path
+    can start at any input frame. The score is the average cosine distance
+    along the best path that reaches the template's last frame. The work per
+    frame is a few vector operations over the template's length, however
+    long the stream runs.
+
+    Args:
+    template (np.ndarray): (frames, bands) features of the keyword.
+    """
+
+    def __init__(self, template):
+        self.template = template
+        self.reset()
+
+    def reset(self):
+        length = len(self.template)
+        self._cost = np.full(length, np.inf, dtype=np.float32)
+        self._steps = np.ones(length, dtype=np.float32)
+
+    def step(self, feature):
+        """
+        Args:
+        feature (np.ndarray): One input frame's features.
+
+        Returns:
+        float: The average distance of the best match ending at this frame.
+        """
+        distance = 1 - self.template @ feature
+        cost, steps = self._cost, self._steps
+        # Candidate predecessors: stay, advance one, advance two
+        candidate_cost = np.stack([cost, np.roll(cost, 1), np.roll(cost, 2)])
+        candidate_steps = np.stack([steps, np.roll(steps, 1), np.roll(steps, 2)])
+        candidate_cost[1, 0] = candidate_cost[2, :2] = np.inf
+        best = np.argmin(candidate_cost / candidate_steps, axis=0)
+        columns = np.arange(len(cost))
+        self._cost = candidate_cost[best, columns] + distance
+        self._steps = candidate_steps[best, columns] + 1
+        # A match can start at any frame
+        self._cost[0] = distance[0]
+        self._steps[0] = 1
+        return float(self._cost[-1] / self._steps[-1])
+
+
+class TemplateWakeWord:
+    """
+    Keyword spotting by matching the microphone against a few recordings of the wake word.
+
+    Needs no model or training: record the wake word three to five times
+    (16-bit WAV, silence at the ends is trimmed) and put the files in
+    Config.WAKE_WORD_TEMPLATES. Costs well under a tenth of a core.
+
+    Args:
+    templates (list): Paths of WAV recordings of the wake word.
+    threshold (float): Average cosine distance below which a match counts. Lower is stricter.
+    sample_rate (int): The rate of the audio passed to process().
+    refractory_seconds (float): Matches ignored after a detection.
+    """
+
+    def __init__(self, templates, threshold=0.2, sample_rate=16000, refractory_seconds=1.0):
+        if not templates:
+            raise ValueError("No wake word templates found")
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.features = LogMelFeatures(sample_rate)
+        self.matchers = [TemplateMatcher(self._template_features(path)) for path in templates]
+        self._refractory = int(refractory_seconds * 1000 / 10)
+        self._quiet = 0
+        self.last_score = 1.0
+
+    def _template_features(self, path):
+        samples, _ = read_wav_int16(path, self.sample_rate)
+        features = LogMelFeatures(self.sample_rate)
+        frames = features.process(samples)
+        # Trim leading and trailing silence, which would otherwise match any pause
+        hop = features.hop
+        levels = np.array([np.sqrt(np.mean(samples[i * hop:i * hop + features.frame].astype(np.float32) ** 2))
+                           for i in range(len(frames))])
+        voiced = np.flatnonzero(levels > 0.1 * levels.max())
+        return frames[voiced[0]:voiced[-1] + 1]
+
+    def process(self, pcm):
+        """
+        Feed microphone audio.
+
+        Args:
+        pcm (bytes): 16-bit mono PCM at `sample_rate`, any length.
+
+        Returns:
+        bool: True if the wake word ended within this audio.
+        """
+        detected = False
+        for feature in self.features.process(np.frombuffer(pcm, dtype=np.int16)):
+            score = min(matcher.step(feature) for matcher in self.matchers)
+            if self._quiet:
+                self._quiet -= 1
+                continue
+            self.last_score = score
+            if score < self.threshold:
+                detected = True
+                self._quiet = self._refractory
+                for matcher in self.matchers:
+                    matcher.reset()
+        return detected
+
+    def reset(self):
+        self.features.reset()
+        for matcher in self.matchers:
+            matcher.reset()
+        self._quiet = 0
+
+
+def _template_wake_word():
+    templates = sorted(glob.glob(os.path.join(Config.WAKE_WORD_TEMPLATES, "*.wav")))
+    return TemplateWakeWord(templates, Config.WAKE_WORD_THRESHOLD, Config.WAKE_WORD_SAMPLE_RATE)
+
+
+# Wake word engines by name; each builds a detector from Config. A detector
+# has process(pcm) -> bool and reset(), e.g. a small ONNX keyword model
+# wrapped the same way.
+WAKE_WORD_ENGINES = {
+    "template": _template_wake_word,
+}
+
+
+def create_wake_word_detector(engine=None):
+    """
+    Args:
+    engine (str, optional): A key of WAKE_WORD_ENGINES. Defaults to Config.WAKE_WORD_ENGINE.
+
+    Returns:
+    The detector.
+    """
+    engine = engine or Config.WAKE_WORD_ENGINE
+    if engine not in WAKE_WORD_ENGINES:
+        raise ValueError(f"Unsupported wake word engine: {engine}")
+    return WAKE_WORD_ENGINES[engine]()
+
+
+def wait_for_wake_word(detector):
+    """
+    Listen on the microphone until the wake word is heard.
+
+    Args:
+    detector: A detector from create_wake_word_detector().
+    """
+    sample_rate = Config.WAKE_WORD_SAMPLE_RATE
+    frame = sample_rate // 50  # 20 ms
+    p = pyaudio.PyAudio()
+    stream = p.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, frames_per_buffer=frame, input=True)
+    logging.info("Waiting for the wake word")
+    try:
+        detector.reset()
+        while not detector.process(stream.read(frame, exception_on_overflow=False)):
+            pass
+        logging.info("Wake word detected")
+    finally:
+        stream.stop_stream()
+        stream.close()
+        p.terminate()
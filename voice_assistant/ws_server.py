@@ -0,0 +1,396 @@
+# voice_assistant/ws_server.py
+
+"""
+Headless WebSocket server running the full STT -> LLM -> TTS pipeline for many clients.
+
+Each connection is one conversation with its own chat history. Messages from
+the client are either binary frames of microphone audio (16-bit mono PCM at
+the rate given in "start") or JSON text frames:
+
+    {"type": "start", "sample_rate": 16000}   begin an utterance (optional; resets the buffer)
+    {"type": "end_of_utterance"}              transcribe the buffered audio and answer it
+    {"type": "text", "text": "..."}           answer typed text, skipping transcription
+    {"type": "cancel"}                        stop the turn in progress (barge-in)
+    {"type": "settings", "tts_model": ...}    change this connection's models or voices (Settings fields)
+
+The server answers with JSON frames, and binary frames for audio:
+
+    {"type": "ready", "session": "..."}
+    {"type": "transcript", "text": "...", "final": false|true}
+    {"type": "response_delta", "text": "..."}  as the LLM writes
+    {"type": "response_done", "text": "..."}
+    {"type": "audio_start", "sentence": 0, "text": "...", "encoding": ..., "sample_rate": ..., "channels": ...}
+    <binary audio chunks>
+    {"type": "audio_end", "sentence": 0}
+    {"type": "turn_done"}
+    {"type": "error", "message": "..."}
+
+Sentences are synthesized as soon as the LLM finishes writing them, one after
+another, while the rest of the reply is still being generated. A new
+utterance, "cancel" or a disconnect cancels the turn in progress.
+
+Usage:
+    python -m voice_assistant.ws_server [--host 127.0.0.1] [--port 8765]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import uvicorn
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+
+from voice_assistant.config import Config
+from voice_assistant.metrics import metrics
+from voice_assistant.resilience import Deadline
+from voice_assistant.response_generation import stream_response
+from voice_assistant.settings import Settings
+from voice_assistant.text_to_speech import text_to_speech_stream
+from voice_assistant.transcription import transcribe_audio
+from voice_assistant.utils import SentenceStream
+
+# Settings a client may change for its own connection; API keys stay server-side
+CLIENT_SETTINGS = {
+    "transcription_model", "response_model", "tts_model", "openai_llm", "groq_llm", "ollama_llm",
+    "openai_tts_voice", "elevenlabs_voice", "cartesia_voice_id",
+}
+SYSTEM_PROMPT = {"role": "system", "content": "You are spark, a helpful voice assistant. Your answers are short and concise."}
+
+app = FastAPI()
+
+# Provider SDKs block, so their calls run on this pool instead of the event
+# loop. Threads mostly wait on the network, hence a pool far larger than the
+# core count; a turn holds at most two of them (LLM stream and TTS stream).
+_executor = ThreadPoolExecutor(max_workers=Config.WS_MAX_WORKERS, thread_name_prefix="ws-pipeline")
+_sessions = {}
+
+
+class Session:
+    """
+    State of one connection: its conversation, the utterance being recorded and the turn in progress.
+
+    Args:
+    websocket (WebSocket): The accepted connection.
+    """
+
+    def __init__(self, websocket):
+        self.id = uuid.uuid4().hex[:12]
+        self.websocket = websocket
+        self.settings = Settings.from_config()
+        self.chat_history = [SYSTEM_PROMPT]
+        self.sample_rate = Config.WS_SAMPLE_RATE
+        self.audio = bytearray()
+        self.turn = None
+        self.partial = None
+        self.partial_at = 0
+        self.directory = tempfile.mkdtemp(prefix=f"ws-{self.id}-")
+        self._send_lock = asyncio.Lock()
+        self._utterances = 0
+
+    async def send(self, message):
+        """Send a JSON message, or raw audio if given bytes."""
+        # Frames from the turn task and the receive loop must not interleave
+        async with self._send_lock:
+            if isinstance(message, (bytes, bytearray)):
+                await self.websocket.send_bytes(bytes(message))
+            else:
+                await self.websocket.send_text(json.dumps(message))
+
+    def start_utterance(self, sample_rate=None):
+        self.cancel_turn()
+        self.audio.clear()
+        self.partial_at = 0
+        if sample_rate:
+            self.sample_rate = int(sample_rate)
+
+    def add_audio(self, data):
+        """
+        Buffer microphone audio.
+
+        Returns:
+        bool: False if the utterance is over the length limit and the data was dropped.
+        """
+        if len(self.audio) + len(data) > Config.WS_MAX_UTTERANCE_SECONDS * self.sample_rate * 2:
+            return False
+        self.audio.extend(data)
+        return True
+
+    def write_utterance(self, audio=None):
+        """
+        Write buffered audio to a WAV file in the session's directory.
+
+        Returns:
+        str: The file path.
+        """
+        self._utterances += 1
+        path = os.path.join(self.directory, f"utterance-{self._utterances}.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            f.writeframes(self.audio if audio is None else audio)
+        return path
+
+    def start_turn(self, text=None):
+        """Cancel the turn in progress and answer the buffered utterance, or `text` if given."""
+        self.cancel_turn()
+        audio, self.audio = self.audio, bytearray()
+        self.turn = asyncio.create_task(run_turn(self, audio, text))
+
+    def cancel_turn(self):
+        for task in (self.turn, self.partial):
+            if task is not None and not task.done():
+                task.cancel()
+        self.turn = self.partial = None
+
+    def close(self):
+        self.cancel_turn()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+async def run_blocking(function, *args):
+    """Run a blocking call on the pipeline's thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(_executor, function, *args)
+
+
+async def iterate_blocking(iterable):
+    """
+    Consume a blocking iterator on the thread pool, yielding its items on the event loop.
+
+    When the consumer stops early or is cancelled, the worker thread stops at
+    the next item, which closes the provider's stream.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stopped = threading.Event()
+    done = object()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:  # event loop already closed
+            stopped.set()
+
+    def pump():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if stopped.is_set():
+                    break
+                put(item)
+        except Exception as e:
+            put(e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+            put(done)
+
+    loop.run_in_executor(_executor, pump)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+
+
+async def transcribe(session, audio, deadline=None):
+    path = session.write_utterance(audio)
+    try:
+        settings = session.settings
+        return await run_blocking(lambda: transcribe_audio(settings.transcription_model, settings.transcription_api_key,
+                                                           path, settings=settings, deadline=deadline))
+    finally:
+        os.remove(path)
+
+
+async def send_partial_transcript(session, audio):
+    try:
+        text = await transcribe(session, audio)
+    except Exception as e:
+        logging.warning(f"Partial transcription failed for session {session.id}: {e}")
+        return
+    await session.send({"type": "transcript", "text": text, "final": False})
+
+
+async def speak(settings, session, index, sentence, deadline, spoken):
+    """Stream one sentence of the reply to the client, adding it to `spoken` once its audio starts."""
+    audio_format, chunks = await run_blocking(lambda: text_to_speech_stream(settings.tts_model, settings.tts_api_key,
+                                                                            sentence, settings=settings,
+                                                                            deadline=deadline))
+    await session.send({"type": "audio_start", "sentence": index, "text": sentence, **audio_format})
+    spoken.append(sentence)
+    streaming_since = time.perf_counter()
+    try:
+        async for chunk in iterate_blocking(chunks):
+            await session.send(chunk)
+    finally:
+        # Only waiting for a sentence's first audio counts against the turn, not streaming the rest
+        deadline.extend(time.perf_counter() - streaming_since)
+    await session.send({"type": "audio_end", "sentence": index})
+
+
+async def speak_queued(settings, session, sentences, deadline, spoken):
+    index = 0
+    while (sentence := await sentences.get()) is not None:
+        await speak(settings, session, index, sentence, deadline, spoken)
+        index += 1
+
+
+async def run_turn(session, audio, text=None):
+    """
+    Answer one utterance: transcribe it, stream the reply text and speak it sentence by sentence.
+
+    Args:
+    session (Session): The connection's session.
+    audio (bytearray): The utterance's PCM audio; ignored if `text` is given.
+    text (str, optional): Typed input to answer instead.
+    """
+    # A settings change takes effect from the next turn, not halfway through this one
+    settings = session.settings
+    deadline = Deadline.for_turn()
+    reply = []
+    spoken = []  # sentences whose audio reached the client, even if cut off
+    speaker = None
+    asked = answered = False
+    try:
+        with metrics.span("ws_turn"):
+            if text is None:
+                text = await transcribe(session, audio, deadline)
+                await session.send({"type": "transcript", "text": text, "final": True})
+            if not text or not text.strip():
+                await session.send({"type": "turn_done"})
+                return
+            session.chat_history.append({"role": "user", "content": text})
+            asked = True
+
+            sentences = asyncio.Queue()
+            speaker = asyncio.create_task(speak_queued(settings, session, sentences, deadline, spoken))
+            splitter = SentenceStream()
+            deltas = stream_response(settings.response_model, settings.response_api_key, list(session.chat_history), settings,
+                                     deadline=deadline)
+            async for delta in iterate_blocking(deltas):
+                reply.append(delta)
+                await session.send({"type": "response_delta", "text": delta})
+                for sentence in splitter.feed(delta):
+                    sentences.put_nowait(sentence)
+                if speaker.done():  # TTS failed; stop generating a reply nobody will hear
+                    break
+            for sentence in splitter.flush():
+                sentences.put_nowait(sentence)
+            sentences.put_nowait(None)
+
+            response = "".join(reply)
+            await session.send({"type": "response_done", "text": response})
+            await speaker
+            answered = True
+            await session.send({"type": "turn_done"})
+    except asyncio.CancelledError:
+        raise
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logging.error(f"Turn failed for session {session.id}: {e}")
+        try:
+            await session.send({"type": "error", "message": str(e)})
+        except Exception:
+            pass
+    finally:
+        if speaker is not None and not speaker.done():
+            speaker.cancel()
+        if answered:
+            session.chat_history.append({"role": "assistant", "content": "".join(reply)})
+        elif spoken:
+            # Interrupted: keep what the client heard, so the next turn has context
+            session.chat_history.append({"role": "assistant", "content": " ".join(spoken)})
+        elif asked:
+            # Nothing was said (e.g. every provider failed): drop the question too,
+            # so the history doesn't hold two user turns in a row
+            session.chat_history.pop()
+
+
+async def handle_message(session, message):
+    if message.get("bytes") is not None:
+        if not session.add_audio(message["bytes"]):
+            await session.send({"type": "error", "message": f"Utterance longer than {Config.WS_MAX_UTTERANCE_SECONDS}s; audio dropped"})
+            return
+        interval = Config.WS_PARTIAL_TRANSCRIPT_SECONDS
+        if interval and (session.partial is None or session.partial.done()):
+            if len(session.audio) - session.partial_at >= interval * session.sample_rate * 2:
+                session.partial_at = len(session.audio)
+                session.partial = asyncio.create_task(send_partial_transcript(session, bytes(session.audio)))
+        return
+
+    try:
+        event = json.loads(message.get("text") or "")
+    except ValueError:
+        await session.send({"type": "error", "message": "Expected a JSON object"})
+        return
+    kind = event.get("type") if isinstance(event, dict) else None
+    if kind == "start":
+        session.start_utterance(event.get("sample_rate"))
+    elif kind == "end_of_utterance":
+        session.start_turn()
+    elif kind == "text":
+        session.start_turn(str(event.get("text", "")))
+    elif kind == "cancel":
+        session.cancel_turn()
+    elif kind == "settings":
+        changes = {key: value for key, value in event.items() if key != "type"}
+        unknown = set(changes) - CLIENT_SETTINGS
+        if unknown:
+            await session.send({"type": "error", "message": f"Settings that can't be changed: {', '.join(sorted(unknown))}"})
+            return
+        session.settings = session.settings.replace(**changes)
+    else:
+        await session.send({"type": "error", "message": f"Unknown message type: {kind}"})
+
+
+@app.websocket("/ws")
+async def voice_session(websocket: WebSocket):
+    await websocket.accept()
+    if len(_sessions) >= Config.WS_MAX_SESSIONS:
+        await websocket.close(code=1013, reason="Server busy")
+        return
+    session = Session(websocket)
+    _sessions[session.id] = session
+    try:
+        await session.send({"type": "ready", "session": session.id})
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            await handle_message(session, message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        del _sessions[session.id]
+        session.close()
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "sessions": len(_sessions)}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=Config.WS_HOST)
+    parser.add_argument("--port", type=int, default=Config.WS_PORT)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, ws_max_size=1024 * 1024)